@@ -23,9 +23,19 @@ def create_app(config=None):
     mail.init_app(app)
     limiter.init_app(app)
 
-    from app.database import init_db, close_db
+    from app.database import DatabaseBusyError, close_db, handle_database_busy, init_db
     init_db(app)
     app.teardown_appcontext(close_db)
+    app.register_error_handler(DatabaseBusyError, handle_database_busy)
+
+    from app.services.llm_provider_service import validate_provider
+    validate_provider(app.config)
+
+    from app.services.usage_service import start_flusher
+    start_flusher(app)
+
+    from app.services.resilience_service import LLMUnavailableError, handle_llm_unavailable
+    app.register_error_handler(LLMUnavailableError, handle_llm_unavailable)
 
     from app.blueprints.main import main_bp
     from app.blueprints.auth import auth_bp
@@ -38,6 +48,10 @@ def create_app(config=None):
     from app.blueprints.blurb import blurb_bp
     from app.blueprints.generate import generate_bp
     from app.blueprints.data import data_bp
+    from app.blueprints.bootstrap import bootstrap_bp
+    from app.blueprints.changes import changes_bp
+    from app.blueprints.search import search_bp
+    from app.blueprints.usage import usage_bp
 
     app.register_blueprint(main_bp)
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
@@ -50,5 +64,9 @@ def create_app(config=None):
     app.register_blueprint(blurb_bp, url_prefix='/api/blurbs')
     app.register_blueprint(generate_bp, url_prefix='/api/generate')
     app.register_blueprint(data_bp, url_prefix='/api/data')
+    app.register_blueprint(bootstrap_bp, url_prefix='/api/bootstrap')
+    app.register_blueprint(changes_bp, url_prefix='/api/changes')
+    app.register_blueprint(search_bp, url_prefix='/api/search')
+    app.register_blueprint(usage_bp, url_prefix='/api/usage')
 
     return app
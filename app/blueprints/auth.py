@@ -1,6 +1,7 @@
 from flask import Blueprint, jsonify, request
 from flask_login import current_user, login_user, logout_user
 
+from app.database import DatabaseBusyError
 from app.extensions import limiter
 from app.models import User
 from app.services.auth_service import (
@@ -13,18 +14,22 @@ from app.services.auth_service import (
 auth_bp = Blueprint('auth', __name__)
 
 
-@auth_bp.route('/session', methods=['GET'])
-def session():
+def session_payload():
     if current_user.is_authenticated:
-        return jsonify({
+        return {
             'authenticated': True,
             'user': {
                 'id': current_user.id,
                 'username': current_user.username,
                 'email': current_user.email,
             },
-        })
-    return jsonify({'authenticated': False})
+        }
+    return {'authenticated': False}
+
+
+@auth_bp.route('/session', methods=['GET'])
+def session():
+    return jsonify(session_payload())
 
 
 @auth_bp.route('/register', methods=['POST'])
@@ -56,6 +61,8 @@ def register():
 
     try:
         password, user_id = register_user(username, email)
+    except DatabaseBusyError:
+        raise
     except Exception:
         return jsonify({'error': 'Registration failed'}), 500
 
@@ -1,28 +1,86 @@
-from flask import Blueprint, jsonify, request
+import json
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from flask_login import current_user, login_required
 
-from app.database import get_db
+from app.database import eq_clause, get_db, in_clause, join_clauses, write_transaction
+from app.etag import conditional
+from app.services.async_service import run_job
+from app.services.pagination import keyset_clause, limit_clause, page_response, parse_page, select_list
+from app.services.resilience_service import LLMUnavailableError, request_deadline
+from app.services.sync_service import since_clause
+from app.services.task_service import create_job, get_job
 
 blurb_bp = Blueprint('blurb', __name__)
 
 
+BLURB_FIELDS = (
+    'id', 'template_name', 'field_key', 'suggestion_text', 'status', 'user_text',
+    'created_at', 'updated_at',
+)
+BLURB_ORDER = ('field_key', 'id')
+BLURB_STATUSES = ('pending', 'accepted', 'modified', 'rejected')
+
+
+def fetch_blurbs(db, user_id, template_name=None, since=None, ids=None,
+                 field_key=None, status=None, page=None):
+    clause, params = join_clauses(
+        since_clause(user_id, 'blurbs', since),
+        in_clause('id', ids),
+        eq_clause('template_name', template_name),
+        eq_clause('field_key', field_key),
+        eq_clause('status', status),
+        keyset_clause(page),
+    )
+    rows = db.execute(
+        f'SELECT {select_list(BLURB_FIELDS, page)} FROM blurbs '
+        f'WHERE user_id = ?{clause} ORDER BY field_key, id{limit_clause(page)}',
+        (user_id, *params),
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
 @blurb_bp.route('', methods=['GET'])
 @login_required
+@conditional('blurbs')
 def list_blurbs():
     template_name = request.args.get('template_name', 'classic')
-    db = get_db()
-    rows = db.execute(
-        'SELECT id, template_name, field_key, suggestion_text, status, user_text, '
-        'created_at, updated_at FROM blurbs '
-        'WHERE user_id = ? AND template_name = ? ORDER BY field_key, id',
-        (current_user.id, template_name),
-    ).fetchall()
-    return jsonify([dict(r) for r in rows])
+    status = request.args.get('status')
+    if status is not None and status not in BLURB_STATUSES:
+        return jsonify({'error': 'Invalid status'}), 400
+    try:
+        page = parse_page(request.args, BLURB_FIELDS, BLURB_ORDER)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    rows = fetch_blurbs(
+        get_db(), current_user.id, template_name,
+        field_key=request.args.get('field_key'), status=status, page=page,
+    )
+    return page_response(rows, page)
+
+
+def _store_blurbs(user_id, template_name, field_key, suggestions, metric_id):
+    """Insert generated suggestions as pending blurbs; returns the response body."""
+    with write_transaction() as db:
+        db.executemany(
+            'INSERT INTO blurbs (user_id, template_name, field_key, suggestion_text, prompt_metric_id) '
+            'VALUES (?, ?, ?, ?, ?)',
+            [(user_id, template_name, field_key, text, metric_id) for text in suggestions],
+        )
+        # The write lock is held, so the newest rows are the ones just inserted
+        new_ids = [r['id'] for r in db.execute(
+            'SELECT id FROM blurbs WHERE user_id = ? ORDER BY id DESC LIMIT ?',
+            (user_id, len(suggestions)),
+        )]
+        rows = fetch_blurbs(db, user_id, ids=new_ids)
+    return {'message': f'Generated {len(suggestions)} blurbs', 'blurbs': rows}
 
 
 @blurb_bp.route('/generate', methods=['POST'])
 @login_required
 def generate():
+    deadline = request_deadline()
     data = request.get_json()
     if not data:
         return jsonify({'error': 'Request body required'}), 400
@@ -35,22 +93,192 @@ def generate():
 
     try:
         from app.services.openai_service import generate_blurbs
-        suggestions = generate_blurbs(current_user.id, field_key, template_name)
+        suggestions, metric_id = generate_blurbs(
+            current_user.id, field_key, template_name, bool(data.get('bypass_cache')), deadline,
+        )
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
+    except LLMUnavailableError:
+        raise
     except Exception as e:
         return jsonify({'error': f'Generation failed: {str(e)}'}), 500
 
-    db = get_db()
-    for text in suggestions:
-        db.execute(
-            'INSERT INTO blurbs (user_id, template_name, field_key, suggestion_text) '
-            'VALUES (?, ?, ?, ?)',
-            (current_user.id, template_name, field_key, text),
+    return jsonify(_store_blurbs(current_user.id, template_name, field_key, suggestions, metric_id)), 201
+
+
+@blurb_bp.route('/generate/async', methods=['POST'])
+@login_required
+def generate_async():
+    """Start blurb generation on the shared event loop and answer at once.
+
+    Returns 202 with a job to poll at ``/generate/<job_id>``; once it is
+    completed its ``result`` is what ``/generate`` would have returned.
+    """
+    deadline = request_deadline()
+    data = request.get_json()
+    if not data:
+        return jsonify({'error': 'Request body required'}), 400
+
+    field_key = data.get('field_key', '').strip()
+    template_name = data.get('template_name', 'classic').strip()
+
+    if not field_key:
+        return jsonify({'error': 'field_key is required'}), 400
+
+    user_id = current_user.id
+    try:
+        from app.services.openai_service import generate_blurbs_async
+        coro = generate_blurbs_async(user_id, field_key, template_name, bool(data.get('bypass_cache')), deadline)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    job = create_job(user_id, 'blurbs')
+    run_job(job['id'], coro, lambda value: _store_blurbs(user_id, template_name, field_key, *value))
+    return jsonify({'message': 'Generation started', 'job': get_job(job['id'], user_id)}), 202
+
+
+@blurb_bp.route('/generate/<job_id>', methods=['GET'])
+@login_required
+def generate_status(job_id):
+    job = get_job(job_id, current_user.id)
+    if job is None or job['kind'] != 'blurbs':
+        return jsonify({'error': 'Generation job not found'}), 404
+    return jsonify(job)
+
+
+def _sse(event, data):
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+@blurb_bp.route('/generate/stream', methods=['POST'])
+@login_required
+def generate_stream():
+    """Generate blurbs as Server-Sent Events.
+
+    Each suggestion is stored and sent as a ``blurb`` event with its row as
+    soon as the model finishes it; a ``done`` event closes the stream, or an
+    ``error`` event if generation fails part way. Errors found before
+    streaming starts get a JSON response, as in ``/generate``.
+    """
+    deadline = request_deadline()
+    data = request.get_json()
+    if not data:
+        return jsonify({'error': 'Request body required'}), 400
+
+    field_key = data.get('field_key', '').strip()
+    template_name = data.get('template_name', 'classic').strip()
+
+    if not field_key:
+        return jsonify({'error': 'field_key is required'}), 400
+
+    user_id = current_user.id
+    try:
+        from app.services.openai_service import stream_blurbs
+        metric_id, suggestions = stream_blurbs(
+            user_id, field_key, template_name, bool(data.get('bypass_cache')), deadline,
         )
-    db.commit()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except LLMUnavailableError:
+        raise
+    except Exception as e:
+        return jsonify({'error': f'Generation failed: {str(e)}'}), 500
 
-    return jsonify({'message': f'Generated {len(suggestions)} blurbs'}), 201
+    def events():
+        count = 0
+        try:
+            for text in suggestions:
+                with write_transaction() as db:
+                    blurb_id = db.execute(
+                        'INSERT INTO blurbs (user_id, template_name, field_key, suggestion_text, prompt_metric_id) '
+                        'VALUES (?, ?, ?, ?, ?)',
+                        (user_id, template_name, field_key, text, metric_id),
+                    ).lastrowid
+                    row = fetch_blurbs(db, user_id, ids=[blurb_id])[0]
+                count += 1
+                yield _sse('blurb', row)
+        except Exception as e:
+            yield _sse('error', {'error': f'Generation failed: {str(e)}'})
+            return
+        yield _sse('done', {'message': f'Generated {count} blurbs', 'count': count})
+
+    response = Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        # Proxies must pass each event on rather than buffer the response
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+    # Closes the model's stream even if the client left before the first event
+    response.call_on_close(suggestions.close)
+    return response
+
+
+@blurb_bp.route('/generate-all', methods=['POST'])
+@login_required
+def generate_all():
+    """Generate every blurb section of a template concurrently, as Server-Sent Events.
+
+    ``field_keys`` narrows it to some sections. A ``section`` event reports
+    each section's suggestions (or ``error``) as soon as it finishes; once
+    all are in, the blurbs are stored in one transaction and a ``done``
+    event carries the new rows.
+    """
+    deadline = request_deadline()
+    data = request.get_json()
+    if not data:
+        return jsonify({'error': 'Request body required'}), 400
+
+    template_name = data.get('template_name', 'classic').strip()
+    field_keys = data.get('field_keys')
+    if field_keys is not None and (
+        not isinstance(field_keys, list) or not all(isinstance(k, str) for k in field_keys)
+    ):
+        return jsonify({'error': 'field_keys must be a list of strings'}), 400
+
+    user_id = current_user.id
+    try:
+        from app.services.openai_service import generate_all_blurbs
+        field_keys, results = generate_all_blurbs(
+            user_id, template_name, field_keys, bool(data.get('bypass_cache')), deadline,
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Generation failed: {str(e)}'}), 500
+
+    def events():
+        generated, failed = [], []
+        for field_key, suggestions, metric_id, error in results:
+            if error is not None:
+                failed.append(field_key)
+                yield _sse('section', {'field_key': field_key, 'error': f'Generation failed: {error}'})
+                continue
+            generated.extend((user_id, template_name, field_key, text, metric_id) for text in suggestions)
+            yield _sse('section', {'field_key': field_key, 'suggestions': suggestions})
+
+        with write_transaction() as db:
+            db.executemany(
+                'INSERT INTO blurbs (user_id, template_name, field_key, suggestion_text, prompt_metric_id) '
+                'VALUES (?, ?, ?, ?, ?)',
+                generated,
+            )
+            # The write lock is held, so the newest rows are the ones just inserted
+            new_ids = [r['id'] for r in db.execute(
+                'SELECT id FROM blurbs WHERE user_id = ? ORDER BY id DESC LIMIT ?',
+                (user_id, len(generated)),
+            )]
+            rows = fetch_blurbs(db, user_id, ids=new_ids)
+        yield _sse('done', {
+            'message': f'Generated {len(rows)} blurbs for {len(field_keys) - len(failed)} sections',
+            'blurbs': rows,
+            'failed': failed,
+        })
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
 
 
 @blurb_bp.route('/<int:blurb_id>', methods=['PUT'])
@@ -69,17 +297,18 @@ def update_blurb(blurb_id):
         return jsonify({'error': 'Blurb not found'}), 404
 
     status = data.get('status', 'pending')
-    if status not in ('pending', 'accepted', 'modified', 'rejected'):
+    if status not in BLURB_STATUSES:
         return jsonify({'error': 'Invalid status'}), 400
 
     user_text = data.get('user_text', '')
 
-    db.execute(
-        'UPDATE blurbs SET status = ?, user_text = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?',
-        (status, user_text, blurb_id),
-    )
-    db.commit()
-    return jsonify({'message': 'Blurb updated'})
+    with write_transaction() as db:
+        db.execute(
+            'UPDATE blurbs SET status = ?, user_text = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?',
+            (status, user_text, blurb_id),
+        )
+        row = fetch_blurbs(db, current_user.id, ids=[blurb_id])[0]
+    return jsonify({'message': 'Blurb updated', 'blurb': row})
 
 
 @blurb_bp.route('/<int:blurb_id>', methods=['DELETE'])
@@ -93,6 +322,6 @@ def delete_blurb(blurb_id):
     if existing is None:
         return jsonify({'error': 'Blurb not found'}), 404
 
-    db.execute('DELETE FROM blurbs WHERE id = ?', (blurb_id,))
-    db.commit()
-    return jsonify({'message': 'Blurb deleted'})
+    with write_transaction() as db:
+        db.execute('DELETE FROM blurbs WHERE id = ?', (blurb_id,))
+    return jsonify({'message': 'Blurb deleted', 'id': blurb_id})
@@ -0,0 +1,44 @@
+from flask import Blueprint, jsonify, request
+from flask_login import current_user
+
+from app.blueprints.auth import session_payload
+from app.blueprints.blurb import fetch_blurbs
+from app.blueprints.experience import fetch_experiences
+from app.blueprints.job import fetch_analyses
+from app.blueprints.photo import fetch_photos
+from app.blueprints.profile import fetch_profile
+from app.blueprints.project import fetch_projects
+from app.blueprints.settings import fetch_settings
+from app.database import read_transaction
+from app.services.sync_service import current_cursor
+from app.services.template_service import get_available_templates
+
+bootstrap_bp = Blueprint('bootstrap', __name__)
+
+
+@bootstrap_bp.route('', methods=['GET'])
+def bootstrap():
+    """Everything the SPA needs for first paint, in one response.
+
+    Anonymous callers get the session payload only, so the page can use this
+    instead of /api/auth/session as its first request.
+    """
+    payload = session_payload()
+    if not current_user.is_authenticated:
+        return jsonify(payload)
+
+    template_name = request.args.get('template_name', 'classic')
+    user_id = current_user.id
+    with read_transaction() as db:
+        payload.update({
+            'cursor': current_cursor(db, user_id),
+            'profile': fetch_profile(db, user_id),
+            'photos': fetch_photos(db, user_id),
+            'experiences': fetch_experiences(db, user_id),
+            'projects': fetch_projects(db, user_id),
+            'analyses': fetch_analyses(db, user_id),
+            'blurbs': fetch_blurbs(db, user_id, template_name),
+            'settings': fetch_settings(db, user_id),
+        })
+    payload['templates'] = get_available_templates()
+    return jsonify(payload)
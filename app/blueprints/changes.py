@@ -0,0 +1,50 @@
+from flask import Blueprint, jsonify, request
+from flask_login import current_user, login_required
+
+from app.blueprints.blurb import fetch_blurbs
+from app.blueprints.experience import fetch_experiences
+from app.blueprints.job import fetch_analyses
+from app.blueprints.photo import fetch_photos
+from app.blueprints.profile import fetch_profile
+from app.blueprints.project import fetch_projects
+from app.database import read_transaction
+from app.services.sync_service import changed_resources, current_cursor, parse_cursor
+
+changes_bp = Blueprint('changes', __name__)
+
+FETCHERS = {
+    'photos': fetch_photos,
+    'experiences': fetch_experiences,
+    'projects': fetch_projects,
+    'job_analyses': fetch_analyses,
+    'blurbs': fetch_blurbs,
+}
+
+
+@changes_bp.route('', methods=['GET'])
+@login_required
+def list_changes():
+    """Rows created, updated or deleted since ``?since=<cursor>``.
+
+    Pass the returned ``cursor`` as ``since`` on the next call. Live rows come
+    back in the same shape as the list endpoints; deletes are reported as ids.
+    """
+    try:
+        since = parse_cursor(request.args.get('since'))
+    except ValueError:
+        return jsonify({'error': 'since must be a cursor returned by this endpoint'}), 400
+
+    user_id = current_user.id
+    with read_transaction() as db:
+        cursor = current_cursor(db, user_id)
+        changes = {}
+        if cursor > since:
+            updated, deleted = changed_resources(db, user_id, since)
+            if 'profile' in updated:
+                changes['profile'] = fetch_profile(db, user_id)
+            for resource, fetch in FETCHERS.items():
+                rows = fetch(db, user_id, since=since) if resource in updated else []
+                if rows or resource in deleted:
+                    changes[resource] = {'upserted': rows, 'deleted': deleted.get(resource, [])}
+
+    return jsonify({'cursor': cursor, 'changes': changes})
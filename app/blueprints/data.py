@@ -1,9 +1,13 @@
-import json
+import os
+import uuid
 
-from flask import Blueprint, Response, jsonify, request
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
 from flask_login import current_user, login_required
+from werkzeug.exceptions import RequestEntityTooLarge
 
-from app.services.data_service import export_user_data, import_user_data
+from app.services.archive_service import iter_archive, run_restore_job, validate_archive
+from app.services.data_service import EXPORT_FORMATS, iter_export, run_import_job, validate_import
+from app.services.task_service import create_job, get_job, submit
 
 data_bp = Blueprint('data', __name__)
 
@@ -11,35 +15,110 @@ data_bp = Blueprint('data', __name__)
 @data_bp.route('/export', methods=['GET'])
 @login_required
 def export_data():
-    data = export_user_data(current_user.id)
-    content = json.dumps(data, indent=2, default=str)
+    fmt = request.args.get('format', 'json')
+    compress = request.args.get('compress')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f'format must be one of: {", ".join(EXPORT_FORMATS)}'}), 400
+    if compress not in (None, 'gzip'):
+        return jsonify({'error': 'compress must be gzip'}), 400
+
+    filename = f'cv_data_{current_user.username}.{fmt}'
+    mimetype = 'application/json' if fmt == 'json' else 'application/x-ndjson'
+    if compress == 'gzip':
+        filename += '.gz'
+        mimetype = 'application/gzip'
+
     return Response(
-        content,
-        mimetype='application/json',
-        headers={'Content-Disposition': f'attachment; filename=cv_data_{current_user.username}.json'},
+        stream_with_context(iter_export(current_user.id, fmt, compress)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'},
     )
 
 
-@data_bp.route('/import', methods=['POST'])
-@login_required
-def import_data():
-    if 'file' not in request.files:
-        return jsonify({'error': 'No file provided'}), 400
+def _save_upload(max_bytes, suffix):
+    """Spool the uploaded ``file`` field to disk under INSTANCE_PATH/imports.
+
+    Returns ``(path, None)`` or ``(None, error_response)``.
+    """
+    # Reject oversized uploads from the headers, before reading the body
+    if request.content_length is not None and request.content_length > max_bytes:
+        return None, (jsonify({'error': 'File too large'}), 413)
+    request.max_content_length = max_bytes
+
+    try:
+        if 'file' not in request.files:
+            return None, (jsonify({'error': 'No file provided'}), 400)
+    except RequestEntityTooLarge:
+        return None, (jsonify({'error': 'File too large'}), 413)
 
     file = request.files['file']
     if file.filename == '':
-        return jsonify({'error': 'No file selected'}), 400
+        return None, (jsonify({'error': 'No file selected'}), 400)
+
+    import_dir = os.path.join(current_app.config['INSTANCE_PATH'], 'imports')
+    os.makedirs(import_dir, exist_ok=True)
+    path = os.path.join(import_dir, f'{uuid.uuid4().hex}{suffix}')
+    file.save(path)
+    return path, None
+
+
+@data_bp.route('/import', methods=['POST'])
+@login_required
+def import_data():
+    path, error = _save_upload(current_app.config['IMPORT_MAX_BYTES'], '.json')
+    if error:
+        return error
 
     try:
-        content = file.read().decode('utf-8')
-        data = json.loads(content)
-    except (UnicodeDecodeError, json.JSONDecodeError):
-        return jsonify({'error': 'Invalid JSON file'}), 400
+        with open(path, 'rb') as f:
+            plan = validate_import(f)
+    except ValueError as e:
+        os.remove(path)
+        return jsonify({'error': str(e)}), 400
+
+    job = create_job(current_user.id, 'import', total=plan['total'])
+    submit(run_import_job, job['id'], current_user.id, path, plan)
+    return jsonify({
+        'message': 'Import started',
+        'job': get_job(job['id'], current_user.id),
+    }), 202
+
+
+@data_bp.route('/archive', methods=['GET'])
+@login_required
+def export_archive():
+    return Response(
+        stream_with_context(iter_archive(current_user.id)),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename=cv_archive_{current_user.username}.zip'},
+    )
+
+
+@data_bp.route('/archive', methods=['POST'])
+@login_required
+def restore_archive():
+    path, error = _save_upload(current_app.config['ARCHIVE_MAX_BYTES'], '.zip')
+    if error:
+        return error
 
     try:
-        import_user_data(current_user.id, data)
-        return jsonify({'message': 'Data imported successfully'})
+        plan = validate_archive(path)
     except ValueError as e:
+        os.remove(path)
         return jsonify({'error': str(e)}), 400
-    except Exception as e:
-        return jsonify({'error': f'Import failed: {str(e)}'}), 500
+
+    job = create_job(current_user.id, 'restore', total=plan['total'])
+    submit(run_restore_job, job['id'], current_user.id, path, plan)
+    return jsonify({
+        'message': 'Restore started',
+        'job': get_job(job['id'], current_user.id),
+    }), 202
+
+
+@data_bp.route('/import/<job_id>', methods=['GET'])
+@login_required
+def import_status(job_id):
+    job = get_job(job_id, current_user.id)
+    if job is None:
+        return jsonify({'error': 'Import job not found'}), 404
+    return jsonify(job)
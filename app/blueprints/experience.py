@@ -1,24 +1,81 @@
 from flask import Blueprint, jsonify, request
 from flask_login import current_user, login_required
 
-from app.database import get_db
+from app.database import eq_clause, get_db, in_clause, join_clauses, write_transaction
+from app.etag import conditional
+from app.services.bulk_service import apply_bulk_operations
+from app.services.keyword_service import index_keywords
+from app.services.pagination import keyset_clause, limit_clause, page_response, parse_page, select_list
+from app.services.rank_service import assign_keys, maybe_rebalance, move_item, next_key
+from app.services.sync_service import since_clause
 
 experience_bp = Blueprint('experience', __name__)
 
 VALID_CATEGORIES = {'work', 'education', 'hobby'}
+EXPERIENCE_COLUMNS = ('category', 'title', 'organization', 'start_date', 'end_date', 'description', 'keywords')
+EXPERIENCE_FIELDS = ('id', *EXPERIENCE_COLUMNS, 'sort_key', 'created_at', 'updated_at')
+EXPERIENCE_ORDER = ('sort_key', 'id')
+
+
+def _validate_experience(data):
+    title = data.get('title', '').strip()
+    category = data.get('category', '').strip()
+
+    if not title:
+        return None, 'Title is required'
+    if category not in VALID_CATEGORIES:
+        return None, f'Category must be one of: {", ".join(VALID_CATEGORIES)}'
+
+    return {
+        'category': category,
+        'title': title,
+        'organization': data.get('organization', ''),
+        'start_date': data.get('start_date', ''),
+        'end_date': data.get('end_date', ''),
+        'description': data.get('description', ''),
+        'keywords': data.get('keywords', ''),
+    }, None
+
+
+def fetch_experiences(db, user_id, since=None, ids=None, category=None, page=None):
+    clause, params = join_clauses(
+        since_clause(user_id, 'experiences', since),
+        in_clause('id', ids),
+        eq_clause('category', category),
+        keyset_clause(page),
+    )
+    rows = db.execute(
+        f'SELECT {select_list(EXPERIENCE_FIELDS, page)} '
+        f'FROM experiences WHERE user_id = ?{clause} ORDER BY sort_key, id{limit_clause(page)}',
+        (user_id, *params),
+    ).fetchall()
+    return [dict(r) for r in rows]
 
 
 @experience_bp.route('', methods=['GET'])
 @login_required
+@conditional('experiences')
 def list_experiences():
-    db = get_db()
-    rows = db.execute(
-        'SELECT id, category, title, organization, start_date, end_date, '
-        'description, keywords, sort_order, created_at, updated_at '
-        'FROM experiences WHERE user_id = ? ORDER BY sort_order, id',
-        (current_user.id,),
-    ).fetchall()
-    return jsonify([dict(r) for r in rows])
+    category = request.args.get('category')
+    if category is not None and category not in VALID_CATEGORIES:
+        return jsonify({'error': f'Category must be one of: {", ".join(VALID_CATEGORIES)}'}), 400
+    try:
+        page = parse_page(request.args, EXPERIENCE_FIELDS, EXPERIENCE_ORDER)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    rows = fetch_experiences(get_db(), current_user.id, category=category, page=page)
+    return page_response(rows, page)
+
+
+@experience_bp.route('/<int:exp_id>', methods=['GET'])
+@login_required
+@conditional('experiences')
+def get_experience(exp_id):
+    rows = fetch_experiences(get_db(), current_user.id, ids=[exp_id])
+    if not rows:
+        return jsonify({'error': 'Experience not found'}), 404
+    return jsonify(rows[0])
 
 
 @experience_bp.route('', methods=['POST'])
@@ -28,32 +85,22 @@ def create_experience():
     if not data:
         return jsonify({'error': 'Request body required'}), 400
 
-    title = data.get('title', '').strip()
-    category = data.get('category', '').strip()
+    values, error = _validate_experience(data)
+    if error:
+        return jsonify({'error': error}), 400
 
-    if not title:
-        return jsonify({'error': 'Title is required'}), 400
-    if category not in VALID_CATEGORIES:
-        return jsonify({'error': f'Category must be one of: {", ".join(VALID_CATEGORIES)}'}), 400
+    with write_transaction() as db:
+        sort_key = next_key(db, 'experiences', current_user.id)
 
-    db = get_db()
-    row = db.execute(
-        'SELECT COALESCE(MAX(sort_order), -1) + 1 as next_order FROM experiences WHERE user_id = ?',
-        (current_user.id,),
-    ).fetchone()
-
-    db.execute(
-        'INSERT INTO experiences (user_id, category, title, organization, start_date, end_date, '
-        'description, keywords, sort_order) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
-        (
-            current_user.id, category, title,
-            data.get('organization', ''), data.get('start_date', ''),
-            data.get('end_date', ''), data.get('description', ''),
-            data.get('keywords', ''), row['next_order'],
-        ),
-    )
-    db.commit()
-    return jsonify({'message': 'Experience created'}), 201
+        new_id = db.execute(
+            'INSERT INTO experiences (user_id, category, title, organization, start_date, end_date, '
+            'description, keywords, sort_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (current_user.id, *[values[c] for c in EXPERIENCE_COLUMNS], sort_key),
+        ).lastrowid
+        index_keywords(db, current_user.id, 'experiences', [new_id])
+        row = fetch_experiences(db, current_user.id, ids=[new_id])[0]
+    maybe_rebalance('experiences', current_user.id, sort_key)
+    return jsonify({'message': 'Experience created', 'experience': row}), 201
 
 
 @experience_bp.route('/<int:exp_id>', methods=['PUT'])
@@ -71,26 +118,19 @@ def update_experience(exp_id):
     if existing is None:
         return jsonify({'error': 'Experience not found'}), 404
 
-    title = data.get('title', '').strip()
-    category = data.get('category', '').strip()
-
-    if not title:
-        return jsonify({'error': 'Title is required'}), 400
-    if category not in VALID_CATEGORIES:
-        return jsonify({'error': f'Category must be one of: {", ".join(VALID_CATEGORIES)}'}), 400
+    values, error = _validate_experience(data)
+    if error:
+        return jsonify({'error': error}), 400
 
-    db.execute(
-        'UPDATE experiences SET category=?, title=?, organization=?, start_date=?, end_date=?, '
-        'description=?, keywords=?, updated_at=CURRENT_TIMESTAMP WHERE id=?',
-        (
-            category, title, data.get('organization', ''),
-            data.get('start_date', ''), data.get('end_date', ''),
-            data.get('description', ''), data.get('keywords', ''),
-            exp_id,
-        ),
-    )
-    db.commit()
-    return jsonify({'message': 'Experience updated'})
+    with write_transaction() as db:
+        db.execute(
+            'UPDATE experiences SET category=?, title=?, organization=?, start_date=?, end_date=?, '
+            'description=?, keywords=?, updated_at=CURRENT_TIMESTAMP WHERE id=?',
+            (*[values[c] for c in EXPERIENCE_COLUMNS], exp_id),
+        )
+        index_keywords(db, current_user.id, 'experiences', [exp_id])
+        row = fetch_experiences(db, current_user.id, ids=[exp_id])[0]
+    return jsonify({'message': 'Experience updated', 'experience': row})
 
 
 @experience_bp.route('/<int:exp_id>', methods=['DELETE'])
@@ -104,9 +144,26 @@ def delete_experience(exp_id):
     if existing is None:
         return jsonify({'error': 'Experience not found'}), 404
 
-    db.execute('DELETE FROM experiences WHERE id = ?', (exp_id,))
-    db.commit()
-    return jsonify({'message': 'Experience deleted'})
+    with write_transaction() as db:
+        db.execute('DELETE FROM experiences WHERE id = ?', (exp_id,))
+    return jsonify({'message': 'Experience deleted', 'id': exp_id})
+
+
+@experience_bp.route('/bulk', methods=['POST'])
+@login_required
+def bulk_experiences():
+    data = request.get_json()
+    if not data or not isinstance(data.get('operations'), list):
+        return jsonify({'error': 'Operations list required'}), 400
+
+    with write_transaction() as db:
+        results, errors = apply_bulk_operations(
+            current_user.id, 'experiences', EXPERIENCE_COLUMNS, data['operations'], _validate_experience,
+        )
+        if errors:
+            return jsonify({'error': 'Batch rejected', 'errors': errors}), 400
+        rows = fetch_experiences(db, current_user.id, ids=[r['id'] for r in results if r['op'] != 'delete'])
+    return jsonify({'message': f'Applied {len(results)} operations', 'results': results, 'experiences': rows})
 
 
 @experience_bp.route('/reorder', methods=['PUT'])
@@ -116,11 +173,30 @@ def reorder_experiences():
     if not data or 'order' not in data:
         return jsonify({'error': 'Order list required'}), 400
 
-    db = get_db()
-    for idx, exp_id in enumerate(data['order']):
-        db.execute(
-            'UPDATE experiences SET sort_order = ? WHERE id = ? AND user_id = ?',
-            (idx, exp_id, current_user.id),
-        )
-    db.commit()
-    return jsonify({'message': 'Reordered'})
+    with write_transaction() as db:
+        assign_keys(db, 'experiences', current_user.id, data['order'])
+        rows = fetch_experiences(db, current_user.id)
+    return jsonify({'message': 'Reordered', 'experiences': rows})
+
+
+@experience_bp.route('/<int:exp_id>/position', methods=['PUT'])
+@login_required
+def move_experience(exp_id):
+    data = request.get_json()
+    if not data:
+        return jsonify({'error': 'Request body required'}), 400
+
+    try:
+        with write_transaction() as db:
+            sort_key = move_item(
+                db, 'experiences', current_user.id, exp_id,
+                after_id=data.get('after_id'), before_id=data.get('before_id'),
+            )
+            row = fetch_experiences(db, current_user.id, ids=[exp_id])[0]
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    maybe_rebalance('experiences', current_user.id, sort_key)
+    return jsonify({'message': 'Moved', 'sort_key': sort_key, 'experience': row})
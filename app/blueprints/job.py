@@ -3,27 +3,109 @@ import json
 from flask import Blueprint, jsonify, request
 from flask_login import current_user, login_required
 
-from app.database import get_db
+from app.blueprints.experience import fetch_experiences
+from app.blueprints.project import fetch_projects
+from app.database import eq_clause, get_db, in_clause, join_clauses, read_transaction, write_transaction
+from app.etag import conditional
+from app.services.async_service import run_job
+from app.services.keyword_service import index_keywords, keyword_overlap
+from app.services.pagination import keyset_clause, limit_clause, page_response, parse_page, select_list
+from app.services.resilience_service import LLMUnavailableError, request_deadline
+from app.services.scoring_service import prescore
+from app.services.sync_service import since_clause
+from app.services.task_service import create_job, get_job
 
 job_bp = Blueprint('job', __name__)
 
 
+ANALYSIS_FIELDS = (
+    'id', 'job_description', 'extracted_keywords', 'focus_suggestions',
+    'alignment_data', 'is_active', 'prompt_tokens', 'completion_tokens', 'total_tokens', 'cached_tokens',
+    'created_at',
+)
+ANALYSIS_ORDER = ('created_at', 'id')
+
+
+def fetch_analyses(db, user_id, since=None, ids=None, is_active=None, page=None):
+    clause, params = join_clauses(
+        since_clause(user_id, 'job_analyses', since),
+        in_clause('id', ids),
+        eq_clause('is_active', is_active),
+        keyset_clause(page),
+    )
+    rows = db.execute(
+        f'SELECT {select_list(ANALYSIS_FIELDS, page)} FROM job_analyses '
+        f'WHERE user_id = ?{clause} ORDER BY created_at DESC, id DESC{limit_clause(page)}',
+        (user_id, *params),
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
 @job_bp.route('/analyses', methods=['GET'])
 @login_required
+@conditional('job_analyses')
 def list_analyses():
+    is_active = request.args.get('is_active')
+    if is_active not in (None, '0', '1'):
+        return jsonify({'error': 'is_active must be 0 or 1'}), 400
+    try:
+        page = parse_page(request.args, ANALYSIS_FIELDS, ANALYSIS_ORDER, descending=True)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    rows = fetch_analyses(
+        get_db(), current_user.id,
+        is_active=None if is_active is None else int(is_active), page=page,
+    )
+    return page_response(rows, page)
+
+
+@job_bp.route('/analyses/<int:analysis_id>', methods=['GET'])
+@login_required
+@conditional('job_analyses')
+def get_analysis(analysis_id):
+    rows = fetch_analyses(get_db(), current_user.id, ids=[analysis_id])
+    if not rows:
+        return jsonify({'error': 'Analysis not found'}), 404
+    return jsonify(rows[0])
+
+
+@job_bp.route('/overlap', methods=['GET'])
+@login_required
+@conditional('job_analyses', 'experiences', 'projects')
+def get_overlap():
+    """Keywords shared between an analysis and each experience and project.
+
+    Uses ``?analysis_id=``, or the active analysis when it is omitted.
+    """
+    analysis_id = request.args.get('analysis_id', type=int)
     db = get_db()
-    rows = db.execute(
-        'SELECT id, job_description, extracted_keywords, focus_suggestions, '
-        'alignment_data, is_active, created_at '
-        'FROM job_analyses WHERE user_id = ? ORDER BY created_at DESC',
-        (current_user.id,),
-    ).fetchall()
-    return jsonify([dict(r) for r in rows])
+    if analysis_id is None:
+        row = db.execute(
+            'SELECT id FROM job_analyses WHERE user_id = ? AND is_active = 1 '
+            'ORDER BY created_at DESC, id DESC LIMIT 1',
+            (current_user.id,),
+        ).fetchone()
+    else:
+        row = db.execute(
+            'SELECT id FROM job_analyses WHERE id = ? AND user_id = ?',
+            (analysis_id, current_user.id),
+        ).fetchone()
+    if row is None:
+        return jsonify({'error': 'Analysis not found'}), 404
 
+    overlap = keyword_overlap(db, current_user.id, row['id'])
+    return jsonify({'analysis_id': row['id'], **overlap})
 
-@job_bp.route('/analyze', methods=['POST'])
+
+@job_bp.route('/prescore', methods=['POST'])
 @login_required
-def analyze():
+def prescore_job():
+    """Provisional keywords and alignment scores computed locally, without the LLM.
+
+    Nothing is stored; the client shows this while ``/analyze`` runs. Works
+    without an API key.
+    """
     data = request.get_json()
     if not data:
         return jsonify({'error': 'Request body required'}), 400
@@ -32,36 +114,109 @@ def analyze():
     if not job_description:
         return jsonify({'error': 'Job description is required'}), 400
 
+    with read_transaction() as db:
+        experiences = fetch_experiences(db, current_user.id)
+        projects = fetch_projects(db, current_user.id)
+    return jsonify({**prescore(job_description, experiences, projects), 'provisional': True})
+
+
+def _store_analysis(user_id, job_description, result, usage):
+    """Save an analysis as the active one; returns the response body."""
+    with write_transaction() as db:
+        db.execute(
+            'INSERT INTO job_analyses (user_id, job_description, extracted_keywords, focus_suggestions, '
+            'alignment_data, is_active, prompt_tokens, completion_tokens, total_tokens, cached_tokens) '
+            'VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?, ?)',
+            (
+                user_id,
+                job_description,
+                json.dumps(result.get('extracted_keywords', [])),
+                json.dumps(result.get('focus_suggestions', [])),
+                json.dumps(result.get('alignment_data', [])),
+                usage['prompt_tokens'],
+                usage['completion_tokens'],
+                usage['total_tokens'],
+                usage['cached_tokens'],
+            ),
+        )
+
+        # Deactivate all others
+        new_id = db.execute('SELECT last_insert_rowid()').fetchone()[0]
+        index_keywords(db, user_id, 'job_analyses', [new_id])
+        db.execute(
+            'UPDATE job_analyses SET is_active = 0 WHERE user_id = ? AND id != ?',
+            (user_id, new_id),
+        )
+        analyses = fetch_analyses(db, user_id)
+
+    return {'message': 'Analysis complete', 'id': new_id, 'analyses': analyses}
+
+
+def _job_description(data):
+    if not data:
+        return None, 'Request body required'
+    job_description = data.get('job_description', '').strip()
+    if not job_description:
+        return None, 'Job description is required'
+    return job_description, None
+
+
+@job_bp.route('/analyze', methods=['POST'])
+@login_required
+def analyze():
+    deadline = request_deadline()
+    data = request.get_json()
+    job_description, error = _job_description(data)
+    if error:
+        return jsonify({'error': error}), 400
+
     try:
         from app.services.openai_service import analyze_job
-        result = analyze_job(current_user.id, job_description)
+        result, usage = analyze_job(current_user.id, job_description, bool(data.get('bypass_cache')), deadline)
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
+    except LLMUnavailableError:
+        raise
     except Exception as e:
         return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
 
-    db = get_db()
-    db.execute(
-        'INSERT INTO job_analyses (user_id, job_description, extracted_keywords, '
-        'focus_suggestions, alignment_data, is_active) VALUES (?, ?, ?, ?, ?, 1)',
-        (
-            current_user.id,
-            job_description,
-            json.dumps(result.get('extracted_keywords', [])),
-            json.dumps(result.get('focus_suggestions', [])),
-            json.dumps(result.get('alignment_data', [])),
-        ),
-    )
+    return jsonify(_store_analysis(current_user.id, job_description, result, usage)), 201
 
-    # Deactivate all others
-    new_id = db.execute('SELECT last_insert_rowid()').fetchone()[0]
-    db.execute(
-        'UPDATE job_analyses SET is_active = 0 WHERE user_id = ? AND id != ?',
-        (current_user.id, new_id),
-    )
-    db.commit()
 
-    return jsonify({'message': 'Analysis complete', 'id': new_id}), 201
+@job_bp.route('/analyze/async', methods=['POST'])
+@login_required
+def analyze_async():
+    """Start an analysis on the shared event loop and answer at once.
+
+    Returns 202 with a job to poll at ``/analyze/<job_id>``; once it is
+    completed its ``result`` is what ``/analyze`` would have returned. No
+    worker thread waits on OpenAI meanwhile.
+    """
+    deadline = request_deadline()
+    data = request.get_json()
+    job_description, error = _job_description(data)
+    if error:
+        return jsonify({'error': error}), 400
+
+    user_id = current_user.id
+    try:
+        from app.services.openai_service import analyze_job_async
+        coro = analyze_job_async(user_id, job_description, bool(data.get('bypass_cache')), deadline)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    job = create_job(user_id, 'analyze')
+    run_job(job['id'], coro, lambda value: _store_analysis(user_id, job_description, *value))
+    return jsonify({'message': 'Analysis started', 'job': get_job(job['id'], user_id)}), 202
+
+
+@job_bp.route('/analyze/<job_id>', methods=['GET'])
+@login_required
+def analyze_status(job_id):
+    job = get_job(job_id, current_user.id)
+    if job is None or job['kind'] != 'analyze':
+        return jsonify({'error': 'Analysis job not found'}), 404
+    return jsonify(job)
 
 
 @job_bp.route('/analyses/<int:analysis_id>/activate', methods=['PUT'])
@@ -75,16 +230,17 @@ def activate_analysis(analysis_id):
     if existing is None:
         return jsonify({'error': 'Analysis not found'}), 404
 
-    db.execute(
-        'UPDATE job_analyses SET is_active = 0 WHERE user_id = ?',
-        (current_user.id,),
-    )
-    db.execute(
-        'UPDATE job_analyses SET is_active = 1 WHERE id = ?',
-        (analysis_id,),
-    )
-    db.commit()
-    return jsonify({'message': 'Analysis activated'})
+    with write_transaction() as db:
+        db.execute(
+            'UPDATE job_analyses SET is_active = 0 WHERE user_id = ?',
+            (current_user.id,),
+        )
+        db.execute(
+            'UPDATE job_analyses SET is_active = 1 WHERE id = ?',
+            (analysis_id,),
+        )
+        analyses = fetch_analyses(db, current_user.id)
+    return jsonify({'message': 'Analysis activated', 'analyses': analyses})
 
 
 @job_bp.route('/analyses/<int:analysis_id>', methods=['DELETE'])
@@ -98,6 +254,6 @@ def delete_analysis(analysis_id):
     if existing is None:
         return jsonify({'error': 'Analysis not found'}), 404
 
-    db.execute('DELETE FROM job_analyses WHERE id = ?', (analysis_id,))
-    db.commit()
-    return jsonify({'message': 'Analysis deleted'})
+    with write_transaction() as db:
+        db.execute('DELETE FROM job_analyses WHERE id = ?', (analysis_id,))
+    return jsonify({'message': 'Analysis deleted', 'id': analysis_id})
@@ -5,11 +5,25 @@ from flask import Blueprint, current_app, jsonify, request, send_file
 from flask_login import current_user, login_required
 from werkzeug.utils import secure_filename
 
-from app.database import get_db
+from app.database import get_db, in_clause, write_transaction
+from app.etag import conditional
+from app.services.sync_service import since_clause
 
 photo_bp = Blueprint('photo', __name__)
 
 
+def fetch_photos(db, user_id, since=None, ids=None):
+    clause, params = since_clause(user_id, 'photos', since)
+    id_sql, id_params = in_clause('id', ids)
+    clause, params = clause + id_sql, params + id_params
+    rows = db.execute(
+        'SELECT id, filename, mime_type, is_primary, sort_order, created_at '
+        f'FROM photos WHERE user_id = ?{clause} ORDER BY sort_order, id',
+        (user_id, *params),
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
 def allowed_file(filename):
     if '.' not in filename:
         return False
@@ -19,14 +33,9 @@ def allowed_file(filename):
 
 @photo_bp.route('', methods=['GET'])
 @login_required
+@conditional('photos')
 def list_photos():
-    db = get_db()
-    rows = db.execute(
-        'SELECT id, filename, mime_type, is_primary, sort_order, created_at '
-        'FROM photos WHERE user_id = ? ORDER BY sort_order, id',
-        (current_user.id,),
-    ).fetchall()
-    return jsonify([dict(r) for r in rows])
+    return jsonify(fetch_photos(get_db(), current_user.id))
 
 
 @photo_bp.route('', methods=['POST'])
@@ -67,20 +76,20 @@ def upload_photo():
     else:
         file.save(filepath)
 
-    db = get_db()
-    # Get max sort_order
-    row = db.execute(
-        'SELECT COALESCE(MAX(sort_order), -1) + 1 as next_order FROM photos WHERE user_id = ?',
-        (current_user.id,),
-    ).fetchone()
+    with write_transaction() as db:
+        # Get max sort_order
+        row = db.execute(
+            'SELECT COALESCE(MAX(sort_order), -1) + 1 as next_order FROM photos WHERE user_id = ?',
+            (current_user.id,),
+        ).fetchone()
 
-    db.execute(
-        'INSERT INTO photos (user_id, filename, storage_path, mime_type, sort_order) VALUES (?, ?, ?, ?, ?)',
-        (current_user.id, safe_name, filepath, mime, row['next_order']),
-    )
-    db.commit()
+        new_id = db.execute(
+            'INSERT INTO photos (user_id, filename, storage_path, mime_type, sort_order) VALUES (?, ?, ?, ?, ?)',
+            (current_user.id, safe_name, filepath, mime, row['next_order']),
+        ).lastrowid
+        photo = fetch_photos(db, current_user.id, ids=[new_id])[0]
 
-    return jsonify({'message': 'Photo uploaded'}), 201
+    return jsonify({'message': 'Photo uploaded', 'photo': photo}), 201
 
 
 @photo_bp.route('/<int:photo_id>', methods=['DELETE'])
@@ -100,9 +109,9 @@ def delete_photo(photo_id):
     except OSError:
         pass
 
-    db.execute('DELETE FROM photos WHERE id = ?', (photo_id,))
-    db.commit()
-    return jsonify({'message': 'Photo deleted'})
+    with write_transaction() as db:
+        db.execute('DELETE FROM photos WHERE id = ?', (photo_id,))
+    return jsonify({'message': 'Photo deleted', 'id': photo_id})
 
 
 @photo_bp.route('/<int:photo_id>/primary', methods=['PUT'])
@@ -116,10 +125,11 @@ def set_primary(photo_id):
     if row is None:
         return jsonify({'error': 'Photo not found'}), 404
 
-    db.execute('UPDATE photos SET is_primary = 0 WHERE user_id = ?', (current_user.id,))
-    db.execute('UPDATE photos SET is_primary = 1 WHERE id = ?', (photo_id,))
-    db.commit()
-    return jsonify({'message': 'Primary photo set'})
+    with write_transaction() as db:
+        db.execute('UPDATE photos SET is_primary = 0 WHERE user_id = ?', (current_user.id,))
+        db.execute('UPDATE photos SET is_primary = 1 WHERE id = ?', (photo_id,))
+        photos = fetch_photos(db, current_user.id)
+    return jsonify({'message': 'Primary photo set', 'photos': photos})
 
 
 @photo_bp.route('/<int:photo_id>/file', methods=['GET'])
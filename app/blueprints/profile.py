@@ -1,23 +1,26 @@
 from flask import Blueprint, jsonify, request
 from flask_login import current_user, login_required
 
-from app.database import get_db
+from app.database import get_db, write_transaction
+from app.etag import conditional
 
 profile_bp = Blueprint('profile', __name__)
 
 
-@profile_bp.route('', methods=['GET'])
-@login_required
-def get_profile():
-    db = get_db()
+def fetch_profile(db, user_id):
     row = db.execute(
         'SELECT first_name, last_name, email_contact, phone, address, linkedin, website, bio '
         'FROM about_you WHERE user_id = ?',
-        (current_user.id,),
+        (user_id,),
     ).fetchone()
-    if row is None:
-        return jsonify({})
-    return jsonify(dict(row))
+    return dict(row) if row else {}
+
+
+@profile_bp.route('', methods=['GET'])
+@login_required
+@conditional('profile')
+def get_profile():
+    return jsonify(fetch_profile(get_db(), current_user.id))
 
 
 @profile_bp.route('', methods=['PUT'])
@@ -30,12 +33,12 @@ def update_profile():
     fields = ['first_name', 'last_name', 'email_contact', 'phone', 'address', 'linkedin', 'website', 'bio']
     updates = {f: data.get(f, '') for f in fields}
 
-    db = get_db()
-    db.execute(
-        'UPDATE about_you SET first_name=?, last_name=?, email_contact=?, phone=?, '
-        'address=?, linkedin=?, website=?, bio=?, updated_at=CURRENT_TIMESTAMP '
-        'WHERE user_id=?',
-        (*[updates[f] for f in fields], current_user.id),
-    )
-    db.commit()
-    return jsonify({'message': 'Profile updated'})
+    with write_transaction() as db:
+        db.execute(
+            'UPDATE about_you SET first_name=?, last_name=?, email_contact=?, phone=?, '
+            'address=?, linkedin=?, website=?, bio=?, updated_at=CURRENT_TIMESTAMP '
+            'WHERE user_id=?',
+            (*[updates[f] for f in fields], current_user.id),
+        )
+        profile = fetch_profile(db, current_user.id)
+    return jsonify({'message': 'Profile updated', 'profile': profile})
@@ -1,21 +1,67 @@
 from flask import Blueprint, jsonify, request
 from flask_login import current_user, login_required
 
-from app.database import get_db
+from app.database import get_db, in_clause, join_clauses, write_transaction
+from app.etag import conditional
+from app.services.bulk_service import apply_bulk_operations
+from app.services.keyword_service import index_keywords
+from app.services.pagination import keyset_clause, limit_clause, page_response, parse_page, select_list
+from app.services.rank_service import assign_keys, maybe_rebalance, move_item, next_key
+from app.services.sync_service import since_clause
 
 project_bp = Blueprint('project', __name__)
 
+PROJECT_COLUMNS = ('title', 'description', 'keywords')
+PROJECT_FIELDS = ('id', *PROJECT_COLUMNS, 'sort_key', 'created_at', 'updated_at')
+PROJECT_ORDER = ('sort_key', 'id')
+
+
+def _validate_project(data):
+    title = data.get('title', '').strip()
+    if not title:
+        return None, 'Title is required'
+
+    return {
+        'title': title,
+        'description': data.get('description', ''),
+        'keywords': data.get('keywords', ''),
+    }, None
+
+
+def fetch_projects(db, user_id, since=None, ids=None, page=None):
+    clause, params = join_clauses(
+        since_clause(user_id, 'projects', since),
+        in_clause('id', ids),
+        keyset_clause(page),
+    )
+    rows = db.execute(
+        f'SELECT {select_list(PROJECT_FIELDS, page)} '
+        f'FROM projects WHERE user_id = ?{clause} ORDER BY sort_key, id{limit_clause(page)}',
+        (user_id, *params),
+    ).fetchall()
+    return [dict(r) for r in rows]
+
 
 @project_bp.route('', methods=['GET'])
 @login_required
+@conditional('projects')
 def list_projects():
-    db = get_db()
-    rows = db.execute(
-        'SELECT id, title, description, keywords, sort_order, created_at, updated_at '
-        'FROM projects WHERE user_id = ? ORDER BY sort_order, id',
-        (current_user.id,),
-    ).fetchall()
-    return jsonify([dict(r) for r in rows])
+    try:
+        page = parse_page(request.args, PROJECT_FIELDS, PROJECT_ORDER)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return page_response(fetch_projects(get_db(), current_user.id, page=page), page)
+
+
+@project_bp.route('/<int:proj_id>', methods=['GET'])
+@login_required
+@conditional('projects')
+def get_project(proj_id):
+    rows = fetch_projects(get_db(), current_user.id, ids=[proj_id])
+    if not rows:
+        return jsonify({'error': 'Project not found'}), 404
+    return jsonify(rows[0])
 
 
 @project_bp.route('', methods=['POST'])
@@ -25,22 +71,21 @@ def create_project():
     if not data:
         return jsonify({'error': 'Request body required'}), 400
 
-    title = data.get('title', '').strip()
-    if not title:
-        return jsonify({'error': 'Title is required'}), 400
+    values, error = _validate_project(data)
+    if error:
+        return jsonify({'error': error}), 400
 
-    db = get_db()
-    row = db.execute(
-        'SELECT COALESCE(MAX(sort_order), -1) + 1 as next_order FROM projects WHERE user_id = ?',
-        (current_user.id,),
-    ).fetchone()
+    with write_transaction() as db:
+        sort_key = next_key(db, 'projects', current_user.id)
 
-    db.execute(
-        'INSERT INTO projects (user_id, title, description, keywords, sort_order) VALUES (?, ?, ?, ?, ?)',
-        (current_user.id, title, data.get('description', ''), data.get('keywords', ''), row['next_order']),
-    )
-    db.commit()
-    return jsonify({'message': 'Project created'}), 201
+        new_id = db.execute(
+            'INSERT INTO projects (user_id, title, description, keywords, sort_key) VALUES (?, ?, ?, ?, ?)',
+            (current_user.id, *[values[c] for c in PROJECT_COLUMNS], sort_key),
+        ).lastrowid
+        index_keywords(db, current_user.id, 'projects', [new_id])
+        row = fetch_projects(db, current_user.id, ids=[new_id])[0]
+    maybe_rebalance('projects', current_user.id, sort_key)
+    return jsonify({'message': 'Project created', 'project': row}), 201
 
 
 @project_bp.route('/<int:proj_id>', methods=['PUT'])
@@ -58,16 +103,18 @@ def update_project(proj_id):
     if existing is None:
         return jsonify({'error': 'Project not found'}), 404
 
-    title = data.get('title', '').strip()
-    if not title:
-        return jsonify({'error': 'Title is required'}), 400
+    values, error = _validate_project(data)
+    if error:
+        return jsonify({'error': error}), 400
 
-    db.execute(
-        'UPDATE projects SET title=?, description=?, keywords=?, updated_at=CURRENT_TIMESTAMP WHERE id=?',
-        (title, data.get('description', ''), data.get('keywords', ''), proj_id),
-    )
-    db.commit()
-    return jsonify({'message': 'Project updated'})
+    with write_transaction() as db:
+        db.execute(
+            'UPDATE projects SET title=?, description=?, keywords=?, updated_at=CURRENT_TIMESTAMP WHERE id=?',
+            (*[values[c] for c in PROJECT_COLUMNS], proj_id),
+        )
+        index_keywords(db, current_user.id, 'projects', [proj_id])
+        row = fetch_projects(db, current_user.id, ids=[proj_id])[0]
+    return jsonify({'message': 'Project updated', 'project': row})
 
 
 @project_bp.route('/<int:proj_id>', methods=['DELETE'])
@@ -81,9 +128,26 @@ def delete_project(proj_id):
     if existing is None:
         return jsonify({'error': 'Project not found'}), 404
 
-    db.execute('DELETE FROM projects WHERE id = ?', (proj_id,))
-    db.commit()
-    return jsonify({'message': 'Project deleted'})
+    with write_transaction() as db:
+        db.execute('DELETE FROM projects WHERE id = ?', (proj_id,))
+    return jsonify({'message': 'Project deleted', 'id': proj_id})
+
+
+@project_bp.route('/bulk', methods=['POST'])
+@login_required
+def bulk_projects():
+    data = request.get_json()
+    if not data or not isinstance(data.get('operations'), list):
+        return jsonify({'error': 'Operations list required'}), 400
+
+    with write_transaction() as db:
+        results, errors = apply_bulk_operations(
+            current_user.id, 'projects', PROJECT_COLUMNS, data['operations'], _validate_project,
+        )
+        if errors:
+            return jsonify({'error': 'Batch rejected', 'errors': errors}), 400
+        rows = fetch_projects(db, current_user.id, ids=[r['id'] for r in results if r['op'] != 'delete'])
+    return jsonify({'message': f'Applied {len(results)} operations', 'results': results, 'projects': rows})
 
 
 @project_bp.route('/reorder', methods=['PUT'])
@@ -93,11 +157,30 @@ def reorder_projects():
     if not data or 'order' not in data:
         return jsonify({'error': 'Order list required'}), 400
 
-    db = get_db()
-    for idx, proj_id in enumerate(data['order']):
-        db.execute(
-            'UPDATE projects SET sort_order = ? WHERE id = ? AND user_id = ?',
-            (idx, proj_id, current_user.id),
-        )
-    db.commit()
-    return jsonify({'message': 'Reordered'})
+    with write_transaction() as db:
+        assign_keys(db, 'projects', current_user.id, data['order'])
+        rows = fetch_projects(db, current_user.id)
+    return jsonify({'message': 'Reordered', 'projects': rows})
+
+
+@project_bp.route('/<int:proj_id>/position', methods=['PUT'])
+@login_required
+def move_project(proj_id):
+    data = request.get_json()
+    if not data:
+        return jsonify({'error': 'Request body required'}), 400
+
+    try:
+        with write_transaction() as db:
+            sort_key = move_item(
+                db, 'projects', current_user.id, proj_id,
+                after_id=data.get('after_id'), before_id=data.get('before_id'),
+            )
+            row = fetch_projects(db, current_user.id, ids=[proj_id])[0]
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    maybe_rebalance('projects', current_user.id, sort_key)
+    return jsonify({'message': 'Moved', 'sort_key': sort_key, 'project': row})
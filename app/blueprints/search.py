@@ -0,0 +1,40 @@
+from flask import Blueprint, current_app, jsonify, request
+from flask_login import current_user, login_required
+
+from app.database import read_transaction
+from app.etag import conditional
+from app.services.search_service import SEARCH_SOURCES, search
+
+search_bp = Blueprint('search', __name__)
+
+
+@search_bp.route('', methods=['GET'])
+@login_required
+@conditional(*SEARCH_SOURCES)
+def search_all():
+    """Full-text search over the user's experiences, projects, blurbs and job descriptions.
+
+    ``?q=`` is free text; every word must match, as a prefix. ``?types=``
+    limits the search to a comma-separated subset of resources.
+    """
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'error': 'q is required'}), 400
+
+    types = request.args.get('types')
+    resources = list(SEARCH_SOURCES) if not types else [t.strip() for t in types.split(',') if t.strip()]
+    unknown = [t for t in resources if t not in SEARCH_SOURCES]
+    if unknown or not resources:
+        return jsonify({'error': f'types must be a subset of {", ".join(SEARCH_SOURCES)}'}), 400
+
+    max_limit = current_app.config['SEARCH_MAX_LIMIT']
+    try:
+        limit = int(request.args.get('limit', current_app.config['SEARCH_DEFAULT_LIMIT']))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    if not 1 <= limit <= max_limit:
+        return jsonify({'error': f'limit must be between 1 and {max_limit}'}), 400
+
+    with read_transaction() as db:
+        results = search(db, current_user.id, q, resources, limit)
+    return jsonify({'results': results})
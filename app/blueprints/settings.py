@@ -3,30 +3,37 @@ import os
 from flask import Blueprint, jsonify, request
 from flask_login import current_user, login_required
 
-from app.database import get_db
+from app.database import get_db, write_transaction
+from app.etag import conditional
 from app.services.crypto_service import encrypt_api_key
+from app.services.llm_cache_service import clear as clear_llm_cache
 
 settings_bp = Blueprint('settings', __name__)
 
 
-@settings_bp.route('', methods=['GET'])
-@login_required
-def get_settings():
-    db = get_db()
+def fetch_settings(db, user_id):
     row = db.execute(
-        'SELECT openai_api_key_enc, selected_template, sentences_per_field, font_size '
+        'SELECT openai_api_key_enc, selected_template, sentences_per_field, font_size, llm_cache_enabled '
         'FROM user_settings WHERE user_id = ?',
-        (current_user.id,),
+        (user_id,),
     ).fetchone()
     if row is None:
-        return jsonify({})
+        return {}
 
-    return jsonify({
+    return {
         'openai_api_key_set': row['openai_api_key_enc'] is not None and len(row['openai_api_key_enc']) > 0,
         'selected_template': row['selected_template'],
         'sentences_per_field': row['sentences_per_field'],
         'font_size': row['font_size'],
-    })
+        'llm_cache_enabled': bool(row['llm_cache_enabled']),
+    }
+
+
+@settings_bp.route('', methods=['GET'])
+@login_required
+@conditional('settings')
+def get_settings():
+    return jsonify(fetch_settings(get_db(), current_user.id))
 
 
 @settings_bp.route('', methods=['PUT'])
@@ -36,42 +43,52 @@ def update_settings():
     if not data:
         return jsonify({'error': 'Request body required'}), 400
 
-    db = get_db()
+    with write_transaction() as db:
+        # Handle API key separately (encrypted)
+        api_key = data.get('openai_api_key', '').strip()
+        if api_key:
+            encrypted = encrypt_api_key(api_key)
+            db.execute(
+                'UPDATE user_settings SET openai_api_key_enc = ? WHERE user_id = ?',
+                (encrypted, current_user.id),
+            )
+            from app.services.openai_service import invalidate_client
+            invalidate_client(current_user.id)
 
-    # Handle API key separately (encrypted)
-    api_key = data.get('openai_api_key', '').strip()
-    if api_key:
-        encrypted = encrypt_api_key(api_key)
-        db.execute(
-            'UPDATE user_settings SET openai_api_key_enc = ? WHERE user_id = ?',
-            (encrypted, current_user.id),
-        )
+        # Update other settings
+        if 'selected_template' in data:
+            db.execute(
+                'UPDATE user_settings SET selected_template = ? WHERE user_id = ?',
+                (data['selected_template'], current_user.id),
+            )
+        if 'sentences_per_field' in data:
+            val = max(1, min(10, int(data['sentences_per_field'])))
+            db.execute(
+                'UPDATE user_settings SET sentences_per_field = ? WHERE user_id = ?',
+                (val, current_user.id),
+            )
+        if 'font_size' in data:
+            val = max(8, min(14, int(data['font_size'])))
+            db.execute(
+                'UPDATE user_settings SET font_size = ? WHERE user_id = ?',
+                (val, current_user.id),
+            )
+        if 'llm_cache_enabled' in data:
+            enabled = bool(data['llm_cache_enabled'])
+            db.execute(
+                'UPDATE user_settings SET llm_cache_enabled = ? WHERE user_id = ?',
+                (int(enabled), current_user.id),
+            )
+            # Opting out also forgets what was cached
+            if not enabled:
+                clear_llm_cache(db, current_user.id)
 
-    # Update other settings
-    if 'selected_template' in data:
-        db.execute(
-            'UPDATE user_settings SET selected_template = ? WHERE user_id = ?',
-            (data['selected_template'], current_user.id),
-        )
-    if 'sentences_per_field' in data:
-        val = max(1, min(10, int(data['sentences_per_field'])))
         db.execute(
-            'UPDATE user_settings SET sentences_per_field = ? WHERE user_id = ?',
-            (val, current_user.id),
+            'UPDATE user_settings SET updated_at = CURRENT_TIMESTAMP WHERE user_id = ?',
+            (current_user.id,),
         )
-    if 'font_size' in data:
-        val = max(8, min(14, int(data['font_size'])))
-        db.execute(
-            'UPDATE user_settings SET font_size = ? WHERE user_id = ?',
-            (val, current_user.id),
-        )
-
-    db.execute(
-        'UPDATE user_settings SET updated_at = CURRENT_TIMESTAMP WHERE user_id = ?',
-        (current_user.id,),
-    )
-    db.commit()
-    return jsonify({'message': 'Settings updated'})
+        settings = fetch_settings(db, current_user.id)
+    return jsonify({'message': 'Settings updated', 'settings': settings})
 
 
 @settings_bp.route('/templates', methods=['GET'])
@@ -0,0 +1,33 @@
+import time
+
+from flask import Blueprint, current_app, jsonify, request
+from flask_login import current_user, login_required
+
+from app.database import read_transaction
+from app.services.usage_service import pending_rows, quota_status, usage_report
+
+usage_bp = Blueprint('usage', __name__)
+
+
+@usage_bp.route('', methods=['GET'])
+@login_required
+def get_usage():
+    """The user's LLM usage over the last ``?days=`` days (30 by default).
+
+    Totals per call kind and per day, and what is left of the token quota.
+    """
+    max_days = current_app.config['LLM_USAGE_MAX_DAYS']
+    try:
+        days = int(request.args.get('days', 30))
+    except ValueError:
+        return jsonify({'error': 'days must be an integer'}), 400
+    if not 1 <= days <= max_days:
+        return jsonify({'error': f'days must be between 1 and {max_days}'}), 400
+
+    # Count this process's calls that are still buffered, without writing them
+    pending = pending_rows(current_app, current_user.id)
+    with read_transaction() as db:
+        report = usage_report(db, current_user.id, time.time() - days * 86400, pending)
+    report['days'] = days
+    report['quota'] = quota_status(current_app, current_user.id)
+    return jsonify(report)
@@ -1,13 +1,20 @@
 import os
+import random
 import sqlite3
+import time
+from contextlib import contextmanager
 
-from flask import g, current_app
+from flask import g, current_app, jsonify
+
+
+class DatabaseBusyError(Exception):
+    """The SQLite write lock could not be acquired within the retry budget."""
 
 
 def get_db():
     if 'db' not in g:
         db_path = current_app.config['DATABASE']
-        g.db = sqlite3.connect(db_path)
+        g.db = sqlite3.connect(db_path, timeout=current_app.config.get('DB_BUSY_TIMEOUT', 5.0))
         g.db.row_factory = sqlite3.Row
         g.db.execute('PRAGMA journal_mode=WAL')
         g.db.execute('PRAGMA foreign_keys=ON')
@@ -15,29 +22,187 @@ def get_db():
 
 
 def close_db(exception=None):
+    g.pop('write_depth', None)
     db = g.pop('db', None)
     if db is not None:
         db.close()
 
 
+def _is_lock_error(exc):
+    message = str(exc).lower()
+    return 'database is locked' in message or 'database is busy' in message
+
+
+def _begin_immediate(db):
+    retries = current_app.config.get('DB_WRITE_RETRIES', 5)
+    base_delay = current_app.config.get('DB_WRITE_RETRY_DELAY', 0.05)
+    for attempt in range(retries + 1):
+        try:
+            db.execute('BEGIN IMMEDIATE')
+            return
+        except sqlite3.OperationalError as e:
+            if not _is_lock_error(e):
+                raise
+            if attempt == retries:
+                raise DatabaseBusyError('Database is busy, please retry') from e
+            # Full jitter keeps competing writers from retrying in lockstep
+            time.sleep(random.uniform(0, base_delay * (2 ** attempt)))
+
+
+@contextmanager
+def write_transaction():
+    """Run the enclosed block as a single BEGIN IMMEDIATE transaction.
+
+    The write lock is taken up front so concurrent writers queue on the busy
+    timeout instead of failing halfway through a deferred transaction. Nested
+    blocks join the outermost transaction.
+    """
+    db = get_db()
+    depth = g.get('write_depth', 0)
+    if depth == 0 and not db.in_transaction:
+        _begin_immediate(db)
+
+    g.write_depth = depth + 1
+    try:
+        yield db
+        if depth == 0:
+            db.commit()
+    except sqlite3.OperationalError as e:
+        if depth == 0:
+            db.rollback()
+        if _is_lock_error(e):
+            raise DatabaseBusyError('Database is busy, please retry') from e
+        raise
+    except BaseException:
+        if depth == 0:
+            db.rollback()
+        raise
+    finally:
+        g.write_depth = depth
+
+
+@contextmanager
+def read_transaction():
+    """Run the enclosed reads against a single consistent snapshot.
+
+    Joins an enclosing transaction if one is already open.
+    """
+    db = get_db()
+    if db.in_transaction:
+        yield db
+        return
+
+    db.execute('BEGIN')
+    try:
+        yield db
+    finally:
+        if db.in_transaction:
+            db.rollback()
+
+
+def in_clause(column, values):
+    """Return ``(sql, params)`` for an ``AND column IN (...)`` filter.
+
+    Both are empty when ``values`` is None, so callers can pass it through.
+    """
+    if values is None:
+        return '', ()
+    values = tuple(values)
+    return f' AND {column} IN ({", ".join("?" * len(values))})', values
+
+
+def eq_clause(column, value):
+    """Return ``(sql, params)`` for an ``AND column = ?`` filter, or nothing when ``value`` is None."""
+    if value is None:
+        return '', ()
+    return f' AND {column} = ?', (value,)
+
+
+def join_clauses(*clauses):
+    """Concatenate ``(sql, params)`` filter fragments into one."""
+    return ''.join(sql for sql, _ in clauses), tuple(p for _, params in clauses for p in params)
+
+
+def handle_database_busy(error):
+    response = jsonify({'error': str(error)})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
+
+def _apply_schema(db):
+    schema_path = os.path.join(os.path.dirname(__file__), 'schema.sql')
+    with open(schema_path, 'r') as f:
+        db.executescript(f.read())
+
+
+# Columns added to existing tables after their first release
+_ADDED_COLUMNS = {
+    'blurbs': {'prompt_metric_id': 'INTEGER REFERENCES prompt_metrics(id) ON DELETE SET NULL'},
+    'job_analyses': {
+        'prompt_tokens': 'INTEGER',
+        'completion_tokens': 'INTEGER',
+        'total_tokens': 'INTEGER',
+        'cached_tokens': 'INTEGER',
+    },
+    'prompt_metrics': {
+        'cache_hit': 'INTEGER NOT NULL DEFAULT 0',
+        'cached_tokens': 'INTEGER NOT NULL DEFAULT 0',
+    },
+    'user_settings': {'llm_cache_enabled': 'INTEGER NOT NULL DEFAULT 1'},
+}
+
+
+def _migrate(db):
+    """Bring tables created by older releases up to date before the schema runs."""
+    from app.services.rank_service import RANKED_TABLES, spread_keys
+
+    for table, added in _ADDED_COLUMNS.items():
+        columns = {r['name'] for r in db.execute(f'PRAGMA table_info({table})')}
+        for name, definition in added.items():
+            if columns and name not in columns:
+                db.execute(f'ALTER TABLE {table} ADD COLUMN {name} {definition}')
+
+    for table in RANKED_TABLES:
+        columns = {r['name'] for r in db.execute(f'PRAGMA table_info({table})')}
+        if not columns or 'sort_key' in columns:
+            continue
+        db.execute(f"ALTER TABLE {table} ADD COLUMN sort_key TEXT NOT NULL DEFAULT ''")
+        rows = db.execute(f'SELECT id, user_id FROM {table} ORDER BY user_id, sort_order, id').fetchall()
+        by_user = {}
+        for r in rows:
+            by_user.setdefault(r['user_id'], []).append(r['id'])
+        for ids in by_user.values():
+            db.executemany(
+                f'UPDATE {table} SET sort_key = ? WHERE id = ?',
+                list(zip(spread_keys(len(ids)), ids)),
+            )
+
+
 def init_db(app):
     db_path = app.config['DATABASE']
     if db_path == ':memory:':
         return
 
-    if not os.path.exists(db_path):
-        with app.app_context():
-            db = get_db()
-            schema_path = os.path.join(os.path.dirname(__file__), 'schema.sql')
-            with open(schema_path, 'r') as f:
-                db.executescript(f.read())
-            db.commit()
+    # The schema only uses IF NOT EXISTS, so it is safe to re-apply on every
+    # start; that is how new tables and indexes reach existing databases.
+    with app.app_context():
+        db = get_db()
+        existing = {r[0] for r in db.execute('SELECT name FROM sqlite_master')}
+        _migrate(db)
+        _apply_schema(db)
+        # Rows written before a derived index existed are not in it yet
+        if 'experiences_fts' not in existing:
+            from app.services.search_service import rebuild_search_index
+            rebuild_search_index(db)
+        if 'item_keywords' not in existing:
+            from app.services.keyword_service import rebuild_keyword_index
+            rebuild_keyword_index(db)
+        db.commit()
 
 
 def init_test_db():
     """Initialize an in-memory database for testing."""
     db = get_db()
-    schema_path = os.path.join(os.path.dirname(__file__), 'schema.sql')
-    with open(schema_path, 'r') as f:
-        db.executescript(f.read())
+    _apply_schema(db)
     db.commit()
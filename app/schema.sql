@@ -14,6 +14,7 @@ CREATE TABLE IF NOT EXISTS user_settings (
     selected_template TEXT DEFAULT 'classic',
     sentences_per_field INTEGER DEFAULT 3,
     font_size INTEGER DEFAULT 11,
+    llm_cache_enabled INTEGER NOT NULL DEFAULT 1,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
@@ -67,7 +68,7 @@ CREATE TABLE IF NOT EXISTS experiences (
     end_date TEXT DEFAULT '',
     description TEXT DEFAULT '',
     keywords TEXT DEFAULT '',
-    sort_order INTEGER DEFAULT 0,
+    sort_key TEXT NOT NULL DEFAULT '',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
@@ -79,7 +80,7 @@ CREATE TABLE IF NOT EXISTS projects (
     title TEXT NOT NULL,
     description TEXT DEFAULT '',
     keywords TEXT DEFAULT '',
-    sort_order INTEGER DEFAULT 0,
+    sort_key TEXT NOT NULL DEFAULT '',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
@@ -93,6 +94,10 @@ CREATE TABLE IF NOT EXISTS job_analyses (
     focus_suggestions TEXT DEFAULT '[]',
     alignment_data TEXT DEFAULT '[]',
     is_active INTEGER DEFAULT 0,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    total_tokens INTEGER,
+    cached_tokens INTEGER,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
@@ -106,14 +111,450 @@ CREATE TABLE IF NOT EXISTS blurbs (
     suggestion_text TEXT NOT NULL,
     status TEXT DEFAULT 'pending' CHECK(status IN ('pending', 'accepted', 'modified', 'rejected')),
     user_text TEXT DEFAULT '',
+    prompt_metric_id INTEGER REFERENCES prompt_metrics(id) ON DELETE SET NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
 );
 
 CREATE INDEX IF NOT EXISTS idx_experiences_user_category ON experiences(user_id, category);
+CREATE INDEX IF NOT EXISTS idx_experiences_user_sort_key ON experiences(user_id, sort_key);
 CREATE INDEX IF NOT EXISTS idx_projects_user ON projects(user_id);
+CREATE INDEX IF NOT EXISTS idx_projects_user_sort_key ON projects(user_id, sort_key);
 CREATE INDEX IF NOT EXISTS idx_photos_user ON photos(user_id);
 CREATE INDEX IF NOT EXISTS idx_job_analyses_user ON job_analyses(user_id);
+CREATE INDEX IF NOT EXISTS idx_job_analyses_user_created ON job_analyses(user_id, created_at, id);
 CREATE INDEX IF NOT EXISTS idx_blurbs_user_template ON blurbs(user_id, template_name);
 CREATE INDEX IF NOT EXISTS idx_password_reset_tokens_hash ON password_reset_tokens(token_hash);
+
+
+-- Per-user, per-resource change counters. Bumped by the triggers below in
+-- the same transaction as the write; GET endpoints derive their ETags from it.
+CREATE TABLE IF NOT EXISTS resource_versions (
+    user_id INTEGER NOT NULL,
+    resource TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, resource)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_about_you_insert_version AFTER INSERT ON about_you
+BEGIN
+    INSERT INTO resource_versions (user_id, resource, version) VALUES (NEW.user_id, 'profile', 1)
+    ON CONFLICT (user_id, resource) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_about_you_update_version AFTER UPDATE ON about_you
+BEGIN
+    INSERT INTO resource_versions (user_id, resource, version) VALUES (NEW.user_id, 'profile', 1)
+    ON CONFLICT (user_id, resource) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_about_you_delete_version AFTER DELETE ON about_you
+BEGIN
+    INSERT INTO resource_versions (user_id, resource, version) VALUES (OLD.user_id, 'profile', 1)
+    ON CONFLICT (user_id, resource) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_user_settings_insert_version AFTER INSERT ON user_settings
+BEGIN
+    INSERT INTO resource_versions (user_id, resource, version) VALUES (NEW.user_id, 'settings', 1)
+    ON CONFLICT (user_id, resource) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_user_settings_update_version AFTER UPDATE ON user_settings
+BEGIN
+    INSERT INTO resource_versions (user_id, resource, version) VALUES (NEW.user_id, 'settings', 1)
+    ON CONFLICT (user_id, resource) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_user_settings_delete_version AFTER DELETE ON user_settings
+BEGIN
+    INSERT INTO resource_versions (user_id, resource, version) VALUES (OLD.user_id, 'settings', 1)
+    ON CONFLICT (user_id, resource) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_photos_insert_version AFTER INSERT ON photos
+BEGIN
+    INSERT INTO resource_versions (user_id, resource, version) VALUES (NEW.user_id, 'photos', 1)
+    ON CONFLICT (user_id, resource) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_photos_update_version AFTER UPDATE ON photos
+BEGIN
+    INSERT INTO resource_versions (user_id, resource, version) VALUES (NEW.user_id, 'photos', 1)
+    ON CONFLICT (user_id, resource) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_photos_delete_version AFTER DELETE ON photos
+BEGIN
+    INSERT INTO resource_versions (user_id, resource, version) VALUES (OLD.user_id, 'photos', 1)
+    ON CONFLICT (user_id, resource) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_experiences_insert_version AFTER INSERT ON experiences
+BEGIN
+    INSERT INTO resource_versions (user_id, resource, version) VALUES (NEW.user_id, 'experiences', 1)
+    ON CONFLICT (user_id, resource) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_experiences_update_version AFTER UPDATE ON experiences
+BEGIN
+    INSERT INTO resource_versions (user_id, resource, version) VALUES (NEW.user_id, 'experiences', 1)
+    ON CONFLICT (user_id, resource) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_experiences_delete_version AFTER DELETE ON experiences
+BEGIN
+    INSERT INTO resource_versions (user_id, resource, version) VALUES (OLD.user_id, 'experiences', 1)
+    ON CONFLICT (user_id, resource) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_projects_insert_version AFTER INSERT ON projects
+BEGIN
+    INSERT INTO resource_versions (user_id, resource, version) VALUES (NEW.user_id, 'projects', 1)
+    ON CONFLICT (user_id, resource) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_projects_update_version AFTER UPDATE ON projects
+BEGIN
+    INSERT INTO resource_versions (user_id, resource, version) VALUES (NEW.user_id, 'projects', 1)
+    ON CONFLICT (user_id, resource) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_projects_delete_version AFTER DELETE ON projects
+BEGIN
+    INSERT INTO resource_versions (user_id, resource, version) VALUES (OLD.user_id, 'projects', 1)
+    ON CONFLICT (user_id, resource) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_job_analyses_insert_version AFTER INSERT ON job_analyses
+BEGIN
+    INSERT INTO resource_versions (user_id, resource, version) VALUES (NEW.user_id, 'job_analyses', 1)
+    ON CONFLICT (user_id, resource) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_job_analyses_update_version AFTER UPDATE ON job_analyses
+BEGIN
+    INSERT INTO resource_versions (user_id, resource, version) VALUES (NEW.user_id, 'job_analyses', 1)
+    ON CONFLICT (user_id, resource) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_job_analyses_delete_version AFTER DELETE ON job_analyses
+BEGIN
+    INSERT INTO resource_versions (user_id, resource, version) VALUES (OLD.user_id, 'job_analyses', 1)
+    ON CONFLICT (user_id, resource) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_blurbs_insert_version AFTER INSERT ON blurbs
+BEGIN
+    INSERT INTO resource_versions (user_id, resource, version) VALUES (NEW.user_id, 'blurbs', 1)
+    ON CONFLICT (user_id, resource) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_blurbs_update_version AFTER UPDATE ON blurbs
+BEGIN
+    INSERT INTO resource_versions (user_id, resource, version) VALUES (NEW.user_id, 'blurbs', 1)
+    ON CONFLICT (user_id, resource) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_blurbs_delete_version AFTER DELETE ON blurbs
+BEGIN
+    INSERT INTO resource_versions (user_id, resource, version) VALUES (OLD.user_id, 'blurbs', 1)
+    ON CONFLICT (user_id, resource) DO UPDATE SET version = version + 1;
+END;
+
+
+-- One entry per changed row, holding the sequence number of its latest
+-- change. Deletes leave a tombstone (deleted = 1) so /api/changes can report
+-- them. Written by the triggers below in the same transaction as the change.
+CREATE TABLE IF NOT EXISTS sync_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    resource TEXT NOT NULL,
+    row_id INTEGER NOT NULL,
+    deleted INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (user_id, resource, row_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_sync_log_user_seq ON sync_log(user_id, seq);
+
+CREATE TRIGGER IF NOT EXISTS trg_about_you_insert_sync AFTER INSERT ON about_you
+BEGIN
+    INSERT OR REPLACE INTO sync_log (user_id, resource, row_id, deleted) VALUES (NEW.user_id, 'profile', NEW.id, 0);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_about_you_update_sync AFTER UPDATE ON about_you
+BEGIN
+    INSERT OR REPLACE INTO sync_log (user_id, resource, row_id, deleted) VALUES (NEW.user_id, 'profile', NEW.id, 0);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_about_you_delete_sync AFTER DELETE ON about_you
+BEGIN
+    INSERT OR REPLACE INTO sync_log (user_id, resource, row_id, deleted) VALUES (OLD.user_id, 'profile', OLD.id, 1);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_photos_insert_sync AFTER INSERT ON photos
+BEGIN
+    INSERT OR REPLACE INTO sync_log (user_id, resource, row_id, deleted) VALUES (NEW.user_id, 'photos', NEW.id, 0);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_photos_update_sync AFTER UPDATE ON photos
+BEGIN
+    INSERT OR REPLACE INTO sync_log (user_id, resource, row_id, deleted) VALUES (NEW.user_id, 'photos', NEW.id, 0);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_photos_delete_sync AFTER DELETE ON photos
+BEGIN
+    INSERT OR REPLACE INTO sync_log (user_id, resource, row_id, deleted) VALUES (OLD.user_id, 'photos', OLD.id, 1);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_experiences_insert_sync AFTER INSERT ON experiences
+BEGIN
+    INSERT OR REPLACE INTO sync_log (user_id, resource, row_id, deleted) VALUES (NEW.user_id, 'experiences', NEW.id, 0);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_experiences_update_sync AFTER UPDATE ON experiences
+BEGIN
+    INSERT OR REPLACE INTO sync_log (user_id, resource, row_id, deleted) VALUES (NEW.user_id, 'experiences', NEW.id, 0);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_experiences_delete_sync AFTER DELETE ON experiences
+BEGIN
+    INSERT OR REPLACE INTO sync_log (user_id, resource, row_id, deleted) VALUES (OLD.user_id, 'experiences', OLD.id, 1);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_projects_insert_sync AFTER INSERT ON projects
+BEGIN
+    INSERT OR REPLACE INTO sync_log (user_id, resource, row_id, deleted) VALUES (NEW.user_id, 'projects', NEW.id, 0);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_projects_update_sync AFTER UPDATE ON projects
+BEGIN
+    INSERT OR REPLACE INTO sync_log (user_id, resource, row_id, deleted) VALUES (NEW.user_id, 'projects', NEW.id, 0);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_projects_delete_sync AFTER DELETE ON projects
+BEGIN
+    INSERT OR REPLACE INTO sync_log (user_id, resource, row_id, deleted) VALUES (OLD.user_id, 'projects', OLD.id, 1);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_job_analyses_insert_sync AFTER INSERT ON job_analyses
+BEGIN
+    INSERT OR REPLACE INTO sync_log (user_id, resource, row_id, deleted) VALUES (NEW.user_id, 'job_analyses', NEW.id, 0);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_job_analyses_update_sync AFTER UPDATE ON job_analyses
+BEGIN
+    INSERT OR REPLACE INTO sync_log (user_id, resource, row_id, deleted) VALUES (NEW.user_id, 'job_analyses', NEW.id, 0);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_job_analyses_delete_sync AFTER DELETE ON job_analyses
+BEGIN
+    INSERT OR REPLACE INTO sync_log (user_id, resource, row_id, deleted) VALUES (OLD.user_id, 'job_analyses', OLD.id, 1);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_blurbs_insert_sync AFTER INSERT ON blurbs
+BEGIN
+    INSERT OR REPLACE INTO sync_log (user_id, resource, row_id, deleted) VALUES (NEW.user_id, 'blurbs', NEW.id, 0);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_blurbs_update_sync AFTER UPDATE ON blurbs
+BEGIN
+    INSERT OR REPLACE INTO sync_log (user_id, resource, row_id, deleted) VALUES (NEW.user_id, 'blurbs', NEW.id, 0);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_blurbs_delete_sync AFTER DELETE ON blurbs
+BEGIN
+    INSERT OR REPLACE INTO sync_log (user_id, resource, row_id, deleted) VALUES (OLD.user_id, 'blurbs', OLD.id, 1);
+END;
+
+
+-- Full-text search. One FTS5 table per searchable resource, rowid = source
+-- row id. The owner column holds a 'u<user_id>' token so queries are scoped
+-- to one account inside the index rather than by filtering every match.
+CREATE VIRTUAL TABLE IF NOT EXISTS experiences_fts USING fts5(
+    owner, title, body, keywords,
+    tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS projects_fts USING fts5(
+    owner, title, body, keywords,
+    tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS blurbs_fts USING fts5(
+    owner, title, body, keywords,
+    tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS job_analyses_fts USING fts5(
+    owner, title, body, keywords,
+    tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_experiences_insert_fts AFTER INSERT ON experiences
+BEGIN
+    INSERT INTO experiences_fts (rowid, owner, title, body, keywords)
+    VALUES (NEW.id, 'u' || NEW.user_id, NEW.title, COALESCE(NEW.organization, '') || char(10) || COALESCE(NEW.description, ''), NEW.keywords);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_experiences_update_fts AFTER UPDATE OF title, organization, description, keywords ON experiences
+BEGIN
+    UPDATE experiences_fts
+    SET title = NEW.title, body = COALESCE(NEW.organization, '') || char(10) || COALESCE(NEW.description, ''), keywords = NEW.keywords
+    WHERE rowid = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_experiences_delete_fts AFTER DELETE ON experiences
+BEGIN
+    DELETE FROM experiences_fts WHERE rowid = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_projects_insert_fts AFTER INSERT ON projects
+BEGIN
+    INSERT INTO projects_fts (rowid, owner, title, body, keywords)
+    VALUES (NEW.id, 'u' || NEW.user_id, NEW.title, NEW.description, NEW.keywords);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_projects_update_fts AFTER UPDATE OF title, description, keywords ON projects
+BEGIN
+    UPDATE projects_fts SET title = NEW.title, body = NEW.description, keywords = NEW.keywords
+    WHERE rowid = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_projects_delete_fts AFTER DELETE ON projects
+BEGIN
+    DELETE FROM projects_fts WHERE rowid = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_blurbs_insert_fts AFTER INSERT ON blurbs
+BEGIN
+    INSERT INTO blurbs_fts (rowid, owner, title, body, keywords)
+    VALUES (NEW.id, 'u' || NEW.user_id, NEW.field_key, COALESCE(NULLIF(NEW.user_text, ''), NEW.suggestion_text), '');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_blurbs_update_fts AFTER UPDATE OF field_key, suggestion_text, user_text ON blurbs
+BEGIN
+    UPDATE blurbs_fts SET title = NEW.field_key, body = COALESCE(NULLIF(NEW.user_text, ''), NEW.suggestion_text)
+    WHERE rowid = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_blurbs_delete_fts AFTER DELETE ON blurbs
+BEGIN
+    DELETE FROM blurbs_fts WHERE rowid = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_job_analyses_insert_fts AFTER INSERT ON job_analyses
+BEGIN
+    INSERT INTO job_analyses_fts (rowid, owner, title, body, keywords)
+    VALUES (NEW.id, 'u' || NEW.user_id, '', NEW.job_description, NEW.extracted_keywords);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_job_analyses_update_fts AFTER UPDATE OF job_description, extracted_keywords ON job_analyses
+BEGIN
+    UPDATE job_analyses_fts SET body = NEW.job_description, keywords = NEW.extracted_keywords
+    WHERE rowid = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_job_analyses_delete_fts AFTER DELETE ON job_analyses
+BEGIN
+    DELETE FROM job_analyses_fts WHERE rowid = OLD.id;
+END;
+
+
+-- Normalized keywords. Derived from experiences.keywords, projects.keywords
+-- and job_analyses.extracted_keywords by keyword_service on every write.
+CREATE TABLE IF NOT EXISTS keywords (
+    id INTEGER PRIMARY KEY,
+    term TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS item_keywords (
+    user_id INTEGER NOT NULL,
+    resource TEXT NOT NULL,
+    row_id INTEGER NOT NULL,
+    keyword_id INTEGER NOT NULL,
+    PRIMARY KEY (resource, row_id, keyword_id),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (keyword_id) REFERENCES keywords(id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_item_keywords_user_keyword ON item_keywords(user_id, keyword_id, resource, row_id);
+
+CREATE TRIGGER IF NOT EXISTS trg_experiences_delete_keywords AFTER DELETE ON experiences
+BEGIN
+    DELETE FROM item_keywords WHERE resource = 'experiences' AND row_id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_projects_delete_keywords AFTER DELETE ON projects
+BEGIN
+    DELETE FROM item_keywords WHERE resource = 'projects' AND row_id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_job_analyses_delete_keywords AFTER DELETE ON job_analyses
+BEGIN
+    DELETE FROM item_keywords WHERE resource = 'job_analyses' AND row_id = OLD.id;
+END;
+
+
+-- One row per LLM call: which prompt-pruning arm it used and the estimated
+-- size of the background sections with and without pruning.
+CREATE TABLE IF NOT EXISTS prompt_metrics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    kind TEXT NOT NULL CHECK(kind IN ('analyze', 'blurbs')),
+    arm TEXT NOT NULL CHECK(arm IN ('pruned', 'full')),
+    items_total INTEGER NOT NULL,
+    items_sent INTEGER NOT NULL,
+    full_tokens INTEGER NOT NULL,
+    sent_tokens INTEGER NOT NULL,
+    cache_hit INTEGER NOT NULL DEFAULT 0,
+    cached_tokens INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_prompt_metrics_kind_arm ON prompt_metrics(kind, arm);
+CREATE INDEX IF NOT EXISTS idx_blurbs_prompt_metric ON blurbs(prompt_metric_id);
+
+
+-- Completions keyed by a hash of model, prompt version, temperature and the
+-- full prompt. Times are Unix seconds so TTL and LRU eviction can compare them.
+CREATE TABLE IF NOT EXISTS llm_cache (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    cache_key TEXT NOT NULL,
+    kind TEXT NOT NULL CHECK(kind IN ('analyze', 'blurbs', 'summary')),
+    response TEXT NOT NULL,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    UNIQUE(user_id, cache_key),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache(last_used_at);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_created ON llm_cache(created_at);
+
+
+-- One row per model call or response cache hit, with its outcome. Rows are
+-- buffered in memory and written in batches. Times are Unix seconds.
+CREATE TABLE IF NOT EXISTS llm_usage (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    kind TEXT NOT NULL CHECK(kind IN ('analyze', 'blurbs', 'summary')),
+    model TEXT NOT NULL,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    cached_tokens INTEGER NOT NULL DEFAULT 0,
+    latency_ms INTEGER NOT NULL DEFAULT 0,
+    cache_hit INTEGER NOT NULL DEFAULT 0,
+    outcome TEXT NOT NULL CHECK(outcome IN ('ok', 'error', 'unavailable', 'timeout', 'quota')),
+    created_at REAL NOT NULL,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_llm_usage_user_created ON llm_usage(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_llm_usage_created ON llm_usage(created_at);
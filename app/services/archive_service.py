@@ -0,0 +1,316 @@
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+import zipfile
+
+from flask import current_app
+from werkzeug.utils import secure_filename
+
+from app.database import read_transaction, write_transaction
+from app.services.data_service import import_user_data, iter_export, validate_import
+from app.services.task_service import update_job
+
+ARCHIVE_VERSION = 1
+ARTIFACT_NAMES = ('cv.pdf', 'cv.tex')
+COPY_CHUNK_SIZE = 64 * 1024
+_SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class _ChunkWriter:
+    """Write-only, non-seekable sink that zipfile streams into.
+
+    zipfile falls back to data descriptors when the output cannot seek, so
+    entries are written in one pass and drained between writes.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(COPY_CHUNK_SIZE), b''):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def _copy_verified(src, dest, sha256, max_bytes):
+    """Copy a stream to ``dest`` (or nowhere) and check its content hash."""
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: src.read(COPY_CHUNK_SIZE), b''):
+        size += len(chunk)
+        if size > max_bytes:
+            raise ValueError(f'Archive file {sha256} is too large')
+        digest.update(chunk)
+        if dest is not None:
+            dest.write(chunk)
+    if digest.hexdigest() != sha256:
+        raise ValueError(f'Archive file {sha256} failed hash verification')
+    return size
+
+
+def _check_photo_content(zf, photo):
+    """Sniff a photo blob with python-magic, as uploads are, and require
+    the image type the manifest claims for it."""
+    try:
+        import magic
+    except ImportError:
+        # python-magic not installed, skip MIME check
+        return
+    with zf.open(f'blobs/{photo["sha256"]}') as src:
+        mime = magic.from_buffer(src.read(COPY_CHUNK_SIZE), mime=True)
+    if mime != photo['mime_type']:
+        raise ValueError(f'Photo {photo["filename"]} is not a valid {photo["mime_type"]} image')
+
+
+def _collect_files(db, user_id):
+    """Build the manifest and the content-addressed file list for a user."""
+    photos, artifacts, blobs = [], [], {}
+
+    rows = db.execute(
+        'SELECT filename, storage_path, mime_type, is_primary, sort_order '
+        'FROM photos WHERE user_id = ? ORDER BY sort_order, id', (user_id,)
+    ).fetchall()
+    for row in rows:
+        if not os.path.isfile(row['storage_path']):
+            current_app.logger.warning('Skipping missing photo file %s', row['storage_path'])
+            continue
+        sha256, size = _hash_file(row['storage_path'])
+        blobs.setdefault(sha256, row['storage_path'])
+        photos.append({
+            'filename': row['filename'],
+            'mime_type': row['mime_type'],
+            'is_primary': row['is_primary'],
+            'sort_order': row['sort_order'],
+            'sha256': sha256,
+            'size': size,
+        })
+
+    gen_dir = os.path.join(current_app.config['GENERATED_FOLDER'], str(user_id))
+    for name in ARTIFACT_NAMES:
+        path = os.path.join(gen_dir, name)
+        if os.path.isfile(path):
+            sha256, size = _hash_file(path)
+            blobs.setdefault(sha256, path)
+            artifacts.append({'name': name, 'sha256': sha256, 'size': size})
+
+    manifest = {
+        'version': ARCHIVE_VERSION,
+        'data': 'data.json',
+        'photos': photos,
+        'artifacts': artifacts,
+    }
+    return manifest, blobs
+
+
+def iter_archive(user_id):
+    """Yield a zip archive of the user's data, photos and generated files.
+
+    The archive holds ``manifest.json``, the v1 export as ``data.json`` and
+    one ``blobs/<sha256>`` entry per distinct file. Everything is streamed;
+    no entry is held in memory in full.
+    """
+    date_time = time.localtime()[:6]
+    writer = _ChunkWriter()
+
+    def entry(name, compress_type):
+        info = zipfile.ZipInfo(name, date_time)
+        info.compress_type = compress_type
+        return zf.open(info, 'w', force_zip64=True)
+
+    with read_transaction() as db:
+        manifest, blobs = _collect_files(db, user_id)
+
+        with zipfile.ZipFile(writer, 'w') as zf:
+            with entry('manifest.json', zipfile.ZIP_DEFLATED) as dest:
+                dest.write(json.dumps(manifest, indent=2).encode())
+            yield writer.drain()
+
+            with entry('data.json', zipfile.ZIP_DEFLATED) as dest:
+                for chunk in iter_export(user_id):
+                    dest.write(chunk)
+                    yield writer.drain()
+
+            for sha256, path in blobs.items():
+                # Photos and PDFs are already compressed
+                with entry(f'blobs/{sha256}', zipfile.ZIP_STORED) as dest, open(path, 'rb') as src:
+                    for chunk in iter(lambda: src.read(COPY_CHUNK_SIZE), b''):
+                        dest.write(chunk)
+                        yield writer.drain()
+        yield writer.drain()
+
+
+def _check_manifest(manifest):
+    if not isinstance(manifest, dict) or manifest.get('version') != ARCHIVE_VERSION:
+        raise ValueError('Invalid archive manifest')
+
+    photos = manifest.get('photos')
+    artifacts = manifest.get('artifacts')
+    if not isinstance(photos, list) or not isinstance(artifacts, list):
+        raise ValueError('Invalid archive manifest')
+
+    allowed_mimes = current_app.config['ALLOWED_PHOTO_MIMETYPES']
+    for photo in photos:
+        if not isinstance(photo, dict) or not isinstance(photo.get('filename'), str):
+            raise ValueError('Invalid photo entry in archive manifest')
+        if photo.get('mime_type') not in allowed_mimes:
+            raise ValueError(f'Photo {photo["filename"]} has an unsupported type')
+        if not isinstance(photo.get('sort_order', 0), int) or not isinstance(photo.get('is_primary', 0), int):
+            raise ValueError(f'Invalid photo entry {photo["filename"]}')
+    for artifact in artifacts:
+        if not isinstance(artifact, dict) or artifact.get('name') not in ARTIFACT_NAMES:
+            raise ValueError('Invalid artifact entry in archive manifest')
+
+    for item in photos + artifacts:
+        if not isinstance(item.get('sha256'), str) or not _SHA256_RE.match(item['sha256']):
+            raise ValueError('Invalid file hash in archive manifest')
+
+
+def validate_archive(path):
+    """Check an uploaded archive without writing anything.
+
+    Verifies the manifest, every referenced blob's SHA-256, that photo
+    blobs hold the image type they claim and the embedded data export.
+    Returns the plan ``restore_archive`` needs and raises ValueError
+    describing the first problem found.
+    """
+    max_blob = current_app.config['ARCHIVE_MAX_FILE_BYTES']
+    try:
+        with zipfile.ZipFile(path) as zf:
+            try:
+                with zf.open('manifest.json') as f:
+                    manifest = json.loads(f.read(COPY_CHUNK_SIZE * 16))
+            except (KeyError, json.JSONDecodeError, UnicodeDecodeError):
+                raise ValueError('Archive has no valid manifest.json')
+            _check_manifest(manifest)
+
+            for sha256 in {item['sha256'] for item in manifest['photos'] + manifest['artifacts']}:
+                try:
+                    with zf.open(f'blobs/{sha256}') as src:
+                        _copy_verified(src, None, sha256, max_blob)
+                except KeyError:
+                    raise ValueError(f'Archive is missing file {sha256}')
+            # Restore re-checks each blob's hash, so it writes the bytes sniffed here
+            for photo in manifest['photos']:
+                _check_photo_content(zf, photo)
+
+            try:
+                with zf.open('data.json') as f:
+                    data_plan = validate_import(f)
+            except KeyError:
+                raise ValueError('Archive has no data export')
+    except zipfile.BadZipFile:
+        raise ValueError('File is not a valid archive')
+
+    return {
+        'manifest': manifest,
+        'data': data_plan,
+        'total': data_plan['total'] + len(manifest['photos']),
+    }
+
+
+def restore_archive(user_id, path, plan, progress=None):
+    """Replace the user's data, photos and generated files from an archive.
+
+    Blobs are copied out of the archive (hashes re-checked on the way) before
+    the database is touched; the data import and the photo rows are then
+    written in one transaction, and replaced files are only removed after it
+    commits.
+    """
+    manifest = plan['manifest']
+    max_blob = current_app.config['ARCHIVE_MAX_FILE_BYTES']
+    upload_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], str(user_id))
+    gen_dir = os.path.join(current_app.config['GENERATED_FOLDER'], str(user_id))
+    os.makedirs(upload_dir, exist_ok=True)
+    os.makedirs(gen_dir, exist_ok=True)
+    written = []
+
+    def extract(zf, sha256, dest_path):
+        with zf.open(f'blobs/{sha256}') as src, open(dest_path, 'wb') as dest:
+            written.append(dest_path)
+            _copy_verified(src, dest, sha256, max_blob)
+
+    try:
+        with zipfile.ZipFile(path) as zf:
+            photo_rows = []
+            for photo in manifest['photos']:
+                safe_name = secure_filename(photo['filename']) or 'photo'
+                dest_path = os.path.join(upload_dir, f'{uuid.uuid4().hex}_{safe_name}')
+                extract(zf, photo['sha256'], dest_path)
+                photo_rows.append((
+                    user_id, safe_name, dest_path, photo['mime_type'],
+                    photo.get('is_primary', 0), photo.get('sort_order', 0),
+                ))
+
+            staged_artifacts = []
+            for artifact in manifest['artifacts']:
+                staged = os.path.join(gen_dir, f'.{uuid.uuid4().hex}.{artifact["name"]}')
+                extract(zf, artifact['sha256'], staged)
+                staged_artifacts.append((staged, os.path.join(gen_dir, artifact['name'])))
+
+            data_total = plan['data']['total']
+            with write_transaction() as db:
+                with zf.open('data.json') as f:
+                    import_user_data(user_id, f, plan['data'], progress=progress)
+
+                old_paths = [r['storage_path'] for r in db.execute(
+                    'SELECT storage_path FROM photos WHERE user_id = ?', (user_id,)
+                )]
+                db.execute('DELETE FROM photos WHERE user_id = ?', (user_id,))
+                db.executemany(
+                    'INSERT INTO photos (user_id, filename, storage_path, mime_type, is_primary, sort_order) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    photo_rows,
+                )
+    except Exception:
+        for path_written in written:
+            try:
+                os.remove(path_written)
+            except OSError:
+                pass
+        raise
+
+    for staged, final in staged_artifacts:
+        os.replace(staged, final)
+    for old_path in old_paths:
+        try:
+            os.remove(old_path)
+        except OSError:
+            pass
+    if progress:
+        progress(data_total + len(photo_rows))
+
+
+def run_restore_job(job_id, user_id, path, plan):
+    """Background entry point: restore a saved archive and report progress on the job."""
+    update_job(job_id, status='running')
+    try:
+        restore_archive(user_id, path, plan, progress=lambda n: update_job(job_id, processed=n))
+        update_job(job_id, status='completed', processed=plan['total'])
+    except Exception as e:
+        current_app.logger.exception('Restore job %s failed', job_id)
+        update_job(job_id, status='failed', error=f'Restore failed: {e}')
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+from functools import partial
+
+from flask import current_app
+
+from app.services.task_service import update_job
+
+# One event loop per process, on its own daemon thread. Coroutines waiting on
+# the network cost no thread of their own, so in-flight LLM calls are not
+# capped by the web server's worker threads.
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _get_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='cv-async', daemon=True).start()
+            _loop = loop
+    return _loop
+
+
+def submit(coro):
+    """Run a coroutine on the shared event loop; returns a concurrent Future.
+
+    With ``TASKS_RUN_INLINE`` set (the test config) it runs to completion on
+    the calling thread instead, so it shares the request's database connection.
+    """
+    if current_app.config.get('TASKS_RUN_INLINE'):
+        asyncio.run(coro)
+        return None
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop())
+
+
+async def in_app(app, fn, *args):
+    """Call blocking ``fn`` (database work) from a coroutine.
+
+    It runs on the loop's default executor inside a fresh app context, so
+    the loop itself never blocks. Inline tasks call it directly.
+    """
+    if app.config.get('TASKS_RUN_INLINE'):
+        return fn(*args)
+
+    def run():
+        with app.app_context():
+            return fn(*args)
+
+    return await asyncio.get_running_loop().run_in_executor(None, run)
+
+
+def run_job(job_id, coro, finish):
+    """Drive ``coro`` as a tracked job on the event loop.
+
+    ``finish(value)`` turns the coroutine's result into the job's ``result``
+    and runs in an app context, so it can write to the database. Failures
+    are recorded on the job.
+    """
+    app = current_app._get_current_object()
+
+    async def run():
+        await in_app(app, partial(update_job, job_id, status='running'))
+        try:
+            value = await coro
+            result = await in_app(app, finish, value)
+        except Exception as e:
+            app.logger.exception('Async job %s failed', job_id)
+            await in_app(app, partial(update_job, job_id, status='failed', error=str(e)))
+            return
+        await in_app(app, partial(update_job, job_id, status='completed', result=result))
+
+    return submit(run())
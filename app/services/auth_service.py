@@ -4,7 +4,7 @@ from datetime import datetime, timedelta, timezone
 
 import bcrypt
 
-from app.database import get_db
+from app.database import write_transaction
 from app.models import User
 
 
@@ -21,25 +21,24 @@ def check_password(password, password_hash):
 
 
 def register_user(username, email):
-    db = get_db()
     password = generate_password()
     pw_hash = hash_password(password)
 
-    db.execute(
-        'INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)',
-        (username, email, pw_hash),
-    )
-    user_id = db.execute('SELECT last_insert_rowid()').fetchone()[0]
-
-    db.execute(
-        'INSERT INTO user_settings (user_id) VALUES (?)',
-        (user_id,),
-    )
-    db.execute(
-        'INSERT INTO about_you (user_id) VALUES (?)',
-        (user_id,),
-    )
-    db.commit()
+    with write_transaction() as db:
+        db.execute(
+            'INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)',
+            (username, email, pw_hash),
+        )
+        user_id = db.execute('SELECT last_insert_rowid()').fetchone()[0]
+
+        db.execute(
+            'INSERT INTO user_settings (user_id) VALUES (?)',
+            (user_id,),
+        )
+        db.execute(
+            'INSERT INTO about_you (user_id) VALUES (?)',
+            (user_id,),
+        )
 
     return password, user_id
 
@@ -58,45 +57,46 @@ def create_reset_token(user_id):
     token_hash = hashlib.sha256(token.encode()).hexdigest()
     expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
 
-    db = get_db()
-    db.execute(
-        'INSERT INTO password_reset_tokens (user_id, token_hash, expires_at) VALUES (?, ?, ?)',
-        (user_id, token_hash, expires_at.isoformat()),
-    )
-    db.commit()
+    with write_transaction() as db:
+        db.execute(
+            'INSERT INTO password_reset_tokens (user_id, token_hash, expires_at) VALUES (?, ?, ?)',
+            (user_id, token_hash, expires_at.isoformat()),
+        )
     return token
 
 
 def validate_reset_token(token):
     token_hash = hashlib.sha256(token.encode()).hexdigest()
-    db = get_db()
-    row = db.execute(
-        'SELECT * FROM password_reset_tokens WHERE token_hash = ? AND used = 0',
-        (token_hash,),
-    ).fetchone()
-
-    if row is None:
-        return None
-
-    expires_at = datetime.fromisoformat(row['expires_at'])
-    if expires_at.tzinfo is None:
-        expires_at = expires_at.replace(tzinfo=timezone.utc)
-    if datetime.now(timezone.utc) > expires_at:
-        return None
-
-    # Mark as used
-    db.execute(
-        'UPDATE password_reset_tokens SET used = 1 WHERE id = ?',
-        (row['id'],),
-    )
-
-    # Generate new password
+    # Hashing the new password is slow, so do it before taking the write lock
     new_password = generate_password()
     pw_hash = hash_password(new_password)
-    db.execute(
-        'UPDATE users SET password_hash = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?',
-        (pw_hash, row['user_id']),
-    )
-    db.commit()
+
+    # Checking and consuming the token in one transaction makes it single-use
+    # even when two confirmations race
+    with write_transaction() as db:
+        row = db.execute(
+            'SELECT * FROM password_reset_tokens WHERE token_hash = ? AND used = 0',
+            (token_hash,),
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        expires_at = datetime.fromisoformat(row['expires_at'])
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        if datetime.now(timezone.utc) > expires_at:
+            return None
+
+        # Mark as used
+        db.execute(
+            'UPDATE password_reset_tokens SET used = 1 WHERE id = ?',
+            (row['id'],),
+        )
+
+        db.execute(
+            'UPDATE users SET password_hash = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?',
+            (pw_hash, row['user_id']),
+        )
 
     return new_password
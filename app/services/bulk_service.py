@@ -0,0 +1,132 @@
+from flask import current_app
+
+from app.database import write_transaction
+from app.services.keyword_service import KEYWORD_SOURCES, index_keywords
+from app.services.rank_service import key_between, maybe_rebalance, next_key
+
+VALID_OPS = ('create', 'update', 'delete')
+
+
+def _parse_operations(operations, validate):
+    creates, updates, deletes, errors = [], [], [], []
+    # Operations are applied grouped by kind, not in request order, so a
+    # batch may touch each item only once
+    touched = {}
+
+    for index, op in enumerate(operations):
+        if not isinstance(op, dict) or op.get('op') not in VALID_OPS:
+            errors.append({'index': index, 'error': f'op must be one of: {", ".join(VALID_OPS)}'})
+            continue
+
+        kind = op['op']
+        item_id = op.get('id')
+        if kind in ('update', 'delete') and (not isinstance(item_id, int) or isinstance(item_id, bool)):
+            errors.append({'index': index, 'error': 'id is required'})
+            continue
+        if kind in ('update', 'delete'):
+            if item_id in touched:
+                errors.append({
+                    'index': index,
+                    'error': f'Item {item_id} is already changed by operation {touched[item_id]}',
+                })
+                continue
+            touched[item_id] = index
+
+        values = None
+        if kind in ('create', 'update'):
+            data = op.get('data')
+            if not isinstance(data, dict):
+                errors.append({'index': index, 'error': 'data object is required'})
+                continue
+            values, error = validate(data)
+            if error:
+                errors.append({'index': index, 'error': error})
+                continue
+
+        if kind == 'create':
+            creates.append((index, values))
+        elif kind == 'update':
+            updates.append((index, item_id, values))
+        else:
+            deletes.append((index, item_id))
+
+    return creates, updates, deletes, errors
+
+
+def apply_bulk_operations(user_id, table, columns, operations, validate):
+    """Apply a batch of create/update/delete operations in one transaction.
+
+    ``validate`` maps a request payload to ``(values, error)`` where ``values``
+    holds one entry per name in ``columns``. Each existing item may be
+    updated or deleted once per batch. Returns ``(results, errors)``; when
+    ``errors`` is non-empty nothing has been written.
+    """
+    max_ops = current_app.config.get('BULK_MAX_OPERATIONS', 500)
+    if len(operations) > max_ops:
+        return [], [{'index': None, 'error': f'At most {max_ops} operations per batch'}]
+
+    creates, updates, deletes, errors = _parse_operations(operations, validate)
+    if errors:
+        return [], errors
+
+    results = {}
+    with write_transaction() as db:
+        referenced = {item_id for _, item_id, _ in updates} | {item_id for _, item_id in deletes}
+        if referenced:
+            placeholders = ', '.join('?' * len(referenced))
+            owned = {
+                r['id'] for r in db.execute(
+                    f'SELECT id FROM {table} WHERE user_id = ? AND id IN ({placeholders})',
+                    (user_id, *referenced),
+                )
+            }
+            missing = [(index, item_id) for index, item_id, _ in updates if item_id not in owned]
+            missing += [(index, item_id) for index, item_id in deletes if item_id not in owned]
+            if missing:
+                return [], [{'index': index, 'error': f'Item {item_id} not found'}
+                            for index, item_id in sorted(missing)]
+
+        if creates:
+            sort_keys = [next_key(db, table, user_id)]
+            while len(sort_keys) < len(creates):
+                sort_keys.append(key_between(sort_keys[-1], None))
+            db.executemany(
+                f'INSERT INTO {table} (user_id, {", ".join(columns)}, sort_key) '
+                f'VALUES ({", ".join("?" * (len(columns) + 2))})',
+                [
+                    (user_id, *[values[c] for c in columns], sort_key)
+                    for sort_key, (_, values) in zip(sort_keys, creates)
+                ],
+            )
+            # The write lock is held, so the newest ids for this user are ours
+            new_ids = [r[0] for r in db.execute(
+                f'SELECT id FROM {table} WHERE user_id = ? ORDER BY id DESC LIMIT ?',
+                (user_id, len(creates)),
+            )]
+            for (index, _), new_id in zip(creates, reversed(new_ids)):
+                results[index] = {'index': index, 'op': 'create', 'id': new_id}
+
+        if updates:
+            db.executemany(
+                f'UPDATE {table} SET {", ".join(f"{c}=?" for c in columns)}, '
+                f'updated_at=CURRENT_TIMESTAMP WHERE id=? AND user_id=?',
+                [(*[values[c] for c in columns], item_id, user_id) for _, item_id, values in updates],
+            )
+            for index, item_id, _ in updates:
+                results[index] = {'index': index, 'op': 'update', 'id': item_id}
+
+        written = [r['id'] for r in results.values()]
+        if written and table in KEYWORD_SOURCES:
+            index_keywords(db, user_id, table, written)
+
+        if deletes:
+            db.executemany(
+                f'DELETE FROM {table} WHERE id = ? AND user_id = ?',
+                [(item_id, user_id) for _, item_id in deletes],
+            )
+            for index, item_id in deletes:
+                results[index] = {'index': index, 'op': 'delete', 'id': item_id}
+
+    if creates:
+        maybe_rebalance(table, user_id, sort_keys[-1])
+    return [results[index] for index in sorted(results)], []
@@ -1,4 +1,5 @@
 import base64
+import functools
 
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
@@ -7,14 +8,18 @@ from flask import current_app
 
 
 def _get_fernet():
-    secret = current_app.config['SECRET_KEY'].encode()
+    return _fernet_for(current_app.config['SECRET_KEY'])
+
+
+@functools.lru_cache(maxsize=4)
+def _fernet_for(secret):
     kdf = HKDF(
         algorithm=hashes.SHA256(),
         length=32,
         salt=b'cv-creator-api-key-salt',
         info=b'api-key-encryption',
     )
-    key = base64.urlsafe_b64encode(kdf.derive(secret))
+    key = base64.urlsafe_b64encode(kdf.derive(secret.encode()))
     return Fernet(key)
 
 
@@ -1,156 +1,391 @@
 import json
+import os
+import zlib
 
-from app.database import get_db
+from flask import current_app
 
+from app.database import get_db, read_transaction, write_transaction
+from app.services.json_stream import iter_events
+from app.services.keyword_service import KEYWORD_SOURCES, index_keywords
+from app.services.rank_service import spread_keys
+from app.services.task_service import update_job
+
+PROFILE_FIELDS = ('first_name', 'last_name', 'email_contact', 'phone', 'address', 'linkedin', 'website', 'bio')
+LIST_SECTIONS = ('experiences', 'projects', 'job_analyses', 'blurbs')
 
-def export_user_data(user_id):
-    db = get_db()
 
+def _export_sections(db, user_id):
+    """Yield ``(name, value)`` for each top-level member of the v1 export.
+
+    List sections are yielded as lazy row iterators over live cursors, so
+    callers can stream them without materializing the user's data.
+    """
     profile = db.execute(
         'SELECT first_name, last_name, email_contact, phone, address, linkedin, website, bio '
         'FROM about_you WHERE user_id = ?', (user_id,)
     ).fetchone()
+    yield 'profile', dict(profile) if profile else {}
 
     experiences = db.execute(
-        'SELECT category, title, organization, start_date, end_date, description, keywords, sort_order '
-        'FROM experiences WHERE user_id = ? ORDER BY sort_order', (user_id,)
-    ).fetchall()
+        'SELECT category, title, organization, start_date, end_date, description, keywords '
+        'FROM experiences WHERE user_id = ? ORDER BY sort_key, id', (user_id,)
+    )
+    # sort_order is kept in the v1 format as the item's position
+    yield 'experiences', ({**dict(e), 'sort_order': idx} for idx, e in enumerate(experiences))
 
     projects = db.execute(
-        'SELECT title, description, keywords, sort_order '
-        'FROM projects WHERE user_id = ? ORDER BY sort_order', (user_id,)
-    ).fetchall()
+        'SELECT title, description, keywords '
+        'FROM projects WHERE user_id = ? ORDER BY sort_key, id', (user_id,)
+    )
+    yield 'projects', ({**dict(p), 'sort_order': idx} for idx, p in enumerate(projects))
 
     job_analyses = db.execute(
         'SELECT job_description, extracted_keywords, focus_suggestions, alignment_data, is_active, created_at '
         'FROM job_analyses WHERE user_id = ? ORDER BY created_at', (user_id,)
-    ).fetchall()
+    )
+    yield 'job_analyses', (dict(j) for j in job_analyses)
 
     blurbs = db.execute(
         'SELECT template_name, field_key, suggestion_text, status, user_text '
         'FROM blurbs WHERE user_id = ?', (user_id,)
-    ).fetchall()
+    )
+    yield 'blurbs', (dict(b) for b in blurbs)
 
     settings = db.execute(
         'SELECT selected_template, sentences_per_field, font_size '
         'FROM user_settings WHERE user_id = ?', (user_id,)
     ).fetchone()
+    yield 'settings', dict(settings) if settings else {}
+
+
+def export_user_data(user_id):
+    data = {'version': 1}
+    for name, value in _export_sections(get_db(), user_id):
+        data[name] = value if isinstance(value, dict) else list(value)
+    return data
+
+
+def _iter_export_json(db, user_id):
+    # Reproduces json.dumps(export_user_data(...), indent=2, default=str)
+    # byte for byte, one record at a time
+    yield '{\n  "version": 1'
+    for name, value in _export_sections(db, user_id):
+        yield f',\n  {json.dumps(name)}: '
+        if isinstance(value, dict):
+            yield json.dumps(value, indent=2, default=str).replace('\n', '\n  ')
+            continue
+        opener = '[\n    '
+        for record in value:
+            yield opener + json.dumps(record, indent=2, default=str).replace('\n', '\n    ')
+            opener = ',\n    '
+        yield '[]' if opener == '[\n    ' else '\n  ]'
+    yield '\n}'
+
+
+def _iter_export_ndjson(db, user_id):
+    yield json.dumps({'section': 'version', 'data': 1}) + '\n'
+    for name, value in _export_sections(db, user_id):
+        records = [value] if isinstance(value, dict) else value
+        for record in records:
+            yield json.dumps({'section': name, 'data': record}, default=str) + '\n'
+
+
+EXPORT_FORMATS = {
+    'json': _iter_export_json,
+    'ndjson': _iter_export_ndjson,
+}
+
+
+def iter_export(user_id, fmt='json', compress=None):
+    """Yield the export as byte chunks of roughly EXPORT_CHUNK_SIZE.
+
+    Rows are read from cursors inside one read transaction, so memory use
+    does not grow with the amount of data. ``compress='gzip'`` gzips the
+    stream on the fly.
+    """
+    chunk_size = current_app.config.get('EXPORT_CHUNK_SIZE', 64 * 1024)
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress == 'gzip' else None
+
+    def emit(data):
+        if compressor is None:
+            return data
+        return compressor.compress(data)
+
+    with read_transaction() as db:
+        pieces, size = [], 0
+        for piece in EXPORT_FORMATS[fmt](db, user_id):
+            pieces.append(piece)
+            size += len(piece)
+            if size >= chunk_size:
+                out = emit(''.join(pieces).encode())
+                pieces, size = [], 0
+                if out:
+                    yield out
+        out = emit(''.join(pieces).encode())
+        if out:
+            yield out
+
+    if compressor is not None:
+        yield compressor.flush()
+
+
+def _field(types, default=None, choices=None):
+    return types, default, choices
+
+
+_TEXT = (str,)
+_INT = (int,)
+_NUMBER = (int, float)
+_JSON_LIST = (str, list)
+
+IMPORT_SCHEMA = {
+    'profile': {name: _field(_TEXT, '') for name in PROFILE_FIELDS},
+    'settings': {
+        'selected_template': _field(_TEXT),
+        'sentences_per_field': _field(_INT),
+        'font_size': _field(_INT),
+    },
+    'experiences': {
+        'category': _field(_TEXT, 'work', choices=('work', 'education', 'hobby')),
+        'title': _field(_TEXT, ''),
+        'organization': _field(_TEXT, ''),
+        'start_date': _field(_TEXT, ''),
+        'end_date': _field(_TEXT, ''),
+        'description': _field(_TEXT, ''),
+        'keywords': _field(_TEXT, ''),
+        'sort_order': _field(_NUMBER),
+    },
+    'projects': {
+        'title': _field(_TEXT, ''),
+        'description': _field(_TEXT, ''),
+        'keywords': _field(_TEXT, ''),
+        'sort_order': _field(_NUMBER),
+    },
+    'job_analyses': {
+        'job_description': _field(_TEXT, ''),
+        'extracted_keywords': _field(_JSON_LIST, '[]'),
+        'focus_suggestions': _field(_JSON_LIST, '[]'),
+        'alignment_data': _field(_JSON_LIST, '[]'),
+        'is_active': _field(_INT, 0),
+    },
+    'blurbs': {
+        'template_name': _field(_TEXT, 'classic'),
+        'field_key': _field(_TEXT, ''),
+        'suggestion_text': _field(_TEXT, ''),
+        'status': _field(_TEXT, 'pending', choices=('pending', 'accepted', 'modified', 'rejected')),
+        'user_text': _field(_TEXT, ''),
+    },
+}
+
+
+def _compile_validator(section, spec):
+    fields = tuple(spec.items())
+
+    def validate(record, index=None):
+        where = section if index is None else f'{section}[{index}]'
+        if not isinstance(record, dict):
+            raise ValueError(f'{where} must be an object')
+        values = {}
+        for name, (types, default, choices) in fields:
+            value = record.get(name)
+            if value is None:
+                values[name] = default
+                continue
+            if not isinstance(value, types):
+                raise ValueError(f'{where}.{name} has an invalid type')
+            if choices and value not in choices:
+                raise ValueError(f'{where}.{name} must be one of: {", ".join(choices)}')
+            values[name] = value
+        return values
 
-    return {
-        'version': 1,
-        'profile': dict(profile) if profile else {},
-        'experiences': [dict(e) for e in experiences],
-        'projects': [dict(p) for p in projects],
-        'job_analyses': [dict(j) for j in job_analyses],
-        'blurbs': [dict(b) for b in blurbs],
-        'settings': dict(settings) if settings else {},
-    }
+    return validate
 
 
-def import_user_data(user_id, data):
-    if not isinstance(data, dict) or data.get('version') != 1:
+# Compiled once so the per-record cost is a tuple walk
+_VALIDATORS = {section: _compile_validator(section, spec) for section, spec in IMPORT_SCHEMA.items()}
+
+
+def _iter_import_events(fp):
+    max_record = current_app.config.get('IMPORT_MAX_RECORD_BYTES', 1024 * 1024)
+    return iter_events(fp, max_value_chars=max_record)
+
+
+def validate_import(fp):
+    """Stream through an export file and check every record against the schema.
+
+    Nothing is written. Returns the plan ``import_user_data`` needs: record
+    counts per section and the sort key for each ranked record by file
+    position. Raises ValueError describing the first problem found.
+    """
+    version = None
+    counts = {}
+    orders = {'experiences': [], 'projects': []}
+
+    for event, key, value in _iter_import_events(fp):
+        if key == 'version':
+            version = value
+            continue
+        validate = _VALIDATORS.get(key)
+        if validate is None:
+            continue
+
+        if event in ('start', 'value') and key in counts:
+            # The import plan has one entry per section
+            raise ValueError(f'{key} appears more than once')
+
+        if key in LIST_SECTIONS:
+            if event == 'value':
+                raise ValueError(f'{key} must be a list')
+            if event == 'start':
+                counts[key] = 0
+                continue
+            index = counts[key]
+            record = validate(value, index)
+            counts[key] += 1
+            if key in orders:
+                sort_order = record['sort_order']
+                orders[key].append(sort_order if sort_order is not None else index)
+        else:
+            if event != 'value':
+                raise ValueError(f'{key} must be an object')
+            validate(value)
+            counts[key] = 1
+
+    if version != 1:
         raise ValueError('Invalid data format')
 
-    db = get_db()
-
-    # Import profile
-    if 'profile' in data:
-        p = data['profile']
-        db.execute(
-            'UPDATE about_you SET first_name=?, last_name=?, email_contact=?, phone=?, '
-            'address=?, linkedin=?, website=?, bio=?, updated_at=CURRENT_TIMESTAMP WHERE user_id=?',
-            (
-                p.get('first_name', ''), p.get('last_name', ''),
-                p.get('email_contact', ''), p.get('phone', ''),
-                p.get('address', ''), p.get('linkedin', ''),
-                p.get('website', ''), p.get('bio', ''),
-                user_id,
-            ),
-        )
-
-    # Import experiences (clear existing first)
-    if 'experiences' in data:
-        db.execute('DELETE FROM experiences WHERE user_id = ?', (user_id,))
-        for idx, exp in enumerate(data['experiences']):
-            db.execute(
-                'INSERT INTO experiences (user_id, category, title, organization, start_date, '
-                'end_date, description, keywords, sort_order) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
-                (
-                    user_id, exp.get('category', 'work'), exp.get('title', ''),
-                    exp.get('organization', ''), exp.get('start_date', ''),
-                    exp.get('end_date', ''), exp.get('description', ''),
-                    exp.get('keywords', ''), exp.get('sort_order', idx),
-                ),
-            )
-
-    # Import projects
-    if 'projects' in data:
-        db.execute('DELETE FROM projects WHERE user_id = ?', (user_id,))
-        for idx, proj in enumerate(data['projects']):
-            db.execute(
-                'INSERT INTO projects (user_id, title, description, keywords, sort_order) '
-                'VALUES (?, ?, ?, ?, ?)',
-                (
-                    user_id, proj.get('title', ''), proj.get('description', ''),
-                    proj.get('keywords', ''), proj.get('sort_order', idx),
-                ),
-            )
-
-    # Import job analyses
-    if 'job_analyses' in data:
-        db.execute('DELETE FROM job_analyses WHERE user_id = ?', (user_id,))
-        for j in data['job_analyses']:
-            keywords = j.get('extracted_keywords', '[]')
-            if isinstance(keywords, list):
-                keywords = json.dumps(keywords)
-            focus = j.get('focus_suggestions', '[]')
-            if isinstance(focus, list):
-                focus = json.dumps(focus)
-            alignment = j.get('alignment_data', '[]')
-            if isinstance(alignment, list):
-                alignment = json.dumps(alignment)
-
-            db.execute(
-                'INSERT INTO job_analyses (user_id, job_description, extracted_keywords, '
-                'focus_suggestions, alignment_data, is_active) VALUES (?, ?, ?, ?, ?, ?)',
-                (
-                    user_id, j.get('job_description', ''),
-                    keywords, focus, alignment,
-                    j.get('is_active', 0),
-                ),
-            )
-
-    # Import blurbs
-    if 'blurbs' in data:
-        db.execute('DELETE FROM blurbs WHERE user_id = ?', (user_id,))
-        for b in data['blurbs']:
-            db.execute(
-                'INSERT INTO blurbs (user_id, template_name, field_key, suggestion_text, status, user_text) '
-                'VALUES (?, ?, ?, ?, ?, ?)',
-                (
-                    user_id, b.get('template_name', 'classic'),
-                    b.get('field_key', ''), b.get('suggestion_text', ''),
-                    b.get('status', 'pending'), b.get('user_text', ''),
-                ),
-            )
-
-    # Import settings (except API key)
-    if 'settings' in data:
-        s = data['settings']
-        if 'selected_template' in s:
-            db.execute(
-                'UPDATE user_settings SET selected_template=? WHERE user_id=?',
-                (s['selected_template'], user_id),
-            )
-        if 'sentences_per_field' in s:
-            db.execute(
-                'UPDATE user_settings SET sentences_per_field=? WHERE user_id=?',
-                (s['sentences_per_field'], user_id),
-            )
-        if 'font_size' in s:
-            db.execute(
-                'UPDATE user_settings SET font_size=? WHERE user_id=?',
-                (s['font_size'], user_id),
-            )
-
-    db.commit()
+    sort_keys = {}
+    for section, sort_orders in orders.items():
+        if section not in counts:
+            continue
+        # Ranked by exported sort_order, ties broken by position in the file
+        ranked = sorted(range(len(sort_orders)), key=lambda i: (sort_orders[i], i))
+        keys = [None] * len(ranked)
+        for key, position in zip(spread_keys(len(ranked)), ranked):
+            keys[position] = key
+        sort_keys[section] = keys
+
+    return {'counts': counts, 'sort_keys': sort_keys, 'total': sum(counts.values())}
+
+
+def _json_text(value):
+    return json.dumps(value) if isinstance(value, list) else value
+
+
+_DELETES = {section: f'DELETE FROM {section} WHERE user_id = ?' for section in LIST_SECTIONS}
+
+_INSERTS = {
+    'experiences': (
+        'INSERT INTO experiences (user_id, category, title, organization, start_date, '
+        'end_date, description, keywords, sort_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        lambda user_id, r, sort_key: (
+            user_id, r['category'], r['title'], r['organization'], r['start_date'],
+            r['end_date'], r['description'], r['keywords'], sort_key,
+        ),
+    ),
+    'projects': (
+        'INSERT INTO projects (user_id, title, description, keywords, sort_key) '
+        'VALUES (?, ?, ?, ?, ?)',
+        lambda user_id, r, sort_key: (user_id, r['title'], r['description'], r['keywords'], sort_key),
+    ),
+    'job_analyses': (
+        'INSERT INTO job_analyses (user_id, job_description, extracted_keywords, '
+        'focus_suggestions, alignment_data, is_active) VALUES (?, ?, ?, ?, ?, ?)',
+        lambda user_id, r, sort_key: (
+            user_id, r['job_description'], _json_text(r['extracted_keywords']),
+            _json_text(r['focus_suggestions']), _json_text(r['alignment_data']), r['is_active'],
+        ),
+    ),
+    'blurbs': (
+        'INSERT INTO blurbs (user_id, template_name, field_key, suggestion_text, status, user_text) '
+        'VALUES (?, ?, ?, ?, ?, ?)',
+        lambda user_id, r, sort_key: (
+            user_id, r['template_name'], r['field_key'], r['suggestion_text'], r['status'], r['user_text'],
+        ),
+    ),
+}
+
+
+def import_user_data(user_id, fp, plan, progress=None):
+    """Replace the user's data with the contents of a validated export file.
+
+    The file is streamed a second time and records are inserted with
+    executemany in batches of IMPORT_BATCH_SIZE, all inside one transaction.
+    ``progress`` is called with the number of records written so far.
+    """
+    batch_size = current_app.config.get('IMPORT_BATCH_SIZE', 500)
+    counts = plan['counts']
+    positions = dict.fromkeys(LIST_SECTIONS, 0)
+    processed = 0
+    batch = []
+
+    with write_transaction() as db:
+        def flush(section):
+            nonlocal processed
+            if batch:
+                db.executemany(_INSERTS[section][0], batch)
+                processed += len(batch)
+                batch.clear()
+                if progress:
+                    progress(processed)
+
+        section = None
+        for event, key, value in _iter_import_events(fp):
+            if key not in counts:
+                continue
+
+            if event == 'start':
+                flush(section)
+                section = key
+                db.execute(_DELETES[key], (user_id,))
+            elif event == 'item':
+                record = _VALIDATORS[key](value, positions[key])
+                sort_keys = plan['sort_keys'].get(key)
+                sort_key = sort_keys[positions[key]] if sort_keys else None
+                positions[key] += 1
+                batch.append(_INSERTS[key][1](user_id, record, sort_key))
+                if len(batch) >= batch_size:
+                    flush(section)
+            elif key == 'profile':
+                p = _VALIDATORS['profile'](value)
+                db.execute(
+                    'UPDATE about_you SET first_name=?, last_name=?, email_contact=?, phone=?, '
+                    'address=?, linkedin=?, website=?, bio=?, updated_at=CURRENT_TIMESTAMP WHERE user_id=?',
+                    (*[p[f] for f in PROFILE_FIELDS], user_id),
+                )
+                processed += 1
+            elif key == 'settings':
+                # Import settings (except API key)
+                s = _VALIDATORS['settings'](value)
+                for name in ('selected_template', 'sentences_per_field', 'font_size'):
+                    if s[name] is not None:
+                        db.execute(
+                            f'UPDATE user_settings SET {name}=? WHERE user_id=?',
+                            (s[name], user_id),
+                        )
+                processed += 1
+        flush(section)
+
+        for resource in KEYWORD_SOURCES:
+            if resource in counts:
+                index_keywords(db, user_id, resource)
+
+    if progress:
+        progress(processed)
+
+
+def run_import_job(job_id, user_id, path, plan):
+    """Background entry point: import a saved upload and report progress on the job."""
+    update_job(job_id, status='running')
+    try:
+        with open(path, 'rb') as f:
+            import_user_data(user_id, f, plan, progress=lambda n: update_job(job_id, processed=n))
+        update_job(job_id, status='completed', processed=plan['total'])
+    except Exception as e:
+        current_app.logger.exception('Import job %s failed', job_id)
+        update_job(job_id, status='failed', error=f'Import failed: {e}')
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
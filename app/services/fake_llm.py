@@ -0,0 +1,209 @@
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from types import SimpleNamespace
+
+import httpx
+import openai
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from app.services.scoring_service import extract_keywords
+
+_BLURB_COUNT_RE = re.compile(r'Generate (\d+) CV blurb suggestions for the field: (.+)')
+_JOB_SECTION_RE = re.compile(r'## Job Description\n(.*?)(?=\n## |\Z)', re.S)
+_PIECE_RE = re.compile(r'\s*\S+\s*')
+_TOKEN_RE = re.compile(r'\w+|[^\w\s]')
+# Like OpenAI, prompt prefixes of at least 1024 tokens are cached, in 128-token steps
+_PREFIX_CACHE_MIN_TOKENS = 1024
+_PREFIX_CACHE_STEP_TOKENS = 128
+# Cached prefixes remembered at most, like a provider's cache evicting old ones
+_PREFIX_CACHE_MAX_ENTRIES = 10000
+# Keyword arguments that change how a reply is delivered, not what it says
+_TRANSPORT_ARGS = ('timeout', 'stream', 'stream_options')
+_HTTP_REQUEST = httpx.Request('POST', 'http://fake-llm.local/v1/chat/completions')
+
+
+def fake_reply(request):
+    """Deterministic reply text for a chat completion request.
+
+    Recognizes the app's prompts: blurb requests get ``{"suggestions": ...}``,
+    other JSON requests a job analysis built from the description's RAKE
+    keyphrases, and plain text requests (chunk summaries) a shortened echo.
+    """
+    messages = request['messages']
+    system = messages[0]['content'] if len(messages) > 1 else ''
+    prompt = messages[-1]['content']
+
+    if not request.get('response_format'):
+        words = prompt.split()
+        return ' '.join(words[:max(1, (request.get('max_tokens') or len(words)) // 2)])
+
+    if '"suggestions"' in system:
+        match = _BLURB_COUNT_RE.search(prompt)
+        count, field = (int(match.group(1)), match.group(2).strip()) if match else (3, 'cv')
+        keywords = extract_keywords(prompt, count) or [field]
+        return json.dumps({'suggestions': [
+            f'Delivered {field} results through {keywords[i % len(keywords)]}.' for i in range(count)
+        ]})
+
+    match = _JOB_SECTION_RE.search(prompt)
+    keywords = extract_keywords(match.group(1) if match else prompt)
+    return json.dumps({
+        'extracted_keywords': keywords,
+        'focus_suggestions': [f'Highlight your work with {k}' for k in keywords[:3]],
+        'alignment_data': [],
+    })
+
+
+def _status_error(status):
+    headers = {'retry-after': '1'} if status == 429 else None
+    response = httpx.Response(status, headers=headers, request=_HTTP_REQUEST)
+    if status == 429:
+        error_class = openai.RateLimitError
+    elif status >= 500:
+        error_class = openai.InternalServerError
+    else:
+        error_class = openai.APIStatusError
+    return error_class(f'Injected fake LLM error ({status})', response=response, body=None)
+
+
+class FakeLLM:
+    """Offline stand-in for the OpenAI client, for load tests and demos.
+
+    ``chat.completions.create`` answers with ``fake_reply`` as real
+    ``ChatCompletion`` objects, or ``ChatCompletionChunk`` streams of one
+    word per chunk. The first token arrives after a lognormal delay with
+    median ``latency`` seconds and shape ``sigma`` (0 makes it constant);
+    each completion token then takes ``token_delay``. A share
+    ``error_rate`` of calls fail with HTTP ``error_status``, and calls
+    slower than their ``timeout`` raise APITimeoutError. Draws are seeded
+    from ``seed`` and the request, so a run replays exactly while a retry
+    of the same request draws afresh. Prompt prefixes are remembered, and
+    usage reports the tokens of the longest one seen before as cached.
+    ``calls`` keeps the last ``history`` requests, and attempts are counted
+    for as many distinct requests, so a long load test runs in flat memory.
+    """
+
+    def __init__(self, latency=0.5, sigma=0.5, token_delay=0.0, error_rate=0.0, error_status=500,
+                 seed=0, model='fake-llm', history=1000):
+        self.latency = latency
+        self.sigma = sigma
+        self.token_delay = token_delay
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.seed = seed
+        self.model = model
+        self.history = history
+        self.calls = deque(maxlen=history)
+        self._attempts = OrderedDict()
+        self._prefixes = OrderedDict()
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _cached_tokens(self, messages):
+        """Tokens of the longest cacheable prompt prefix sent before; remembers this prompt's."""
+        hasher = hashlib.sha256()
+        digests = []
+        text = ''.join(f"{m['role']}: {m['content']}\n" for m in messages)
+        for count, token in enumerate(_TOKEN_RE.findall(text), 1):
+            hasher.update(token.encode() + b'\0')
+            if count >= _PREFIX_CACHE_MIN_TOKENS and count % _PREFIX_CACHE_STEP_TOKENS == 0:
+                digests.append((count, hasher.hexdigest()))
+        with self._lock:
+            cached = max((count for count, digest in digests if digest in self._prefixes), default=0)
+            for _, digest in digests:
+                self._prefixes[digest] = None
+                self._prefixes.move_to_end(digest)
+            while len(self._prefixes) > _PREFIX_CACHE_MAX_ENTRIES:
+                self._prefixes.popitem(last=False)
+        return cached
+
+    def _plan(self, request):
+        """What one call returns and when: ``(wait, error, content, usage)``."""
+        from app.services.openai_service import estimate_tokens
+
+        body = {k: v for k, v in request.items() if k not in _TRANSPORT_ARGS}
+        digest = hashlib.sha256(json.dumps(body, sort_keys=True, default=str).encode()).hexdigest()
+        with self._lock:
+            self.calls.append(request)
+            attempt = self._attempts.pop(digest, 0)
+            self._attempts[digest] = attempt + 1
+            if len(self._attempts) > self.history:
+                self._attempts.popitem(last=False)
+        rng = random.Random(f'{self.seed}:{digest}:{attempt}')
+        first_token = self.latency * math.exp(rng.gauss(0, self.sigma)) if self.sigma else self.latency
+        failed = rng.random() < self.error_rate
+
+        content = fake_reply(request)
+        usage = {
+            'prompt_tokens': sum(estimate_tokens(m['content']) for m in request['messages']),
+            'completion_tokens': estimate_tokens(content),
+            'prompt_tokens_details': {'cached_tokens': self._cached_tokens(request['messages'])},
+        }
+        usage['total_tokens'] = usage['prompt_tokens'] + usage['completion_tokens']
+
+        wait = first_token if request.get('stream') else first_token + self.token_delay * usage['completion_tokens']
+        error = _status_error(self.error_status) if failed else None
+        timeout = request.get('timeout')
+        if isinstance(timeout, (int, float)) and wait > timeout:
+            wait, error = timeout, openai.APITimeoutError(request=_HTTP_REQUEST)
+        return wait, error, content, usage
+
+    def _completion(self, content, usage):
+        return ChatCompletion.model_validate({
+            'id': 'fake-completion', 'object': 'chat.completion', 'created': int(time.time()), 'model': self.model,
+            'choices': [{'index': 0, 'finish_reason': 'stop', 'message': {'role': 'assistant', 'content': content}}],
+            'usage': usage,
+        })
+
+    def _chunks(self, content, usage):
+        created = int(time.time())
+        for piece in _PIECE_RE.findall(content):
+            yield ChatCompletionChunk.model_validate({
+                'id': 'fake-completion', 'object': 'chat.completion.chunk', 'created': created, 'model': self.model,
+                'choices': [{'index': 0, 'delta': {'content': piece}, 'finish_reason': None}],
+            })
+        yield ChatCompletionChunk.model_validate({
+            'id': 'fake-completion', 'object': 'chat.completion.chunk', 'created': created, 'model': self.model,
+            'choices': [], 'usage': usage,
+        })
+
+    def _create(self, **request):
+        wait, error, content, usage = self._plan(request)
+        time.sleep(wait)
+        if error is not None:
+            raise error
+        if request.get('stream'):
+            return self._stream(content, usage)
+        return self._completion(content, usage)
+
+    def _stream(self, content, usage):
+        for chunk in self._chunks(content, usage):
+            if chunk.choices:
+                time.sleep(self.token_delay)
+            yield chunk
+
+
+class AsyncFakeLLM(FakeLLM):
+    """``FakeLLM`` with the AsyncOpenAI interface; waits without blocking the loop."""
+
+    async def _create(self, **request):
+        wait, error, content, usage = self._plan(request)
+        await asyncio.sleep(wait)
+        if error is not None:
+            raise error
+        if request.get('stream'):
+            return self._stream(content, usage)
+        return self._completion(content, usage)
+
+    async def _stream(self, content, usage):
+        for chunk in self._chunks(content, usage):
+            if chunk.choices:
+                await asyncio.sleep(self.token_delay)
+            yield chunk
@@ -0,0 +1,127 @@
+"""Incremental reader for JSON documents shaped like the data export.
+
+The top-level object is walked key by key; array values are yielded one
+element at a time, so memory stays bounded by the largest single record
+rather than the size of the file.
+"""
+import codecs
+import json
+import re
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    def __init__(self, fp, max_value_chars, chunk_size):
+        self.fp = fp
+        self.max_value_chars = max_value_chars
+        self.chunk_size = chunk_size
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.bytes_read = 0
+
+    def _fill(self):
+        chunk = self.fp.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+        self.bytes_read += len(chunk)
+        try:
+            text = self.text_decoder.decode(chunk, final=self.eof)
+        except UnicodeDecodeError:
+            raise ValueError('File is not valid UTF-8')
+        self.buf = self.buf[self.pos:] + text
+        self.pos = 0
+
+    def _skip_whitespace(self):
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or self.eof:
+                return
+            self._fill()
+
+    def next_char(self):
+        self._skip_whitespace()
+        if self.pos >= len(self.buf):
+            raise ValueError('Unexpected end of file')
+        char = self.buf[self.pos]
+        self.pos += 1
+        return char
+
+    def peek_char(self):
+        self._skip_whitespace()
+        return self.buf[self.pos] if self.pos < len(self.buf) else ''
+
+    def expect(self, expected):
+        char = self.next_char()
+        if char != expected:
+            raise ValueError(f'Malformed JSON: expected {expected!r}')
+
+    def value(self):
+        self._skip_whitespace()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                obj, end = None, None
+            # A value touching the end of the buffer (e.g. a number) may be cut short
+            complete = end is not None and (end < len(self.buf) or self.eof)
+            if (end if complete else len(self.buf)) - self.pos > self.max_value_chars:
+                raise ValueError('Record exceeds the maximum allowed size')
+            if complete:
+                self.pos = end
+                return obj
+            if self.eof:
+                raise ValueError('Malformed JSON')
+            self._fill()
+
+    def at_end(self):
+        self._skip_whitespace()
+        return self.pos >= len(self.buf) and self.eof
+
+
+def iter_events(fp, max_value_chars=1024 * 1024, chunk_size=64 * 1024):
+    """Yield ``(event, key, value)`` tuples from a top-level JSON object.
+
+    Events are ``'value'`` for non-array members, ``'start'`` when an array
+    member opens and ``'item'`` for each of its elements. Raises ValueError on
+    malformed input or when a single value exceeds ``max_value_chars``.
+    """
+    reader = _Reader(fp, max_value_chars, chunk_size)
+    reader.expect('{')
+
+    if reader.peek_char() == '}':
+        reader.next_char()
+    else:
+        while True:
+            key = reader.value()
+            if not isinstance(key, str):
+                raise ValueError('Malformed JSON: object keys must be strings')
+            reader.expect(':')
+
+            if reader.peek_char() == '[':
+                reader.next_char()
+                yield 'start', key, None
+                if reader.peek_char() == ']':
+                    reader.next_char()
+                else:
+                    while True:
+                        yield 'item', key, reader.value()
+                        char = reader.next_char()
+                        if char == ']':
+                            break
+                        if char != ',':
+                            raise ValueError('Malformed JSON: expected "," or "]"')
+            else:
+                yield 'value', key, reader.value()
+
+            char = reader.next_char()
+            if char == '}':
+                break
+            if char != ',':
+                raise ValueError('Malformed JSON: expected "," or "}"')
+
+    if not reader.at_end():
+        raise ValueError('Malformed JSON: trailing data')
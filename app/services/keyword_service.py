@@ -0,0 +1,111 @@
+import json
+
+from app.database import in_clause
+
+# Source column per resource; job analyses keep theirs as a JSON list
+KEYWORD_SOURCES = {
+    'experiences': 'keywords',
+    'projects': 'keywords',
+    'job_analyses': 'extracted_keywords',
+}
+MATCHED_RESOURCES = ('experiences', 'projects')
+MAX_KEYWORD_LENGTH = 100
+
+
+def normalize_keyword(term):
+    """Lowercase, collapse whitespace and trim punctuation; '' if nothing is left."""
+    term = ' '.join(str(term).lower().split()).strip(' .,;:')
+    return term[:MAX_KEYWORD_LENGTH]
+
+
+def parse_keywords(resource, value):
+    """Split a stored keyword column into distinct normalized terms, in order."""
+    if not value:
+        return []
+    if resource == 'job_analyses':
+        try:
+            items = json.loads(value)
+        except (TypeError, ValueError):
+            return []
+        if not isinstance(items, list):
+            return []
+        items = [i for i in items if isinstance(i, str)]
+    else:
+        items = value.split(',')
+    terms = (normalize_keyword(i) for i in items)
+    return list(dict.fromkeys(t for t in terms if t))
+
+
+def index_keywords(db, user_id, resource, row_ids=None):
+    """Re-derive item_keywords for the user's rows of ``resource``.
+
+    Reads the rows back, so it must run inside the transaction that wrote
+    them. ``row_ids`` limits the work to those rows; None reindexes all of
+    the user's rows.
+    """
+    column = KEYWORD_SOURCES[resource]
+    clause, params = in_clause('id', row_ids)
+    rows = db.execute(
+        f'SELECT id, {column} AS value FROM {resource} WHERE user_id = ?{clause}',
+        (user_id, *params),
+    ).fetchall()
+
+    clause, params = in_clause('row_id', row_ids)
+    db.execute(
+        f'DELETE FROM item_keywords WHERE user_id = ? AND resource = ?{clause}',
+        (user_id, resource, *params),
+    )
+
+    terms_by_row = {r['id']: parse_keywords(resource, r['value']) for r in rows}
+    vocabulary = list({t for terms in terms_by_row.values() for t in terms})
+    if not vocabulary:
+        return
+    db.executemany('INSERT OR IGNORE INTO keywords (term) VALUES (?)', [(t,) for t in vocabulary])
+    keyword_ids = dict(db.execute(
+        f'SELECT term, id FROM keywords WHERE term IN ({", ".join("?" * len(vocabulary))})', vocabulary
+    ).fetchall())
+    db.executemany(
+        'INSERT INTO item_keywords (user_id, resource, row_id, keyword_id) VALUES (?, ?, ?, ?)',
+        [
+            (user_id, resource, row_id, keyword_ids[t])
+            for row_id, terms in terms_by_row.items()
+            for t in terms
+        ],
+    )
+
+
+def rebuild_keyword_index(db):
+    """Reindex every user's keywords from the source columns."""
+    for resource in KEYWORD_SOURCES:
+        user_ids = [r[0] for r in db.execute(f'SELECT DISTINCT user_id FROM {resource}')]
+        for user_id in user_ids:
+            index_keywords(db, user_id, resource)
+
+
+def keyword_overlap(db, user_id, analysis_id):
+    """Keywords an analysis shares with each of the user's experiences and projects.
+
+    Returns ``{resource: [{'id', 'matches', 'keywords'}]}`` with the best
+    matching rows first; rows with no shared keyword are left out.
+    """
+    rows = db.execute(
+        'SELECT m.resource, m.row_id AS id, COUNT(*) AS matches, json_group_array(k.term) AS keywords '
+        'FROM item_keywords a '
+        # CROSS JOIN pins the loop order: the analysis's few keywords drive the lookup
+        'CROSS JOIN item_keywords m ON m.user_id = a.user_id AND m.keyword_id = a.keyword_id '
+        f'AND m.resource IN ({", ".join("?" * len(MATCHED_RESOURCES))}) '
+        'JOIN keywords k ON k.id = a.keyword_id '
+        "WHERE a.resource = 'job_analyses' AND a.row_id = ? AND a.user_id = ? "
+        'GROUP BY m.resource, m.row_id '
+        'ORDER BY matches DESC, m.row_id',
+        (*MATCHED_RESOURCES, analysis_id, user_id),
+    ).fetchall()
+
+    overlap = {resource: [] for resource in MATCHED_RESOURCES}
+    for r in rows:
+        overlap[r['resource']].append({
+            'id': r['id'],
+            'matches': r['matches'],
+            'keywords': sorted(json.loads(r['keywords'])),
+        })
+    return overlap
@@ -65,7 +65,7 @@ def _build_template_context(user_id, template_name):
 
     # Experiences by category
     experiences = db.execute(
-        'SELECT * FROM experiences WHERE user_id = ? ORDER BY sort_order, id',
+        'SELECT * FROM experiences WHERE user_id = ? ORDER BY sort_key, id',
         (user_id,),
     ).fetchall()
     work = [dict(e) for e in experiences if e['category'] == 'work']
@@ -74,7 +74,7 @@ def _build_template_context(user_id, template_name):
 
     # Projects
     projects = db.execute(
-        'SELECT * FROM projects WHERE user_id = ? ORDER BY sort_order, id',
+        'SELECT * FROM projects WHERE user_id = ? ORDER BY sort_key, id',
         (user_id,),
     ).fetchall()
     projects_list = [dict(p) for p in projects]
@@ -99,22 +99,22 @@ def _build_template_context(user_id, template_name):
     safe_work = []
     for w in work:
         safe_work.append({k: sanitize_latex(v) for k, v in w.items()
-                          if k not in ('id', 'user_id', 'created_at', 'updated_at', 'sort_order')})
+                          if k not in ('id', 'user_id', 'created_at', 'updated_at', 'sort_order', 'sort_key')})
 
     safe_education = []
     for e in education:
         safe_education.append({k: sanitize_latex(v) for k, v in e.items()
-                               if k not in ('id', 'user_id', 'created_at', 'updated_at', 'sort_order')})
+                               if k not in ('id', 'user_id', 'created_at', 'updated_at', 'sort_order', 'sort_key')})
 
     safe_hobbies = []
     for h in hobbies:
         safe_hobbies.append({k: sanitize_latex(v) for k, v in h.items()
-                             if k not in ('id', 'user_id', 'created_at', 'updated_at', 'sort_order')})
+                             if k not in ('id', 'user_id', 'created_at', 'updated_at', 'sort_order', 'sort_key')})
 
     safe_projects = []
     for p in projects_list:
         safe_projects.append({k: sanitize_latex(v) for k, v in p.items()
-                              if k not in ('id', 'user_id', 'created_at', 'updated_at', 'sort_order')})
+                              if k not in ('id', 'user_id', 'created_at', 'updated_at', 'sort_order', 'sort_key')})
 
     safe_blurbs = {}
     for key, texts in blurb_map.items():
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import time
+
+from flask import current_app
+
+from app.database import get_db, read_transaction, write_transaction
+
+
+def cache_key(kind, version, request):
+    """Hash of everything that shapes a completion: the call kind, its prompt
+    template version and the request (model, temperature, messages, ...)."""
+    payload = json.dumps([kind, version, request], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def cache_enabled(user_id):
+    """Whether the cache serves and stores this user's completions."""
+    if not current_app.config['LLM_CACHE']:
+        return False
+    row = get_db().execute(
+        'SELECT llm_cache_enabled FROM user_settings WHERE user_id = ?', (user_id,)
+    ).fetchone()
+    return row is not None and bool(row['llm_cache_enabled'])
+
+
+def lookup(user_id, keys):
+    """Cached responses for ``keys``, with None where there is no live entry.
+
+    Hits are counted and marked as recently used; a lookup that misses
+    takes no write lock.
+    """
+    if not keys:
+        return []
+    now = time.time()
+    placeholders = ', '.join('?' * len(keys))
+    with read_transaction() as db:
+        rows = db.execute(
+            f'SELECT id, cache_key, response FROM llm_cache '
+            f'WHERE user_id = ? AND cache_key IN ({placeholders}) AND created_at > ?',
+            (user_id, *keys, now - current_app.config['LLM_CACHE_TTL']),
+        ).fetchall()
+    if rows:
+        with write_transaction() as db:
+            db.executemany(
+                'UPDATE llm_cache SET hits = hits + 1, last_used_at = ? WHERE id = ?',
+                [(now, r['id']) for r in rows],
+            )
+    found = {r['cache_key']: r['response'] for r in rows}
+    return [found.get(k) for k in keys]
+
+
+def store(user_id, kind, entries):
+    """Save ``(key, response, prompt_tokens, completion_tokens)`` entries.
+
+    Expired entries are dropped, then the least recently used ones beyond
+    LLM_CACHE_MAX_ENTRIES.
+    """
+    if not entries:
+        return
+    now = time.time()
+    with write_transaction() as db:
+        db.executemany(
+            'INSERT INTO llm_cache (user_id, cache_key, kind, response, prompt_tokens, completion_tokens, '
+            'created_at, last_used_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT (user_id, cache_key) DO UPDATE SET response = excluded.response, '
+            'prompt_tokens = excluded.prompt_tokens, completion_tokens = excluded.completion_tokens, '
+            'created_at = excluded.created_at, last_used_at = excluded.last_used_at',
+            [(user_id, key, kind, response, prompt, completion, now, now)
+             for key, response, prompt, completion in entries],
+        )
+        db.execute(
+            'DELETE FROM llm_cache WHERE created_at <= ?', (now - current_app.config['LLM_CACHE_TTL'],)
+        )
+        db.execute(
+            'DELETE FROM llm_cache WHERE id IN ('
+            '  SELECT id FROM llm_cache ORDER BY last_used_at DESC, id DESC LIMIT -1 OFFSET ?'
+            ')',
+            (current_app.config['LLM_CACHE_MAX_ENTRIES'],),
+        )
+
+
+def clear(db, user_id):
+    db.execute('DELETE FROM llm_cache WHERE user_id = ?', (user_id,))
+
+
+def cache_report(db):
+    """Per call kind: calls recorded, how many the cache served, and the
+    live entries with the tokens their hits saved."""
+    calls = {r['kind']: dict(r) for r in db.execute(
+        'SELECT kind, COUNT(*) AS calls, SUM(cache_hit) AS cache_hits FROM prompt_metrics GROUP BY kind'
+    )}
+    entries = {r['kind']: dict(r) for r in db.execute(
+        'SELECT kind, COUNT(*) AS entries, SUM(hits) AS hits, '
+        'SUM(hits * (prompt_tokens + completion_tokens)) AS tokens_saved FROM llm_cache GROUP BY kind'
+    )}
+    report = []
+    for kind in sorted(calls.keys() | entries.keys()):
+        c = calls.get(kind, {})
+        e = entries.get(kind, {})
+        n = c.get('calls') or 0
+        hits = c.get('cache_hits') or 0
+        report.append({
+            'kind': kind,
+            'calls': n,
+            'cache_hits': hits,
+            'hit_rate': hits / n if n else None,
+            'entries': e.get('entries') or 0,
+            'entry_hits': e.get('hits') or 0,
+            'tokens_saved': e.get('tokens_saved') or 0,
+        })
+    return report
@@ -0,0 +1,60 @@
+from flask import current_app
+from openai import AsyncOpenAI, OpenAI
+
+from app.services.fake_llm import AsyncFakeLLM, FakeLLM
+
+
+class OpenAIProvider:
+    """OpenAI, or any OpenAI-compatible server at LLM_BASE_URL (vLLM,
+    llama.cpp, Ollama, ...). Without LLM_BASE_URL the client falls back to
+    the OPENAI_BASE_URL environment variable, then to api.openai.com."""
+
+    name = 'openai'
+    needs_api_key = True
+
+    def __init__(self, config):
+        self.settings = (config['LLM_BASE_URL'],)
+
+    def client(self, api_key, is_async=False):
+        client_class = AsyncOpenAI if is_async else OpenAI
+        # Retries are left to CallPolicy, which knows the request's deadline
+        return client_class(api_key=api_key, base_url=self.settings[0], max_retries=0)
+
+
+class FakeProvider:
+    """Offline ``FakeLLM`` clients shaped by the LLM_FAKE_* settings; needs no API key."""
+
+    name = 'fake'
+    needs_api_key = False
+
+    def __init__(self, config):
+        self.options = {
+            'latency': config['LLM_FAKE_LATENCY'],
+            'sigma': config['LLM_FAKE_LATENCY_SIGMA'],
+            'token_delay': config['LLM_FAKE_TOKEN_DELAY'],
+            'error_rate': config['LLM_FAKE_ERROR_RATE'],
+            'error_status': config['LLM_FAKE_ERROR_STATUS'],
+            'seed': config['LLM_FAKE_SEED'],
+            'model': config['LLM_MODEL'],
+        }
+        self.settings = tuple(sorted(self.options.items()))
+
+    def client(self, api_key, is_async=False):
+        return (AsyncFakeLLM if is_async else FakeLLM)(**self.options)
+
+
+PROVIDERS = {'openai': OpenAIProvider, 'fake': FakeProvider}
+
+
+def validate_provider(config):
+    """Refuse to start with an unknown LLM_PROVIDER, rather than failing
+    every model call."""
+    name = config['LLM_PROVIDER']
+    if name not in PROVIDERS:
+        raise ValueError(f'Unknown LLM_PROVIDER {name!r}; expected one of {", ".join(PROVIDERS)}')
+
+
+def get_provider():
+    """The provider named by LLM_PROVIDER, checked by ``validate_provider``
+    when the app started."""
+    return PROVIDERS[current_app.config['LLM_PROVIDER']](current_app.config)
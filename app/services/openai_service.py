@@ -1,23 +1,188 @@
+import asyncio
+import hashlib
 import json
+import math
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import asynccontextmanager, contextmanager
 
-from openai import OpenAI
+from flask import current_app
 
-from app.database import get_db
+from app.database import get_db, write_transaction
+from app.services import async_service, llm_cache_service, usage_service
 from app.services.crypto_service import decrypt_api_key
+from app.services.json_stream import iter_events
+from app.services.llm_provider_service import get_provider
+from app.services.resilience_service import CallPolicy, LLMBadResponse
+from app.services.scoring_service import score_items
+
+# Bump a kind's version whenever its prompt wording changes, so cached
+# completions of the old prompt stop matching
+PROMPT_VERSIONS = {'analyze': 2, 'blurbs': 2, 'summary': 1}
+PROMPT_ARMS = ('pruned', 'full')
+_TOKEN_PIECE_RE = re.compile(r'\w+|[^\w\s]')
+_PARAGRAPH_RE = re.compile(r'\n\s*\n')
+_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+|\n')
+
+
+# Live clients keyed by (user_id, provider, sync/async, fingerprint of the key
+# and provider settings), least recently used first. Reusing a client keeps its
+# HTTP connection pool, so keep-alive connections and TLS sessions carry over
+# between a user's calls.
+_clients = OrderedDict()
+_clients_lock = threading.Lock()
+
+
+def _cached_client(user_id, is_async):
+    provider = get_provider()
+    secret, stored = b'', False
+    if provider.needs_api_key:
+        row = get_db().execute(
+            'SELECT openai_api_key_enc FROM user_settings WHERE user_id = ?',
+            (user_id,),
+        ).fetchone()
+        stored = row is not None and row['openai_api_key_enc'] is not None
+        if stored:
+            secret = row['openai_api_key_enc']
+        elif current_app.config['LLM_API_KEY']:
+            # Server-wide key, e.g. for a local OpenAI-compatible server
+            secret = current_app.config['LLM_API_KEY'].encode()
+        else:
+            raise ValueError('OpenAI API key not configured. Set it in Settings.')
+
+    # Fingerprint the stored ciphertext, so a hit needs no decryption
+    fingerprint = hashlib.sha256(secret + repr(provider.settings).encode()).hexdigest()
+    cache_key = (user_id, provider.name, is_async, fingerprint)
+    now = time.monotonic()
+    with _clients_lock:
+        entry = _clients.get(cache_key)
+        if entry is not None and now - entry[1] < current_app.config['OPENAI_CLIENT_TTL']:
+            _clients.move_to_end(cache_key)
+            return entry[0]
+
+    api_key = decrypt_api_key(secret) if stored else secret.decode() or None
+    client = provider.client(api_key, is_async)
+    with _clients_lock:
+        # Drop any client of this kind built from an older key or settings
+        for key in [k for k in _clients if k[:3] == cache_key[:3]]:
+            del _clients[key]
+        _clients[cache_key] = (client, now)
+        # Evicted clients are left to the garbage collector rather than closed,
+        # as another request may still be using one
+        while len(_clients) > current_app.config['OPENAI_CLIENT_CACHE_SIZE']:
+            _clients.popitem(last=False)
+    return client
 
 
 def _get_client(user_id):
-    db = get_db()
-    row = db.execute(
-        'SELECT openai_api_key_enc FROM user_settings WHERE user_id = ?',
-        (user_id,),
-    ).fetchone()
+    """The user's client for the configured LLM_PROVIDER."""
+    return _cached_client(user_id, is_async=False)
+
+
+def _get_async_client(user_id):
+    """The user's async client, for coroutines on the shared event loop."""
+    return _cached_client(user_id, is_async=True)
+
+
+class _Waiter:
+    """A call queued for a slot; ``handed`` once a finishing call passed it its slot."""
+
+    def __init__(self, wake):
+        self.wake = wake
+        self.handed = False
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class _UserSlots:
+    """Per-user cap on concurrent model calls, shared by all of that user's
+    requests: blocking calls on worker threads and coroutines on the event
+    loop take their slots from the same count.
+
+    A user's entry exists only while they have calls in flight, so idle
+    users cost nothing. Waiters are served first come, first served.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.users = {}  # user_id -> [calls in flight, deque of waiters]
+
+    def _take(self, user_id, limit, waiter):
+        """Take a free slot, or queue ``waiter`` for one. Call with the lock held."""
+        entry = self.users.setdefault(user_id, [0, deque()])
+        if entry[0] < limit and not entry[1]:
+            entry[0] += 1
+            return True
+        entry[1].append(waiter)
+        return False
+
+    def _release(self, user_id):
+        with self.lock:
+            entry = self.users[user_id]
+            if entry[1]:
+                # The slot passes straight to the next waiter
+                waiter = entry[1].popleft()
+                waiter.handed = True
+            else:
+                waiter = None
+                entry[0] -= 1
+                if not entry[0]:
+                    del self.users[user_id]
+        if waiter is not None:
+            waiter.wake()
 
-    if row is None or row['openai_api_key_enc'] is None:
-        raise ValueError('OpenAI API key not configured. Set it in Settings.')
+    @contextmanager
+    def hold(self, user_id, limit):
+        """Hold one of the user's slots on this thread, waiting for one if need be."""
+        woken = threading.Event()
+        with self.lock:
+            taken = self._take(user_id, limit, _Waiter(woken.set))
+        if not taken:
+            woken.wait()
+        try:
+            yield
+        finally:
+            self._release(user_id)
 
-    api_key = decrypt_api_key(row['openai_api_key_enc'])
-    return OpenAI(api_key=api_key)
+    @asynccontextmanager
+    async def hold_async(self, user_id, limit):
+        """Like ``hold``, but waits on the running event loop."""
+        loop = asyncio.get_running_loop()
+        woken = loop.create_future()
+        waiter = _Waiter(lambda: loop.call_soon_threadsafe(_resolve, woken))
+        with self.lock:
+            taken = self._take(user_id, limit, waiter)
+        if not taken:
+            try:
+                await woken
+            except asyncio.CancelledError:
+                with self.lock:
+                    handed = waiter.handed
+                    if not handed:
+                        self.users[user_id][1].remove(waiter)
+                if handed:
+                    self._release(user_id)
+                raise
+        try:
+            yield
+        finally:
+            self._release(user_id)
+
+
+_user_slots = _UserSlots()
+
+
+def invalidate_client(user_id):
+    """Forget the user's cached client, e.g. after their API key changed."""
+    with _clients_lock:
+        for key in [k for k in _clients if k[0] == user_id]:
+            del _clients[key]
 
 
 def _get_user_data(user_id):
@@ -30,12 +195,12 @@ def _get_user_data(user_id):
 
     experiences = db.execute(
         'SELECT category, title, organization, start_date, end_date, description, keywords '
-        'FROM experiences WHERE user_id = ? ORDER BY sort_order',
+        'FROM experiences WHERE user_id = ? ORDER BY sort_key, id',
         (user_id,),
     ).fetchall()
 
     projects = db.execute(
-        'SELECT title, description, keywords FROM projects WHERE user_id = ? ORDER BY sort_order',
+        'SELECT title, description, keywords FROM projects WHERE user_id = ? ORDER BY sort_key, id',
         (user_id,),
     ).fetchall()
 
@@ -46,9 +211,516 @@ def _get_user_data(user_id):
     }
 
 
-def analyze_job(user_id, job_description):
-    client = _get_client(user_id)
+def estimate_tokens(text):
+    """Approximate the model's token count for ``text`` without a tokenizer.
+
+    Words count one token per five characters (at least one) and each
+    punctuation mark one; close enough to BPE counts on English for budgeting.
+    """
+    return sum(math.ceil(len(piece) / 5) for piece in _TOKEN_PIECE_RE.findall(text or ''))
+
+
+class TokenBudget:
+    """Token usage of one logical request, summed over all of its model calls."""
+
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+
+    def record(self, response):
+        usage = getattr(response, 'usage', None)
+        if usage is not None:
+            self.prompt_tokens += usage.prompt_tokens or 0
+            self.completion_tokens += usage.completion_tokens or 0
+            self.cached_tokens += cached_prompt_tokens(usage)
+        return response
+
+    @property
+    def total_tokens(self):
+        return self.prompt_tokens + self.completion_tokens
+
+    def as_dict(self):
+        return {
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'total_tokens': self.total_tokens,
+            'cached_tokens': self.cached_tokens,
+        }
+
+
+def cached_prompt_tokens(usage):
+    """Prompt tokens the provider served from its prompt prefix cache."""
+    details = getattr(usage, 'prompt_tokens_details', None)
+    return (details and details.cached_tokens) or 0
+
+
+def split_into_chunks(text, max_tokens):
+    """Split text into pieces of at most ``max_tokens`` estimated tokens.
+
+    Breaks at paragraphs, then sentences, then words, so chunks end on the
+    most natural boundary that fits.
+    """
+    def pieces(block, splitters):
+        if estimate_tokens(block) <= max_tokens or not splitters:
+            return [block]
+        parts = [p for p in splitters[0](block) if p.strip()]
+        return [piece for part in parts for piece in pieces(part, splitters[1:])]
+
+    splitters = (_PARAGRAPH_RE.split, _SENTENCE_RE.split, str.split)
+    chunks, current, used = [], [], 0
+    for piece in pieces(text, splitters):
+        cost = estimate_tokens(piece)
+        if current and used + cost > max_tokens:
+            chunks.append(' '.join(current))
+            current, used = [], 0
+        current.append(piece.strip())
+        used += cost
+    if current:
+        chunks.append(' '.join(current))
+    return chunks
+
+
+def _cache_entry(key, response):
+    """``llm_cache_service.store`` entry for a completion response."""
+    usage = getattr(response, 'usage', None)
+    return (
+        key, response.choices[0].message.content,
+        (usage and usage.prompt_tokens) or 0, (usage and usage.completion_tokens) or 0,
+    )
+
+
+class _MeteredCall:
+    """One model call under the user's token quota, metered to llm_usage.
+
+    Entering checks the quota against the request's estimated prompt
+    tokens. Set ``response`` inside the block; leaving records it, or the
+    error that ended the block. A ``streaming`` call is recorded by calling
+    ``finish`` once its stream has ended.
+    """
+
+    def __init__(self, app, user_id, kind, request, streaming=False):
+        self.app = app
+        self.user_id = user_id
+        self.kind = kind
+        self.model = request.get('model', app.config['LLM_MODEL'])
+        self.reserved = sum(estimate_tokens(m['content']) for m in request['messages'])
+        self.streaming = streaming
+        self.response = None
+
+    def __enter__(self):
+        usage_service.reserve(self.app, self.user_id, self.kind, self.model, self.reserved)
+        self.started = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.finish(error=exc)
+        elif not self.streaming:
+            usage = getattr(self.response, 'usage', None)
+            self.finish(
+                (usage and usage.prompt_tokens) or 0, (usage and usage.completion_tokens) or 0,
+                cached_prompt_tokens(usage),
+            )
+
+    def finish(self, prompt_tokens=0, completion_tokens=0, cached_tokens=0, error=None):
+        usage_service.settle(self.app, self.user_id, self.reserved, prompt_tokens + completion_tokens)
+        usage_service.record(
+            self.app, self.user_id, self.kind, self.model, prompt_tokens, completion_tokens, cached_tokens,
+            latency=time.monotonic() - self.started,
+            outcome='ok' if error is None else usage_service.outcome(error),
+        )
+
+
+def _record_cache_hits(user_id, kind, requests):
+    """Meter requests the response cache answered; they cost no tokens."""
+    app = current_app._get_current_object()
+    for request in requests:
+        usage_service.record(app, user_id, kind, request['model'], cache_hit=True)
+
+
+# Model calls are written as generators of steps: each ``yield`` hands the
+# driver ``(kind, requests, workers)`` and receives the responses in order, and
+# everything between yields is local or database work. ``_run`` drives them
+# with blocking calls on worker threads, ``_run_async`` with coroutines; both
+# make each call under the request's CallPolicy and the user's token quota,
+# and meter it.
+
+def parse_json_object(content):
+    """The JSON object a JSON-mode reply holds; raises ValueError otherwise."""
+    value = json.loads(content)
+    if not isinstance(value, dict):
+        raise ValueError(f'expected a JSON object, got {type(value).__name__}')
+    return value
+
+
+def _parses(content):
+    try:
+        parse_json_object(content)
+    except ValueError:
+        return False
+    return True
+
+
+def _complete_steps(user_id, kind, requests, budget=None, bypass_cache=False, workers=1, parse=None):
+    """Run chat completions through the response cache.
+
+    ``requests`` are keyword arguments for ``chat.completions.create``
+    without the model. Cached answers are used unless ``bypass_cache`` is
+    set; the rest are requested, up to ``workers`` at a time, and stored.
+    Usage of the calls actually made is added to ``budget``. Returns
+    ``(contents, hits)``: the replies in order and how many were cached.
+
+    With ``parse`` each reply is passed through it, and only replies it
+    accepts are cached. One it rejects with ValueError raises LLMBadResponse.
+    """
+    requests = [{'model': current_app.config['LLM_MODEL'], **r} for r in requests]
+    use_cache = llm_cache_service.cache_enabled(user_id)
+    keys = [llm_cache_service.cache_key(kind, PROMPT_VERSIONS[kind], r) for r in requests]
+    if use_cache and not bypass_cache:
+        contents = llm_cache_service.lookup(user_id, keys)
+    else:
+        contents = [None] * len(requests)
+    if parse is not None:
+        for i, content in enumerate(contents):
+            if content is None:
+                continue
+            try:
+                contents[i] = parse(content)
+            except ValueError:
+                # Stored before replies were checked; ask again and overwrite it
+                contents[i] = None
+    missing = [i for i, content in enumerate(contents) if content is None]
+    hits = len(requests) - len(missing)
+    _record_cache_hits(user_id, kind, [r for r, content in zip(requests, contents) if content is not None])
+    if not missing:
+        usage_service.maybe_flush()
+        return contents, hits
+
+    responses = yield kind, [requests[i] for i in missing], workers
+    usage_service.maybe_flush()
+
+    entries, error = [], None
+    for i, response in zip(missing, responses):
+        entry = _cache_entry(keys[i], response)
+        if budget is not None:
+            budget.record(response)
+        if parse is None:
+            contents[i] = entry[1]
+        else:
+            try:
+                contents[i] = parse(entry[1])
+            except ValueError as e:
+                error = error or LLMBadResponse(f'The model returned a malformed answer ({e}), please retry')
+                continue
+        entries.append(entry)
+    if use_cache and entries:
+        llm_cache_service.store(user_id, kind, entries)
+    if error is not None:
+        raise error
+    return contents, hits
+
+
+def _run(client, user_id, steps, policy):
+    """Drive ``steps`` with blocking calls; returns the generator's result."""
+    app = current_app._get_current_object()
+    limit = app.config['LLM_USER_CONCURRENCY']
+
+    def call(kind, request):
+        with _user_slots.hold(user_id, limit), _MeteredCall(app, user_id, kind, request) as metered:
+            metered.response = policy.complete(client, kind, request)
+        return metered.response
+
+    responses = None
+    while True:
+        try:
+            kind, requests, workers = steps.send(responses)
+        except StopIteration as stop:
+            return stop.value
+        if len(requests) > 1 and workers > 1:
+            # Worker threads only talk to the API; cache reads and writes stay here
+            with ThreadPoolExecutor(max_workers=min(len(requests), workers)) as pool:
+                responses = list(pool.map(lambda r: call(kind, r), requests))
+        else:
+            responses = [call(kind, r) for r in requests]
+
+
+async def _run_async(app, client, user_id, steps, policy):
+    """Drive ``steps`` on the event loop with an AsyncOpenAI ``client``.
+
+    Calls run as coroutines, at most LLM_USER_CONCURRENCY at a time for the
+    user; the database work between them runs in an app context off the loop.
+    """
+    limit = app.config['LLM_USER_CONCURRENCY']
+
+    async def call(kind, request):
+        async with _user_slots.hold_async(user_id, limit):
+            with _MeteredCall(app, user_id, kind, request) as metered:
+                metered.response = await policy.complete_async(client, kind, request)
+            return metered.response
+
+    def advance(responses):
+        try:
+            return False, steps.send(responses)
+        except StopIteration as stop:
+            return True, stop.value
+
+    done, value = await async_service.in_app(app, advance, None)
+    while not done:
+        kind, requests, _ = value
+        responses = await asyncio.gather(*(call(kind, r) for r in requests))
+        done, value = await async_service.in_app(app, advance, responses)
+    return value
+
+
+def _summary_request(text, max_tokens):
+    return {
+        'messages': [
+            {"role": "system", "content": (
+                "You condense parts of job postings. Keep every requirement, skill, technology, "
+                "qualification, responsibility and detail about the role or company. Drop benefits, "
+                "legal boilerplate and application instructions. Reply with plain text only."
+            )},
+            {"role": "user", "content": text},
+        ],
+        'max_tokens': max_tokens,
+        'temperature': 0,
+    }
+
+
+def fit_job_description(client, user_id, job_description, budget, bypass_cache=False, deadline=None):
+    """Shrink a job description to JOB_DESCRIPTION_TOKEN_BUDGET estimated tokens.
+
+    Short descriptions pass through unchanged. Longer ones are split into
+    JOB_CHUNK_TOKENS chunks that are summarized in parallel (map); the joined
+    summaries are summarized again until they fit (reduce). Model usage is
+    added to ``budget``.
+    """
+    policy = CallPolicy(current_app.config, deadline)
+    return _run(client, user_id, _fit_steps(user_id, job_description, budget, bypass_cache), policy)
+
+
+def _fit_steps(user_id, job_description, budget, bypass_cache):
+    config = current_app.config
+    limit = config['JOB_DESCRIPTION_TOKEN_BUDGET']
+    text = job_description
+    for _ in range(config['JOB_REDUCE_ROUNDS']):
+        if estimate_tokens(text) <= limit:
+            return text
+        chunks = split_into_chunks(text, config['JOB_CHUNK_TOKENS'])
+        summaries, _ = yield from _complete_steps(
+            user_id, 'summary',
+            [_summary_request(chunk, config['JOB_SUMMARY_MAX_TOKENS']) for chunk in chunks],
+            budget, bypass_cache, workers=config['JOB_SUMMARY_WORKERS'],
+        )
+        text = '\n\n'.join(summary.strip() for summary in summaries)
+
+    # Summaries that still do not fit are cut rather than sent over budget
+    return split_into_chunks(text, limit)[0] if estimate_tokens(text) > limit else text
+
+
+def prompt_arm(user_id):
+    """A/B arm for a user: ``'full'`` for the control share, else ``'pruned'``.
+
+    Users are hashed into 100 buckets so the assignment is stable across calls.
+    """
+    if not current_app.config['PROMPT_PRUNING']:
+        return 'full'
+    bucket = (user_id * 2654435761) % 2 ** 32 % 100
+    return 'full' if bucket < current_app.config['PROMPT_PRUNING_CONTROL_PERCENT'] else 'pruned'
+
+
+def _select_items(query, items, costs, arm):
+    """Pick the items worth putting in a prompt.
+
+    Ranks ``items`` by local relevance to ``query`` and keeps the best ones,
+    up to PROMPT_MAX_ITEMS, while their prompt lines' estimated token
+    ``costs`` fit in PROMPT_ITEM_TOKEN_BUDGET. The full arm keeps
+    everything. Returns the kept indexes in their original order.
+    """
+    if arm == 'full' or not items:
+        return list(range(len(items)))
+
+    budget = current_app.config['PROMPT_ITEM_TOKEN_BUDGET']
+    max_items = current_app.config['PROMPT_MAX_ITEMS']
+    scores, _ = score_items(query, items)
+    ranked = sorted(range(len(items)), key=lambda i: -scores[i])
+
+    kept, used = [], 0
+    for i in ranked:
+        if len(kept) == max_items:
+            break
+        if used + costs[i] <= budget:
+            kept.append(i)
+            used += costs[i]
+    return sorted(kept)
+
+
+def _render_analyze_item(kind, item):
+    if kind == 'experience':
+        return (
+            f"- {item['title']} at {item['organization']} ({item['category']}): "
+            f"{item['description']} [Keywords: {item['keywords']}]\n"
+        )
+    return f"- {item['title']}: {item['description']} [Keywords: {item['keywords']}]\n"
+
+
+def _render_blurb_item(kind, item):
+    if kind == 'experience':
+        return f"- {item['title']} at {item['organization']}: {item['description']}\n"
+    return f"- {item['title']}: {item['description']}\n"
+
+
+# Per prompt kind: the heading of the candidate block and how one item is rendered
+_BACKGROUND_STYLES = {
+    'analyze': ('## Candidate Background', _render_analyze_item),
+    'blurbs': ('## Candidate', _render_blurb_item),
+}
+_BACKGROUND_RESOURCES = ('profile', 'experiences', 'projects')
+_backgrounds_lock = threading.Lock()
+
+
+def _background(user_id, kind):
+    """The user's background rendered for ``kind`` prompts.
+
+    Returns ``(header, items)``: the name and bio block, and a
+    ``(section, item, line, tokens)`` tuple per experience and project in
+    display order. Results are memoized on the app per version of the
+    user's profile, experiences and projects, so while those are unchanged
+    only resource_versions is read.
+    """
+    versions = dict(get_db().execute(
+        'SELECT resource, version FROM resource_versions WHERE user_id = ? AND resource IN (?, ?, ?)',
+        (user_id, *_BACKGROUND_RESOURCES),
+    ).fetchall())
+    key = (user_id, kind, tuple(versions.get(r, 0) for r in _BACKGROUND_RESOURCES))
+    memo = current_app.extensions.setdefault('prompt_backgrounds', OrderedDict())
+    with _backgrounds_lock:
+        if key in memo:
+            memo.move_to_end(key)
+            return memo[key]
+
     user_data = _get_user_data(user_id)
+    heading, render = _BACKGROUND_STYLES[kind]
+    profile = user_data['profile']
+    header = (
+        f"{heading}\n"
+        f"Name: {profile.get('first_name', '')} {profile.get('last_name', '')}\n"
+        f"Bio: {profile.get('bio', '')}\n\n"
+    )
+    items = [('experience', e) for e in user_data['experiences']]
+    items += [('project', p) for p in user_data['projects']]
+    lines = [render(section, item) for section, item in items]
+    value = (header, tuple(
+        (section, item, line, estimate_tokens(line)) for (section, item), line in zip(items, lines)
+    ))
+    with _backgrounds_lock:
+        for stale in [k for k in memo if k[:2] == key[:2]]:
+            del memo[stale]
+        memo[key] = value
+        while len(memo) > current_app.config['PROMPT_BACKGROUND_CACHE_SIZE']:
+            memo.popitem(last=False)
+    return value
+
+
+def _background_sections(user_id, query, kind):
+    """The candidate block of a ``kind`` prompt, pruned for the user's arm.
+
+    Returns ``(text, stats)``; ``stats`` holds what ``record_prompt_metric``
+    stores. The text depends only on the user's data and the items kept, so
+    it is the same from call to call and can lead the prompt as a cacheable
+    prefix.
+    """
+    arm = prompt_arm(user_id)
+    header, items = _background(user_id, kind)
+    kept = set(_select_items(query, [item for _, item, _, _ in items], [t for _, _, _, t in items], arm))
+
+    parts = [header, '## Experiences\n']
+    parts += [line for i, (section, _, line, _) in enumerate(items) if section == 'experience' and i in kept]
+    parts.append('\n## Projects\n')
+    parts += [line for i, (section, _, line, _) in enumerate(items) if section == 'project' and i in kept]
+
+    stats = {
+        'arm': arm,
+        'items_total': len(items),
+        'items_sent': len(kept),
+        'full_tokens': sum(tokens for _, _, _, tokens in items),
+        'sent_tokens': sum(items[i][3] for i in kept),
+    }
+    return ''.join(parts), stats
+
+
+def record_prompt_metric(user_id, kind, stats, cache_hit=False, cached_tokens=0):
+    """Store one call's prompt size, arm, response cache outcome and the
+    prompt tokens the provider's prefix cache served; returns the row id."""
+    with write_transaction() as db:
+        return db.execute(
+            'INSERT INTO prompt_metrics (user_id, kind, arm, items_total, items_sent, full_tokens, sent_tokens, '
+            'cache_hit, cached_tokens) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (user_id, kind, stats['arm'], stats['items_total'], stats['items_sent'],
+             stats['full_tokens'], stats['sent_tokens'], int(cache_hit), cached_tokens),
+        ).lastrowid
+
+
+def prompt_ab_report(db):
+    """Per kind and arm: call count, average prompt sizes, prefix cache
+    tokens and blurb outcomes.
+
+    Blurb quality is the share of decided blurbs (accepted, modified or
+    rejected) that the user kept.
+    """
+    rows = db.execute(
+        'SELECT m.kind, m.arm, COUNT(*) AS calls, '
+        'AVG(m.items_sent) AS avg_items_sent, AVG(m.items_total) AS avg_items_total, '
+        'AVG(m.sent_tokens) AS avg_sent_tokens, AVG(m.full_tokens - m.sent_tokens) AS avg_tokens_saved, '
+        'AVG(m.cached_tokens) AS avg_cached_tokens, '
+        'SUM(b.kept) AS blurbs_kept, SUM(b.decided) AS blurbs_decided '
+        'FROM prompt_metrics m '
+        'LEFT JOIN ('
+        "  SELECT prompt_metric_id, SUM(status IN ('accepted', 'modified')) AS kept, "
+        "  SUM(status != 'pending') AS decided FROM blurbs "
+        '  WHERE prompt_metric_id IS NOT NULL GROUP BY prompt_metric_id'
+        ') b ON b.prompt_metric_id = m.id '
+        'GROUP BY m.kind, m.arm ORDER BY m.kind, m.arm'
+    ).fetchall()
+    report = []
+    for r in rows:
+        entry = dict(r)
+        decided = entry.pop('blurbs_decided') or 0
+        kept = entry.pop('blurbs_kept') or 0
+        entry['blurb_keep_rate'] = kept / decided if decided else None
+        report.append(entry)
+    return report
+
+
+def analyze_job(user_id, job_description, bypass_cache=False, deadline=None):
+    """Analyze a job against the user's background.
+
+    Returns ``(result, usage)`` where ``usage`` totals the prompt, completion
+    and overall tokens of every model call the analysis made; answers served
+    from the cache cost none. ``bypass_cache`` forces fresh completions.
+    All calls must finish by ``deadline`` (LLM_REQUEST_DEADLINE from now by
+    default).
+    """
+    client = _get_client(user_id)
+    policy = CallPolicy(current_app.config, deadline)
+    return _run(client, user_id, _analyze_steps(user_id, job_description, bypass_cache), policy)
+
+
+def analyze_job_async(user_id, job_description, bypass_cache=False, deadline=None):
+    """Coroutine version of ``analyze_job`` for the shared event loop.
+
+    Looks the client up now, so a missing API key raises here.
+    """
+    client = _get_async_client(user_id)
+    app = current_app._get_current_object()
+    policy = CallPolicy(app.config, deadline)
+    return _run_async(app, client, user_id, _analyze_steps(user_id, job_description, bypass_cache), policy)
+
+
+def _analyze_steps(user_id, job_description, bypass_cache):
+    budget = TokenBudget()
+    prompt_description = yield from _fit_steps(user_id, job_description, budget, bypass_cache)
 
     system_prompt = (
         "You are an expert career advisor. Analyze the given job description in the context "
@@ -61,41 +733,35 @@ def analyze_job(user_id, job_description):
         '"score" (0-100), and "explanation" (why it aligns or not)\n'
     )
 
-    user_prompt = (
-        f"## Job Description\n{job_description}\n\n"
-        f"## Candidate Background\n"
-        f"Name: {user_data['profile'].get('first_name', '')} {user_data['profile'].get('last_name', '')}\n"
-        f"Bio: {user_data['profile'].get('bio', '')}\n\n"
-        f"## Experiences\n"
-    )
-    for exp in user_data['experiences']:
-        user_prompt += (
-            f"- {exp['title']} at {exp['organization']} ({exp['category']}): "
-            f"{exp['description']} [Keywords: {exp['keywords']}]\n"
-        )
-
-    user_prompt += "\n## Projects\n"
-    for proj in user_data['projects']:
-        user_prompt += f"- {proj['title']}: {proj['description']} [Keywords: {proj['keywords']}]\n"
+    # The job description goes last, after the parts that repeat between calls
+    background, stats = _background_sections(user_id, job_description, 'analyze')
+    user_prompt = f"{background}\n## Job Description\n{prompt_description}\n"
 
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
+    summary_cached = budget.cached_tokens
+    (result,), hits = yield from _complete_steps(user_id, 'analyze', [{
+        'messages': [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
         ],
-        response_format={"type": "json_object"},
-        temperature=0.3,
+        'response_format': {"type": "json_object"},
+        'temperature': 0.3,
+    }], budget, bypass_cache, parse=parse_json_object)
+
+    record_prompt_metric(
+        user_id, 'analyze', stats, cache_hit=hits > 0, cached_tokens=budget.cached_tokens - summary_cached,
     )
+    return result, budget.as_dict()
 
-    result = json.loads(response.choices[0].message.content)
-    return result
 
+def _blurb_context(user_id, template_name):
+    """What every blurb prompt of a template shares: the settings, the
+    template's sections and the prompt prefix with its metric stats.
 
-def generate_blurbs(user_id, field_key, template_name):
-    client = _get_client(user_id)
-    user_data = _get_user_data(user_id)
-
+    The prefix is the candidate background, ranked against the active job
+    analysis rather than any one field, then the analysis keywords and focus
+    areas. It is identical for every section, so the provider can serve it
+    from its prompt cache after the first call.
+    """
     db = get_db()
     settings = db.execute(
         'SELECT sentences_per_field FROM user_settings WHERE user_id = ?',
@@ -110,15 +776,34 @@ def generate_blurbs(user_id, field_key, template_name):
         (user_id,),
     ).fetchone()
 
+    keywords, suggestions = [], []
+    if analysis:
+        keywords = json.loads(analysis['extracted_keywords']) if analysis['extracted_keywords'] else []
+        suggestions = json.loads(analysis['focus_suggestions']) if analysis['focus_suggestions'] else []
+
     # Get template config for field context
     from app.services.template_service import get_template_config
-    config = get_template_config(template_name)
-    field_config = None
-    if config and 'sections' in config:
-        for section in config['sections']:
-            if section.get('key') == field_key:
-                field_config = section
-                break
+    sections = (get_template_config(template_name) or {}).get('sections', [])
+
+    # Without an analysis, rank against what the template's fields are about
+    query = ' '.join([*keywords, *suggestions]) or ' '.join(s.get('prompt_context', '') for s in sections)
+    background, stats = _background_sections(user_id, query, 'blurbs')
+    parts = [background]
+    if keywords:
+        parts.append(f"\n## Target Job Keywords\n{', '.join(keywords)}\n")
+    if suggestions:
+        parts.append("\n## Focus Areas\n" + "".join(f"- {s}\n" for s in suggestions))
+    return {
+        'num_sentences': num_sentences,
+        'sections': sections,
+        'prefix': ''.join(parts),
+        'stats': stats,
+    }
+
+
+def _blurb_request(context, field_key):
+    """Build one field's blurb completion request; returns ``(request, stats)``."""
+    field_config = next((s for s in context['sections'] if s.get('key') == field_key), None)
 
     system_prompt = (
         "You are a professional CV writer. Generate polished, concise CV text. "
@@ -127,44 +812,233 @@ def generate_blurbs(user_id, field_key, template_name):
         '- "suggestions": array of strings (each is a complete CV blurb)\n'
     )
 
-    user_prompt = f"Generate {num_sentences} CV blurb suggestions for the field: {field_key}\n\n"
-
+    # Only this last part differs between the sections of one template
+    parts = [
+        context['prefix'],
+        f"\n## Task\nGenerate {context['num_sentences']} CV blurb suggestions for the field: {field_key}\n",
+    ]
     if field_config:
         if field_config.get('prompt_context'):
-            user_prompt += f"Context: {field_config['prompt_context']}\n"
+            parts.append(f"Context: {field_config['prompt_context']}\n")
         if field_config.get('max_chars'):
-            user_prompt += f"Max length per blurb: {field_config['max_chars']} characters\n"
+            parts.append(f"Max length per blurb: {field_config['max_chars']} characters\n")
+
+    request = {
+        'messages': [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": ''.join(parts)},
+        ],
+        'response_format': {"type": "json_object"},
+        'temperature': 0.7,
+    }
+    return request, context['stats']
+
 
-    user_prompt += (
-        f"\n## Candidate\n"
-        f"Name: {user_data['profile'].get('first_name', '')} {user_data['profile'].get('last_name', '')}\n"
-        f"Bio: {user_data['profile'].get('bio', '')}\n\n"
-        f"## Experiences\n"
+def generate_blurbs(user_id, field_key, template_name, bypass_cache=False, deadline=None):
+    """Ask the model for blurbs; returns ``(suggestions, prompt_metric_id)``.
+
+    Unchanged inputs get the cached suggestions unless ``bypass_cache`` is set.
+    """
+    client = _get_client(user_id)
+    policy = CallPolicy(current_app.config, deadline)
+    return _run(client, user_id, _blurb_steps(user_id, field_key, template_name, bypass_cache), policy)
+
+
+def generate_blurbs_async(user_id, field_key, template_name, bypass_cache=False, deadline=None):
+    """Coroutine version of ``generate_blurbs`` for the shared event loop."""
+    client = _get_async_client(user_id)
+    app = current_app._get_current_object()
+    policy = CallPolicy(app.config, deadline)
+    return _run_async(
+        app, client, user_id, _blurb_steps(user_id, field_key, template_name, bypass_cache), policy,
     )
-    for exp in user_data['experiences']:
-        user_prompt += f"- {exp['title']} at {exp['organization']}: {exp['description']}\n"
 
-    user_prompt += "\n## Projects\n"
-    for proj in user_data['projects']:
-        user_prompt += f"- {proj['title']}: {proj['description']}\n"
 
-    if analysis:
-        keywords = json.loads(analysis['extracted_keywords']) if analysis['extracted_keywords'] else []
-        suggestions = json.loads(analysis['focus_suggestions']) if analysis['focus_suggestions'] else []
-        if keywords:
-            user_prompt += f"\n## Target Job Keywords\n{', '.join(keywords)}\n"
-        if suggestions:
-            user_prompt += f"\n## Focus Areas\n" + "\n".join(f"- {s}" for s in suggestions) + "\n"
-
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
-        response_format={"type": "json_object"},
-        temperature=0.7,
+def _blurb_steps(user_id, field_key, template_name, bypass_cache):
+    request, stats = _blurb_request(_blurb_context(user_id, template_name), field_key)
+    budget = TokenBudget()
+    (result,), hits = yield from _complete_steps(
+        user_id, 'blurbs', [request], budget, bypass_cache, parse=parse_json_object,
+    )
+
+    metric_id = record_prompt_metric(
+        user_id, 'blurbs', stats, cache_hit=hits > 0, cached_tokens=budget.cached_tokens,
     )
+    return result.get('suggestions', []), metric_id
+
+
+def generate_all_blurbs(user_id, template_name, field_keys=None, bypass_cache=False, deadline=None):
+    """Generate several blurb sections of a template at once.
+
+    The shared prompt context is built once, then one request per section
+    (all of the template's blurb sections by default) is sent concurrently,
+    at most LLM_USER_CONCURRENCY at a time for the user. Returns
+    ``(field_keys, results)``; ``results`` yields ``(field_key, suggestions,
+    prompt_metric_id, error)`` as each section finishes, cached ones first,
+    and must be consumed inside the app context.
+    """
+    client = _get_client(user_id)
+    policy = CallPolicy(current_app.config, deadline)
+    context = _blurb_context(user_id, template_name)
+    available = [s['key'] for s in context['sections'] if s.get('type') == 'blurb']
+    field_keys = available if field_keys is None else list(dict.fromkeys(field_keys))
+    unknown = [k for k in field_keys if k not in available]
+    if unknown:
+        raise ValueError(f'Unknown blurb sections: {", ".join(unknown)}')
+    if not field_keys:
+        raise ValueError('Template has no blurb sections')
+
+    built = {k: _blurb_request(context, k) for k in field_keys}
+    requests = {k: {'model': current_app.config['LLM_MODEL'], **request} for k, (request, _) in built.items()}
+    keys = {k: llm_cache_service.cache_key('blurbs', PROMPT_VERSIONS['blurbs'], requests[k]) for k in field_keys}
+    use_cache = llm_cache_service.cache_enabled(user_id)
+    cached = {}
+    if use_cache and not bypass_cache:
+        found = zip(field_keys, llm_cache_service.lookup(user_id, [keys[k] for k in field_keys]))
+        cached = {k: content for k, content in found if content is not None and _parses(content)}
+
+    def results():
+        missing = [k for k in field_keys if cached.get(k) is None]
+        _record_cache_hits(user_id, 'blurbs', [requests[k] for k in field_keys if k not in missing])
+        for k in field_keys:
+            if k in missing:
+                continue
+            metric_id = record_prompt_metric(user_id, 'blurbs', built[k][1], cache_hit=True)
+            yield k, json.loads(cached[k]).get('suggestions', []), metric_id, None
+        if not missing:
+            usage_service.maybe_flush()
+            return
+
+        app = current_app._get_current_object()
+        limit = app.config['LLM_USER_CONCURRENCY']
+
+        def call(k):
+            with _user_slots.hold(user_id, limit), _MeteredCall(app, user_id, 'blurbs', requests[k]) as metered:
+                metered.response = policy.complete(client, 'blurbs', requests[k])
+            return metered.response
+
+        # Worker threads only talk to the API; cache and metric writes stay here
+        workers = min(len(missing), current_app.config['LLM_USER_CONCURRENCY'])
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(call, k): k for k in missing}
+            for future in as_completed(futures):
+                k = futures[future]
+                try:
+                    response = future.result()
+                    entry = _cache_entry(keys[k], response)
+                    suggestions = parse_json_object(entry[1]).get('suggestions', [])
+                except Exception as e:
+                    yield k, None, None, str(e)
+                    continue
+                if use_cache:
+                    llm_cache_service.store(user_id, 'blurbs', [entry])
+                metric_id = record_prompt_metric(
+                    user_id, 'blurbs', built[k][1],
+                    cached_tokens=cached_prompt_tokens(getattr(response, 'usage', None)),
+                )
+                yield k, suggestions, metric_id, None
+        usage_service.maybe_flush()
+
+    return field_keys, results()
+
+
+class _StreamedText:
+    """File-like view of a streamed completion, for ``json_stream.iter_events``.
+
+    Each ``read`` returns the next non-empty content delta as UTF-8 bytes.
+    The full text and the usage reported by the final chunk are kept.
+    """
+
+    def __init__(self, stream):
+        self.stream = iter(stream)
+        self.parts = []
+        self.usage_reported = False
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+
+    @property
+    def text(self):
+        return ''.join(self.parts)
+
+    def read(self, size=-1):
+        for chunk in self.stream:
+            if getattr(chunk, 'usage', None) is not None:
+                self.usage_reported = True
+                self.prompt_tokens = chunk.usage.prompt_tokens or 0
+                self.completion_tokens = chunk.usage.completion_tokens or 0
+                self.cached_tokens = cached_prompt_tokens(chunk.usage)
+            if chunk.choices and chunk.choices[0].delta.content:
+                self.parts.append(chunk.choices[0].delta.content)
+                return self.parts[-1].encode()
+        return b''
+
+
+def stream_blurbs(user_id, field_key, template_name, bypass_cache=False, deadline=None):
+    """Like ``generate_blurbs``, but yields each suggestion as soon as the
+    model has finished writing it.
+
+    Returns ``(prompt_metric_id, suggestions)`` where ``suggestions`` is a
+    generator; it must be consumed inside the app context, or closed if it
+    is not. Cached answers are replayed at once, and a streamed answer is
+    cached once it is complete.
+    """
+    client = _get_client(user_id)
+    policy = CallPolicy(current_app.config, deadline)
+    request, stats = _blurb_request(_blurb_context(user_id, template_name), field_key)
+    request = {'model': current_app.config['LLM_MODEL'], **request}
+    use_cache = llm_cache_service.cache_enabled(user_id)
+    key = llm_cache_service.cache_key('blurbs', PROMPT_VERSIONS['blurbs'], request)
+    cached = llm_cache_service.lookup(user_id, [key])[0] if use_cache and not bypass_cache else None
+    if cached is not None and not _parses(cached):
+        cached = None
+    metric_id = record_prompt_metric(user_id, 'blurbs', stats, cache_hit=cached is not None)
+    if cached is not None:
+        _record_cache_hits(user_id, 'blurbs', [request])
+        usage_service.maybe_flush()
+        return metric_id, (value for value in json.loads(cached).get('suggestions', []))
+
+    metered = _MeteredCall(current_app._get_current_object(), user_id, 'blurbs', request, streaming=True)
+
+    def suggestions():
+        # Only opening the stream is retried; its latency says little about a
+        # whole completion, so it is neither timed nor hedged
+        with metered:
+            stream = policy.complete(
+                client, None, {**request, 'stream': True, 'stream_options': {'include_usage': True}},
+            )
+        text = _StreamedText(stream)
+        error = None
+        try:
+            # Stops here until the caller iterates, so from now on closing
+            # the generator, even unstarted, closes the stream and meters it
+            yield None
+            for event, name, value in iter_events(text):
+                if event == 'item' and name == 'suggestions' and isinstance(value, str):
+                    yield value
+        except BaseException as e:
+            # Including GeneratorExit, when the client goes away mid-stream
+            error = e
+            raise
+        finally:
+            stream.close()
+            if text.usage_reported:
+                metered.finish(text.prompt_tokens, text.completion_tokens, text.cached_tokens, error=error)
+            else:
+                # Cut off before the final chunk: charge what was sent and read
+                metered.finish(metered.reserved, estimate_tokens(text.text), error=error)
+        usage_service.maybe_flush()
+        if use_cache and _parses(text.text):
+            llm_cache_service.store(
+                user_id, 'blurbs', [(key, text.text, text.prompt_tokens, text.completion_tokens)]
+            )
+        if text.cached_tokens:
+            with write_transaction() as db:
+                db.execute(
+                    'UPDATE prompt_metrics SET cached_tokens = ? WHERE id = ?', (text.cached_tokens, metric_id),
+                )
 
-    result = json.loads(response.choices[0].message.content)
-    return result.get('suggestions', [])
+    items = suggestions()
+    # Opens the stream, so quota and provider errors are raised here
+    next(items)
+    return metric_id, items
@@ -0,0 +1,104 @@
+import base64
+import json
+
+from flask import current_app, jsonify
+
+
+def _encode_cursor(values):
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_cursor(token, width):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != width:
+        raise ValueError('Invalid cursor')
+    if not all(isinstance(v, (str, int, float)) for v in values):
+        raise ValueError('Invalid cursor')
+    return values
+
+
+def parse_page(args, fields, order, descending=False):
+    """Read ``limit``, ``cursor`` and ``fields`` from the query string.
+
+    ``order`` is the tuple of columns the list is sorted on, ending in a
+    unique column, and ``descending`` its direction. Returns None when none
+    of the parameters are given, so the endpoint keeps returning the whole
+    list. Raises ValueError on bad input.
+    """
+    limit = args.get('limit')
+    cursor = args.get('cursor')
+    wanted = args.get('fields')
+    if limit is None and cursor is None and wanted is None:
+        return None
+
+    page = {'order': order, 'descending': descending, 'limit': None, 'after': None, 'fields': None}
+
+    if limit is not None:
+        try:
+            page['limit'] = int(limit)
+        except ValueError:
+            raise ValueError('limit must be an integer')
+        if not 1 <= page['limit'] <= current_app.config['LIST_MAX_LIMIT']:
+            raise ValueError(f'limit must be between 1 and {current_app.config["LIST_MAX_LIMIT"]}')
+    elif cursor is not None:
+        page['limit'] = current_app.config['LIST_PAGE_SIZE']
+
+    if cursor:
+        page['after'] = _decode_cursor(cursor, len(order))
+
+    if wanted is not None:
+        names = [name.strip() for name in wanted.split(',') if name.strip()]
+        unknown = [name for name in names if name not in fields]
+        if unknown:
+            raise ValueError(f'Unknown fields: {", ".join(unknown)}')
+        page['fields'] = tuple(dict.fromkeys(['id', *names]))
+
+    return page
+
+
+def select_list(fields, page):
+    """Columns to SELECT: the requested fields plus those the cursor is built from."""
+    if page is None or page['fields'] is None:
+        return ', '.join(fields)
+    needed = set(page['fields']) | set(page['order'])
+    return ', '.join(f for f in fields if f in needed)
+
+
+def keyset_clause(page):
+    """``AND (order...) > (?...)`` for rows after the cursor, or nothing."""
+    if page is None or page['after'] is None:
+        return '', ()
+    op = '<' if page['descending'] else '>'
+    columns = ', '.join(page['order'])
+    placeholders = ', '.join('?' * len(page['order']))
+    return f' AND ({columns}) {op} ({placeholders})', tuple(page['after'])
+
+
+def limit_clause(page):
+    # One extra row tells page_response whether there is a next page
+    if page is None or page['limit'] is None:
+        return ''
+    return f' LIMIT {page["limit"] + 1}'
+
+
+def page_response(rows, page):
+    """JSON list response for one page, with ``X-Next-Cursor`` when more rows follow."""
+    if page is None:
+        return jsonify(rows)
+
+    next_cursor = None
+    if page['limit'] is not None and len(rows) > page['limit']:
+        rows = rows[:page['limit']]
+        next_cursor = _encode_cursor([rows[-1][column] for column in page['order']])
+    if page['fields'] is not None:
+        rows = [{name: row[name] for name in page['fields']} for row in rows]
+
+    response = jsonify(rows)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
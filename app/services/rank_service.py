@@ -0,0 +1,166 @@
+import threading
+
+from flask import current_app
+
+from app.database import write_transaction
+from app.services.task_service import submit
+
+# Base-62 digits in ASCII order, so SQLite's default BINARY collation sorts
+# keys the same way these functions compare them.
+DIGITS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+RANKED_TABLES = ('experiences', 'projects')
+APPEND_WIDTH = 3
+
+_pending_rebalances = set()
+_pending_lock = threading.Lock()
+
+
+def _midpoint(a, b):
+    # a < b, neither ends in DIGITS[0]; b of None means "no upper bound"
+    if b:
+        n = 0
+        while (a[n] if n < len(a) else DIGITS[0]) == b[n]:
+            n += 1
+        if n > 0:
+            return b[:n] + _midpoint(a[n:], b[n:])
+
+    digit_a = DIGITS.index(a[0]) if a else 0
+    digit_b = DIGITS.index(b[0]) if b else len(DIGITS)
+    if digit_b - digit_a > 1:
+        return DIGITS[(digit_a + digit_b + 1) // 2]
+    if b and len(b) > 1:
+        return b[:1]
+    return DIGITS[digit_a] + _midpoint(a[1:], None)
+
+
+def _after(a):
+    # Increment as a fixed-width base-62 number, so appending to the end of a
+    # list reuses the same key length for tens of thousands of items
+    width = max(len(a), APPEND_WIDTH)
+    digits = [DIGITS.index(c) for c in a.ljust(width, DIGITS[0])]
+    i = width - 1
+    while i >= 0 and digits[i] == len(DIGITS) - 1:
+        digits[i] = 0
+        i -= 1
+    if i < 0:
+        return a + DIGITS[len(DIGITS) // 2]
+    digits[i] += 1
+    return ''.join(DIGITS[d] for d in digits).rstrip(DIGITS[0])
+
+
+def key_between(a, b):
+    """Return a key sorting strictly between ``a`` and ``b`` (either may be None)."""
+    if a and b and a >= b:
+        raise ValueError(f'{a!r} must sort before {b!r}')
+    if a and not b:
+        return _after(a)
+    return _midpoint(a or '', b)
+
+
+def spread_keys(count):
+    """Return ``count`` ascending keys of equal length, evenly spaced."""
+    width = 1
+    while len(DIGITS) ** width < (count + 1) * len(DIGITS):
+        width += 1
+    space = len(DIGITS) ** width
+
+    keys = []
+    for i in range(count):
+        value = (i + 1) * space // (count + 1)
+        chars = []
+        for _ in range(width):
+            value, digit = divmod(value, len(DIGITS))
+            chars.append(DIGITS[digit])
+        keys.append(''.join(reversed(chars)).rstrip(DIGITS[0]))
+    return keys
+
+
+def next_key(db, table, user_id):
+    """Key that places a new row at the end of the user's list."""
+    row = db.execute(
+        f'SELECT MAX(sort_key) FROM {table} WHERE user_id = ?',
+        (user_id,),
+    ).fetchone()
+    return key_between(row[0] or None, None)
+
+
+def assign_keys(db, table, user_id, ids):
+    """Rewrite the sort keys of ``ids`` so they sort in the given order."""
+    db.executemany(
+        f'UPDATE {table} SET sort_key = ? WHERE id = ? AND user_id = ?',
+        [(key, item_id, user_id) for key, item_id in zip(spread_keys(len(ids)), ids)],
+    )
+
+
+def move_item(db, table, user_id, item_id, after_id=None, before_id=None):
+    """Place ``item_id`` between ``after_id`` and ``before_id`` by rewriting one row.
+
+    Either neighbour may be omitted, in which case the adjacent row on that
+    side is looked up through the (user_id, sort_key) index. Raises
+    LookupError for unknown ids and ValueError for impossible positions.
+    """
+    if after_id is None and before_id is None:
+        raise ValueError('after_id or before_id is required')
+    if item_id in (after_id, before_id):
+        raise ValueError('An item cannot be positioned relative to itself')
+
+    def key_of(other_id):
+        row = db.execute(
+            f'SELECT sort_key FROM {table} WHERE id = ? AND user_id = ?',
+            (other_id, user_id),
+        ).fetchone()
+        if row is None:
+            raise LookupError(f'Item {other_id} not found')
+        return row['sort_key']
+
+    key_of(item_id)
+    lower = key_of(after_id) if after_id is not None else None
+    upper = key_of(before_id) if before_id is not None else None
+
+    if upper is None:
+        row = db.execute(
+            f'SELECT sort_key FROM {table} WHERE user_id = ? AND sort_key > ? AND id != ? '
+            'ORDER BY sort_key LIMIT 1',
+            (user_id, lower, item_id),
+        ).fetchone()
+        upper = row['sort_key'] if row else None
+    elif lower is None:
+        row = db.execute(
+            f'SELECT sort_key FROM {table} WHERE user_id = ? AND sort_key < ? AND id != ? '
+            'ORDER BY sort_key DESC LIMIT 1',
+            (user_id, upper, item_id),
+        ).fetchone()
+        lower = row['sort_key'] if row else None
+
+    if lower is not None and upper is not None and lower >= upper:
+        raise ValueError('after_id must come before before_id')
+
+    key = key_between(lower, upper)
+    db.execute(
+        f'UPDATE {table} SET sort_key = ? WHERE id = ? AND user_id = ?',
+        (key, item_id, user_id),
+    )
+    return key
+
+
+def rebalance(table, user_id):
+    """Respace every key of one user's list back to the shortest even spread."""
+    with _pending_lock:
+        _pending_rebalances.discard((table, user_id))
+    with write_transaction() as db:
+        ids = [r['id'] for r in db.execute(
+            f'SELECT id FROM {table} WHERE user_id = ? ORDER BY sort_key, id',
+            (user_id,),
+        )]
+        assign_keys(db, table, user_id, ids)
+
+
+def maybe_rebalance(table, user_id, key):
+    """Queue a background rebalance once keys have grown past the limit."""
+    if len(key) <= current_app.config.get('SORT_KEY_MAX_LENGTH', 16):
+        return
+    with _pending_lock:
+        if (table, user_id) in _pending_rebalances:
+            return
+        _pending_rebalances.add((table, user_id))
+    submit(rebalance, table, user_id)
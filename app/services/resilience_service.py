@@ -0,0 +1,301 @@
+import asyncio
+import itertools
+import math
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from email.utils import parsedate_to_datetime
+
+from flask import current_app, jsonify
+from openai import APIConnectionError
+
+# Latency samples kept per call kind, and how many are needed before hedging
+_LATENCY_WINDOW = 200
+_HEDGE_MIN_SAMPLES = 20
+
+
+class LLMUnavailableError(Exception):
+    """OpenAI did not answer usably within the retry budget, or the breaker is open."""
+
+    status_code = 503
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMDeadlineExceeded(LLMUnavailableError):
+    """The request's deadline passed before its model calls were done."""
+
+    status_code = 504
+
+
+class LLMBadResponse(LLMUnavailableError):
+    """The model answered, but not in the shape the prompt asked for."""
+
+    status_code = 502
+
+
+def handle_llm_unavailable(error):
+    response = jsonify({'error': str(error)})
+    response.status_code = error.status_code
+    response.headers['Retry-After'] = str(max(1, math.ceil(error.retry_after or 1)))
+    return response
+
+
+class Deadline:
+    """Point in time by which all model calls of one request must be done."""
+
+    def __init__(self, seconds):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return self.expires_at - time.monotonic()
+
+
+def request_deadline():
+    """Deadline for an endpoint's model calls, counted from now."""
+    return Deadline(current_app.config['LLM_REQUEST_DEADLINE'])
+
+
+class CircuitBreaker:
+    """Fails calls fast while the provider is down.
+
+    ``threshold`` consecutive outage errors (5xx, timeouts, connection
+    failures) open it. While open, calls are refused for ``cooldown``
+    seconds; after that one call goes through as a probe and the cooldown
+    restarts. Any answer from the provider closes it again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def wait_time(self, cooldown):
+        """Seconds until calls may go through again; 0 lets this call through."""
+        now = time.monotonic()
+        with self._lock:
+            if self.opened_at is None:
+                return 0
+            wait_for = self.opened_at + cooldown - now
+            if wait_for > 0:
+                return wait_for
+            # This call is the probe; everyone else waits out another cooldown
+            self.opened_at = now
+            return 0
+
+    def record(self, outage, threshold):
+        with self._lock:
+            if not outage:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.opened_at is not None or self.failures >= threshold:
+                self.opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Recent successful call latencies per kind, for hedging."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}
+
+    def record(self, kind, seconds):
+        with self._lock:
+            self._samples.setdefault(kind, deque(maxlen=_LATENCY_WINDOW)).append(seconds)
+
+    def percentile(self, kind, percent):
+        """The ``percent`` latency of ``kind``, or None with too few samples."""
+        with self._lock:
+            samples = sorted(self._samples.get(kind, ()))
+        if len(samples) < _HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * percent / 100))]
+
+
+# One provider, so one breaker and one latency history per process
+breaker = CircuitBreaker()
+latencies = LatencyTracker()
+
+
+def _status(error):
+    return getattr(error, 'status_code', None)
+
+
+def is_outage(error):
+    """Whether ``error`` says the provider itself is failing."""
+    status = _status(error)
+    return (status is not None and status >= 500) or isinstance(error, (APIConnectionError, TimeoutError))
+
+
+def is_transient(error):
+    """Whether the same call may well succeed if tried again."""
+    return is_outage(error) or _status(error) in (408, 409, 429)
+
+
+def retry_after(error):
+    """Seconds the provider asked us to wait (Retry-After/retry-after-ms), if any."""
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    try:
+        if headers.get('retry-after-ms') is not None:
+            return max(0.0, float(headers['retry-after-ms']) / 1000)
+        value = headers.get('retry-after')
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _hedged(create, request, timeout, after):
+    """Call ``create``; if it has not answered after ``after`` seconds, send a
+    copy and take whichever answers first.
+
+    A blocking call cannot be cancelled, so the slower one finishes on its
+    own thread and its answer is dropped.
+    """
+    if after is None:
+        return create(**request, timeout=timeout)
+    pool = ThreadPoolExecutor(max_workers=2)
+    try:
+        futures = [pool.submit(create, **request, timeout=timeout)]
+        done, _ = wait(futures, timeout=after)
+        if not done:
+            futures.append(pool.submit(create, **request, timeout=timeout - after))
+        error = None
+        for future in as_completed(futures):
+            try:
+                return future.result()
+            except Exception as e:
+                error = e
+        raise error
+    finally:
+        pool.shutdown(wait=False)
+
+
+async def _hedged_async(create, request, timeout, after):
+    """Coroutine version of ``_hedged``; the slower call is cancelled."""
+    async def attempt(limit):
+        return await asyncio.wait_for(create(**request, timeout=limit), limit)
+
+    if after is None:
+        return await attempt(timeout)
+    tasks = {asyncio.ensure_future(attempt(timeout))}
+    done, _ = await asyncio.wait(tasks, timeout=after)
+    if not done:
+        tasks.add(asyncio.ensure_future(attempt(timeout - after)))
+    error = None
+    try:
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+class CallPolicy:
+    """Deadline, retry, hedging and breaker rules for one request's model calls.
+
+    Built in the app context, as it reads the config, but usable from worker
+    threads and the event loop, which have none.
+    """
+
+    def __init__(self, config, deadline=None):
+        self.deadline = deadline or Deadline(config['LLM_REQUEST_DEADLINE'])
+        self.attempt_timeout = config['LLM_ATTEMPT_TIMEOUT']
+        self.retries = config['LLM_RETRIES']
+        self.base_delay = config['LLM_RETRY_BASE_DELAY']
+        self.max_delay = config['LLM_RETRY_MAX_DELAY']
+        self.hedge_percentile = config['LLM_HEDGE_PERCENTILE'] if config['LLM_HEDGE'] else None
+        self.breaker_threshold = config['LLM_BREAKER_THRESHOLD']
+        self.breaker_cooldown = config['LLM_BREAKER_COOLDOWN']
+
+    def complete(self, client, kind, request):
+        """``client.chat.completions.create(**request)`` under this policy.
+
+        Each attempt gets LLM_ATTEMPT_TIMEOUT, cut to what is left of the
+        deadline. Transient errors are retried with jittered exponential
+        backoff, waiting at least as long as Retry-After asks. Calls of a
+        ``kind`` are timed and may be hedged; pass None (streams) for neither.
+        """
+        for attempt in itertools.count():
+            timeout = self._start_attempt()
+            started = time.monotonic()
+            try:
+                response = _hedged(client.chat.completions.create, request, timeout, self._hedge_after(kind, timeout))
+            except Exception as e:
+                time.sleep(self._retry_delay(e, attempt))
+                continue
+            self._succeeded(kind, started)
+            return response
+
+    async def complete_async(self, client, kind, request):
+        """Coroutine version of ``complete`` for an AsyncOpenAI ``client``."""
+        for attempt in itertools.count():
+            timeout = self._start_attempt()
+            started = time.monotonic()
+            try:
+                response = await _hedged_async(
+                    client.chat.completions.create, request, timeout, self._hedge_after(kind, timeout),
+                )
+            except Exception as e:
+                await asyncio.sleep(self._retry_delay(e, attempt))
+                continue
+            self._succeeded(kind, started)
+            return response
+
+    def _start_attempt(self):
+        """Timeout for the next attempt; raises if the deadline has passed or
+        the breaker is open."""
+        remaining = self.deadline.remaining()
+        if remaining <= 0:
+            raise LLMDeadlineExceeded('OpenAI did not answer in time, please retry')
+        wait_for = breaker.wait_time(self.breaker_cooldown)
+        if wait_for > 0:
+            raise LLMUnavailableError('OpenAI is failing; calls are paused, please retry later', wait_for)
+        return min(self.attempt_timeout, remaining)
+
+    def _hedge_after(self, kind, timeout):
+        if kind is None or self.hedge_percentile is None:
+            return None
+        after = latencies.percentile(kind, self.hedge_percentile)
+        return after if after is not None and after < timeout else None
+
+    def _succeeded(self, kind, started):
+        breaker.record(False, self.breaker_threshold)
+        if kind is not None:
+            latencies.record(kind, time.monotonic() - started)
+
+    def _retry_delay(self, error, attempt):
+        """Seconds to wait before retrying after ``error``; re-raises it, or
+        raises LLMUnavailableError, when there is no retry left."""
+        breaker.record(is_outage(error), self.breaker_threshold)
+        if not is_transient(error):
+            raise error
+        asked = retry_after(error)
+        # Full jitter keeps callers that failed together from retrying in lockstep
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if asked is not None:
+            delay = max(delay, asked)
+        if attempt >= self.retries or delay >= self.deadline.remaining():
+            raise LLMUnavailableError(
+                f'OpenAI request failed after {attempt + 1} attempts: {error}', asked,
+            ) from error
+        return delay
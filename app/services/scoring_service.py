@@ -0,0 +1,159 @@
+import re
+from collections import Counter
+
+import numpy as np
+
+from app.services.keyword_service import normalize_keyword
+
+# Phrase delimiters for keyword extraction, on top of punctuation
+STOPWORDS = frozenset('''
+a about above across after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each either etc few for from further
+had has have having he her here hers him his how i if in into is it its itself just least less like
+may me might more most must my no nor not of off on once only or other our ours out over own per
+please plus same shall she should so some such than that the their theirs them then there these they
+this those through to too under until up upon us very via was we well were what when where which while
+who whom why will with within without would you your yours
+able ability including e.g i.e role team teams work working year years experience
+experienced strong excellent good great new join looking candidate candidates ideal preferred required
+requirements responsibilities skills skill knowledge understanding using use
+'''.split())
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_KEYWORDS = 15
+MAX_PHRASE_WORDS = 4
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.\-]*[a-z0-9+#]|[a-z0-9]")
+_CLAUSE_RE = re.compile(r'[,;:!?()\[\]{}"\n\r\t•|/]+|\.(?:\s|$)')
+
+
+def tokenize(text):
+    """Lowercased word tokens; keeps names like c++, c#, node.js and ci-cd whole."""
+    return _TOKEN_RE.findall((text or '').lower())
+
+
+def extract_keywords(text, limit=MAX_KEYWORDS):
+    """Pick candidate keyphrases out of free text, RAKE style.
+
+    The text is cut into phrases at punctuation and stopwords; each word is
+    scored by degree over frequency across those phrases and a phrase by the
+    sum of its words. Returns up to ``limit`` normalized phrases, best first.
+    """
+    phrases = []
+    for clause in _CLAUSE_RE.split(text or ''):
+        phrase = []
+        for token in tokenize(clause):
+            if token in STOPWORDS or token.isdigit():
+                if phrase:
+                    phrases.append(phrase)
+                phrase = []
+            else:
+                phrase.append(token)
+        if phrase:
+            phrases.append(phrase)
+    phrases = [p for p in phrases if len(p) <= MAX_PHRASE_WORDS]
+
+    frequency, degree = Counter(), Counter()
+    for phrase in phrases:
+        for word in phrase:
+            frequency[word] += 1
+            degree[word] += len(phrase)
+
+    scores = {}
+    for phrase in phrases:
+        key = normalize_keyword(' '.join(phrase))
+        if key:
+            score = sum(degree[w] / frequency[w] for w in phrase)
+            # Repeated mentions count, so frequent skills outrank one-off phrases
+            scores[key] = scores.get(key, 0) + score
+    return [k for k, _ in sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))[:limit]]
+
+
+def _item_text(item):
+    return ' '.join(str(item.get(f) or '') for f in ('title', 'organization', 'description', 'keywords'))
+
+
+def score_items(job_description, items, keywords=None):
+    """Score each item's fit to a job description, 0-100.
+
+    Items are dicts with ``title`` and optionally ``organization``,
+    ``description`` and ``keywords``. Every item is turned into a sparse
+    BM25-weighted term vector and compared with the job description's
+    vector by cosine similarity; the result is blended with the share of
+    ``keywords`` the item mentions. Returns ``(scores, matched)``: an array
+    of scores and, per item, the keywords it mentions.
+    """
+    if keywords is None:
+        keywords = extract_keywords(job_description)
+    if not items:
+        return np.zeros(0), []
+
+    docs = [tokenize(_item_text(item)) for item in items]
+    query = tokenize(job_description)
+    n_docs = len(docs)
+
+    # Sparse term frequencies as (row, term, count) triplets; the query is row n_docs
+    tokens = [t for doc in docs for t in doc] + query
+    if not tokens:
+        return np.zeros(n_docs), [[] for _ in docs]
+    vocabulary = {}
+    terms = np.fromiter(
+        (vocabulary.setdefault(t, len(vocabulary)) for t in tokens), dtype=np.int64, count=len(tokens)
+    )
+    size = len(vocabulary)
+    rows = np.repeat(np.arange(n_docs + 1), [len(doc) for doc in docs] + [len(query)])
+    cells = rows * size + terms
+    cells, tf = np.unique(cells, return_counts=True)
+    rows, terms = np.divmod(cells, size)
+    is_query = rows == n_docs
+    query_terms, query_tf = terms[is_query], tf[is_query]
+    rows, terms, tf = rows[~is_query], terms[~is_query], tf[~is_query].astype(np.float64)
+
+    doc_freq = np.bincount(terms, minlength=size)
+    idf = np.log1p((n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+    lengths = np.bincount(rows, weights=tf, minlength=n_docs)
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[rows] / max(lengths.mean(), 1.0))
+    weights = tf * (BM25_K1 + 1) / (tf + norm) * idf[terms]
+
+    query_weights = np.zeros(size)
+    query_weights[query_terms] = query_tf * (BM25_K1 + 1) / (query_tf + BM25_K1) * idf[query_terms]
+
+    dots = np.bincount(rows, weights=weights * query_weights[terms], minlength=n_docs)
+    magnitudes = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=n_docs)) * np.linalg.norm(query_weights)
+    cosine = np.divide(dots, magnitudes, out=np.zeros(n_docs), where=magnitudes > 0)
+
+    # Keywords are normalized token runs, so a padded substring test is a whole-word match
+    texts = [f' {" ".join(doc)} ' for doc in docs]
+    padded = [f' {k} ' for k in keywords]
+    matched = [[k for k, p in zip(keywords, padded) if p in text] for text in texts]
+    coverage = np.array([len(m) for m in matched], dtype=np.float64) / max(len(keywords), 1)
+
+    # sqrt spreads the typically small cosine values over the range
+    scores = np.clip(100 * (0.5 * np.sqrt(cosine) + 0.5 * np.sqrt(coverage)), 0, 100)
+    return scores.round(), matched
+
+
+def prescore(job_description, experiences, projects):
+    """Instant, offline approximation of an analysis result.
+
+    Returns ``extracted_keywords`` and ``alignment_data`` in the shape the
+    LLM analysis uses, best match first, with each entry's ``type`` and
+    ``id`` added.
+    """
+    keywords = extract_keywords(job_description)
+    items = [('experience', e) for e in experiences] + [('project', p) for p in projects]
+    scores, matched = score_items(job_description, [item for _, item in items], keywords)
+
+    alignment = []
+    for (kind, item), score, hits in zip(items, scores.tolist(), matched):
+        explanation = f'Mentions {", ".join(hits)}' if hits else 'No job keywords mentioned'
+        alignment.append({
+            'item': item['title'],
+            'type': kind,
+            'id': item['id'],
+            'score': int(score),
+            'explanation': explanation,
+        })
+    alignment.sort(key=lambda a: -a['score'])
+    return {'extracted_keywords': keywords, 'alignment_data': alignment}
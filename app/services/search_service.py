@@ -0,0 +1,93 @@
+import html
+import re
+
+# FTS table and the SELECT that reproduces what its triggers index, per resource
+SEARCH_SOURCES = {
+    'experiences': (
+        'experiences_fts',
+        "SELECT id, 'u' || user_id, title, COALESCE(organization, '') || char(10) || COALESCE(description, ''), "
+        'keywords FROM experiences',
+    ),
+    'projects': (
+        'projects_fts',
+        "SELECT id, 'u' || user_id, title, description, keywords FROM projects",
+    ),
+    'blurbs': (
+        'blurbs_fts',
+        "SELECT id, 'u' || user_id, field_key, COALESCE(NULLIF(user_text, ''), suggestion_text), '' FROM blurbs",
+    ),
+    'job_analyses': (
+        'job_analyses_fts',
+        "SELECT id, 'u' || user_id, '', job_description, extracted_keywords FROM job_analyses",
+    ),
+}
+
+# Columns a query's words are matched against; owner only scopes the search
+_CONTENT_COLUMNS = ('title', 'body', 'keywords')
+# bm25 column weights: owner, title, body, keywords
+BM25_WEIGHTS = '0.0, 10.0, 1.0, 5.0'
+MAX_TERMS = 10
+SNIPPET_TOKENS = 12
+
+# Private-use markers survive html.escape and are swapped for <mark> after it
+_OPEN, _CLOSE = '\ue000', '\ue001'
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def build_match(user_id, q):
+    """Turn free text into an FTS5 MATCH expression scoped to one user.
+
+    Every word is quoted, so FTS5 operators in the input are searched as
+    text. Words of two or more characters match as prefixes. The words only
+    match the content columns, never the owner token. Returns None when the
+    input has no searchable words.
+    """
+    terms = _TERM_RE.findall(q or '')[:MAX_TERMS]
+    if not terms:
+        return None
+    phrases = ' '.join(f'"{t}"*' if len(t) > 1 else f'"{t}"' for t in terms)
+    return f'owner:"u{user_id}" AND {{{" ".join(_CONTENT_COLUMNS)}}}:({phrases})'
+
+
+def _marked(text):
+    return html.escape(text or '').replace(_OPEN, '<mark>').replace(_CLOSE, '</mark>')
+
+
+def search(db, user_id, q, resources, limit):
+    """Rank the user's rows in ``resources`` against ``q`` by BM25.
+
+    Returns at most ``limit`` hits, best first, each with an HTML-safe
+    highlighted title and body snippet.
+    """
+    match = build_match(user_id, q)
+    if match is None:
+        return []
+
+    hits = []
+    for resource in resources:
+        table = SEARCH_SOURCES[resource][0]
+        rows = db.execute(
+            f'SELECT rowid AS id, '
+            f"highlight({table}, 1, ?, ?) AS title, "
+            f"snippet({table}, 2, ?, ?, '…', {SNIPPET_TOKENS}) AS snippet, "
+            f'bm25({table}, {BM25_WEIGHTS}) AS score '
+            f'FROM {table} WHERE {table} MATCH ? ORDER BY score LIMIT ?',
+            (_OPEN, _CLOSE, _OPEN, _CLOSE, match, limit),
+        ).fetchall()
+        hits.extend({
+            'type': resource,
+            'id': r['id'],
+            'title': _marked(r['title']),
+            'snippet': _marked(r['snippet']),
+            'score': round(-r['score'], 4),
+        } for r in rows)
+
+    hits.sort(key=lambda h: -h['score'])
+    return hits[:limit]
+
+
+def rebuild_search_index(db):
+    """Repopulate every FTS table from its source table."""
+    for table, select in SEARCH_SOURCES.values():
+        db.execute(f'DELETE FROM {table}')
+        db.execute(f'INSERT INTO {table} (rowid, owner, title, body, keywords) {select}')
@@ -0,0 +1,51 @@
+SYNC_RESOURCES = ('profile', 'photos', 'experiences', 'projects', 'job_analyses', 'blurbs')
+
+
+def parse_cursor(value):
+    """Parse a ``since`` cursor from the query string; raises ValueError."""
+    if value in (None, ''):
+        return 0
+    cursor = int(value)
+    if cursor < 0:
+        raise ValueError('cursor must not be negative')
+    return cursor
+
+
+def current_cursor(db, user_id):
+    row = db.execute(
+        'SELECT COALESCE(MAX(seq), 0) AS cursor FROM sync_log WHERE user_id = ?', (user_id,)
+    ).fetchone()
+    return row['cursor']
+
+
+def since_clause(user_id, resource, since):
+    """Extra WHERE terms that limit a fetch to rows changed after ``since``.
+
+    Returns ``(sql, params)``; both are empty when ``since`` is None.
+    """
+    if since is None:
+        return '', ()
+    return (
+        ' AND id IN (SELECT row_id FROM sync_log '
+        'WHERE user_id = ? AND resource = ? AND seq > ? AND deleted = 0)',
+        (user_id, resource, since),
+    )
+
+
+def changed_resources(db, user_id, since):
+    """Return ``(updated, deleted)`` since the cursor.
+
+    ``updated`` is the set of resources with live changed rows; ``deleted``
+    maps each resource to the ids of its rows deleted since then.
+    """
+    updated = {r['resource'] for r in db.execute(
+        'SELECT DISTINCT resource FROM sync_log WHERE user_id = ? AND seq > ? AND deleted = 0',
+        (user_id, since),
+    )}
+    deleted = {}
+    for row in db.execute(
+        'SELECT resource, row_id FROM sync_log WHERE user_id = ? AND seq > ? AND deleted = 1 ORDER BY seq',
+        (user_id, since),
+    ):
+        deleted.setdefault(row['resource'], []).append(row['row_id'])
+    return updated, deleted
@@ -0,0 +1,133 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from flask import current_app
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor(app):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=app.config.get('TASK_WORKERS', 2),
+                thread_name_prefix='cv-task',
+            )
+    return _executor
+
+
+def submit(fn, *args, **kwargs):
+    """Run ``fn`` outside the request, inside a fresh app context.
+
+    With ``TASKS_RUN_INLINE`` set (the test config) the task runs immediately
+    on the calling thread so it shares the request's database connection.
+    """
+    app = current_app._get_current_object()
+    if app.config.get('TASKS_RUN_INLINE'):
+        fn(*args, **kwargs)
+        return None
+
+    def run():
+        with app.app_context():
+            try:
+                fn(*args, **kwargs)
+            except Exception:
+                app.logger.exception('Background task %s failed', fn.__name__)
+
+    return _get_executor(app).submit(run)
+
+
+# Progress of long-running jobs, shared by every process of the server. The
+# table lives in its own SQLite file (JOBS_DATABASE): an import holds the main
+# database's write lock until it commits, and its progress must still get out.
+_JOBS_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    processed INTEGER NOT NULL DEFAULT 0,
+    total INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    result TEXT,
+    created_at REAL NOT NULL
+)
+'''
+_JOB_FIELDS = ('status', 'processed', 'total', 'error', 'result')
+_FINISHED = ('completed', 'failed')
+_jobs_schema_lock = threading.Lock()
+
+
+@contextmanager
+def _jobs_db():
+    """A short-lived connection to the job store; commits on success."""
+    app = current_app._get_current_object()
+    db = sqlite3.connect(app.config['JOBS_DATABASE'], timeout=app.config.get('DB_BUSY_TIMEOUT', 5.0))
+    db.row_factory = sqlite3.Row
+    try:
+        with _jobs_schema_lock:
+            if not app.extensions.get('jobs_schema'):
+                db.execute('PRAGMA journal_mode=WAL')
+                db.execute(_JOBS_SCHEMA)
+                app.extensions['jobs_schema'] = True
+        with db:
+            yield db
+    finally:
+        db.close()
+
+
+def create_job(user_id, kind, total=0):
+    job = {
+        'id': uuid.uuid4().hex,
+        'user_id': user_id,
+        'kind': kind,
+        'status': 'pending',
+        'processed': 0,
+        'total': total,
+        'error': None,
+        'created_at': time.time(),
+    }
+    retention = current_app.config.get('JOB_RETENTION', 3600)
+    with _jobs_db() as db:
+        db.execute(
+            f'DELETE FROM jobs WHERE status IN ({", ".join("?" * len(_FINISHED))}) AND created_at < ?',
+            (*_FINISHED, job['created_at'] - retention),
+        )
+        db.execute(
+            'INSERT INTO jobs (id, user_id, kind, status, processed, total, error, created_at) '
+            'VALUES (:id, :user_id, :kind, :status, :processed, :total, :error, :created_at)',
+            job,
+        )
+    return dict(job)
+
+
+def update_job(job_id, **fields):
+    unknown = set(fields) - set(_JOB_FIELDS)
+    if unknown:
+        raise ValueError(f'Unknown job fields: {", ".join(sorted(unknown))}')
+    if 'result' in fields:
+        fields['result'] = json.dumps(fields['result'])
+    with _jobs_db() as db:
+        db.execute(
+            f'UPDATE jobs SET {", ".join(f"{name} = ?" for name in fields)} WHERE id = ?',
+            (*fields.values(), job_id),
+        )
+
+
+def get_job(job_id, user_id):
+    """Return a snapshot of the job, or None if it is unknown or not the user's."""
+    with _jobs_db() as db:
+        row = db.execute('SELECT * FROM jobs WHERE id = ? AND user_id = ?', (job_id, user_id)).fetchone()
+    if row is None:
+        return None
+    job = {k: row[k] for k in row.keys() if k not in ('user_id', 'result')}
+    if row['result'] is not None:
+        job['result'] = json.loads(row['result'])
+    return job
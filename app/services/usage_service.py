@@ -0,0 +1,296 @@
+import atexit
+import threading
+import time
+
+from flask import current_app
+
+from app.database import write_transaction
+from app.services.resilience_service import LLMDeadlineExceeded, LLMUnavailableError
+from app.services.task_service import submit
+
+_COLUMNS = (
+    'user_id', 'kind', 'model', 'prompt_tokens', 'completion_tokens', 'cached_tokens',
+    'latency_ms', 'cache_hit', 'outcome', 'created_at',
+)
+
+
+class LLMQuotaExceeded(LLMUnavailableError):
+    """The user has spent their LLM token quota; it refills over time."""
+
+    status_code = 429
+
+
+class TokenBucket:
+    """Token quota of one user: holds up to ``capacity`` tokens and refills
+    ``per_hour`` tokens an hour. Calls take their estimated prompt tokens up
+    front and settle the difference once the provider reports usage, so the
+    level may dip below zero.
+
+    Buckets live in the memory of one process, so with several server
+    processes a user can spend the quota once in each."""
+
+    def __init__(self, capacity, per_hour):
+        self.capacity = capacity
+        self.rate = per_hour / 3600
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, tokens):
+        """Take ``tokens`` if the bucket holds them; otherwise return the
+        seconds until it will (None if it never refills)."""
+        self._refill()
+        # A call bigger than the whole bucket only needs a full one
+        needed = min(tokens, self.capacity)
+        if self.level >= needed:
+            self.level -= tokens
+            return 0
+        if not self.rate:
+            return None
+        return (needed - self.level) / self.rate
+
+    def settle(self, tokens):
+        """Add ``tokens`` (negative for a refund) to what was taken."""
+        self._refill()
+        self.level = min(self.capacity, self.level - tokens)
+
+    @property
+    def full(self):
+        """Whether the bucket has refilled, and is as good as a new one."""
+        self._refill()
+        return self.level >= self.capacity
+
+
+class UsageMeter:
+    """Metered calls of one app, buffered until they are written to
+    llm_usage in a single batch, and its users' token buckets."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = []
+        self.first_at = None
+        self.flushing = False
+        self.buckets = {}
+        self.swept_at = time.monotonic()
+
+
+def _meter(app):
+    return app.extensions.setdefault('llm_usage', UsageMeter())
+
+
+def _bucket(app, user_id):
+    """The user's bucket for the configured quota, or None when quotas are off.
+    Call with the meter's lock held."""
+    capacity = app.config['LLM_USER_TOKEN_QUOTA']
+    if not capacity:
+        return None
+    per_hour = app.config['LLM_USER_TOKENS_PER_HOUR']
+    meter = _meter(app)
+    buckets = meter.buckets
+    if time.monotonic() - meter.swept_at >= app.config['LLM_QUOTA_SWEEP_INTERVAL']:
+        # Drop the buckets of users who have been idle long enough to refill
+        for key in [key for key, b in buckets.items() if b.full]:
+            del buckets[key]
+        meter.swept_at = time.monotonic()
+    bucket = buckets.get(user_id)
+    if bucket is None or (bucket.capacity, bucket.rate * 3600) != (capacity, per_hour):
+        bucket = buckets[user_id] = TokenBucket(capacity, per_hour)
+    return bucket
+
+
+def reserve(app, user_id, kind, model, tokens):
+    """Take ``tokens`` estimated prompt tokens from the user's quota before a
+    call; raises LLMQuotaExceeded, and meters the refusal, when it is spent."""
+    meter = _meter(app)
+    with meter.lock:
+        bucket = _bucket(app, user_id)
+        wait_for = bucket.take(tokens) if bucket is not None else 0
+    if wait_for == 0:
+        return
+    record(app, user_id, kind, model, outcome='quota')
+    raise LLMQuotaExceeded('LLM token quota used up, please retry later', wait_for)
+
+
+def settle(app, user_id, reserved, used):
+    """Charge the user's quota the tokens a call ``used`` instead of the
+    ``reserved`` estimate."""
+    meter = _meter(app)
+    with meter.lock:
+        bucket = _bucket(app, user_id)
+        if bucket is not None:
+            bucket.settle(used - reserved)
+
+
+def quota_status(app, user_id):
+    """The user's quota and the tokens left in it, or None when quotas are off."""
+    meter = _meter(app)
+    with meter.lock:
+        bucket = _bucket(app, user_id)
+        if bucket is None:
+            return None
+        bucket._refill()
+        return {
+            'limit': bucket.capacity,
+            'remaining': max(0, int(bucket.level)),
+            'tokens_per_hour': app.config['LLM_USER_TOKENS_PER_HOUR'],
+        }
+
+
+def outcome(error):
+    """llm_usage outcome of a call that raised ``error``."""
+    if isinstance(error, LLMQuotaExceeded):
+        return 'quota'
+    if isinstance(error, LLMDeadlineExceeded):
+        return 'timeout'
+    if isinstance(error, LLMUnavailableError):
+        return 'unavailable'
+    return 'error'
+
+
+def record(app, user_id, kind, model, prompt_tokens=0, completion_tokens=0, cached_tokens=0,
+           latency=0.0, cache_hit=False, outcome='ok'):
+    """Buffer one call, or response cache hit, for llm_usage.
+
+    Only appends to memory, so it is safe on worker threads and the event
+    loop; ``maybe_flush`` writes the buffer out.
+    """
+    row = (
+        user_id, kind, model, prompt_tokens, completion_tokens, cached_tokens,
+        int(latency * 1000), int(cache_hit), outcome, time.time(),
+    )
+    meter = _meter(app)
+    with meter.lock:
+        if not meter.pending:
+            meter.first_at = time.monotonic()
+        meter.pending.append(row)
+
+
+def maybe_flush():
+    """Queue a background write of the buffered calls once LLM_USAGE_BATCH_SIZE
+    have piled up or the oldest has waited LLM_USAGE_FLUSH_INTERVAL seconds."""
+    app = current_app._get_current_object()
+    meter = _meter(app)
+    with meter.lock:
+        if meter.flushing or not meter.pending:
+            return
+        due = (len(meter.pending) >= app.config['LLM_USAGE_BATCH_SIZE']
+               or time.monotonic() - meter.first_at >= app.config['LLM_USAGE_FLUSH_INTERVAL'])
+        if not due:
+            return
+        meter.flushing = True
+    submit(_flush_queued)
+
+
+def start_flusher(app):
+    """Write the buffer every LLM_USAGE_FLUSH_INTERVAL seconds on a daemon
+    thread, so calls are written even when no further call comes, and once
+    more when the process exits.
+
+    With ``TASKS_RUN_INLINE`` set (the test config) nothing is started;
+    ``maybe_flush`` and ``flush`` write the buffer on the calling thread.
+    """
+    if app.config.get('TASKS_RUN_INLINE'):
+        return
+
+    def flush_in_app():
+        with app.app_context():
+            try:
+                flush()
+            except Exception:
+                app.logger.exception('Writing buffered LLM usage failed')
+
+    def run():
+        while True:
+            time.sleep(app.config['LLM_USAGE_FLUSH_INTERVAL'])
+            flush_in_app()
+
+    threading.Thread(target=run, name='cv-usage-flush', daemon=True).start()
+    atexit.register(flush_in_app)
+
+
+def _flush_queued():
+    try:
+        flush()
+    finally:
+        _meter(current_app).flushing = False
+
+
+def flush():
+    """Write every buffered call to llm_usage in one transaction.
+
+    Rows of users deleted in the meantime are dropped. If the write fails
+    the rows go back to the buffer for the next flush.
+    """
+    meter = _meter(current_app)
+    with meter.lock:
+        rows, meter.pending = meter.pending, []
+    if not rows:
+        return
+    try:
+        with write_transaction() as db:
+            db.executemany(
+                f'INSERT INTO llm_usage ({", ".join(_COLUMNS)}) '
+                f'SELECT {", ".join("?" * len(_COLUMNS))} WHERE EXISTS (SELECT 1 FROM users WHERE id = ?)',
+                [(*row, row[0]) for row in rows],
+            )
+    except Exception:
+        with meter.lock:
+            meter.pending[:0] = rows
+            meter.first_at = time.monotonic()
+        raise
+
+
+def pending_rows(app, user_id):
+    """The user's calls still buffered in this process, as llm_usage rows."""
+    meter = _meter(app)
+    with meter.lock:
+        return [row for row in meter.pending if row[0] == user_id]
+
+
+def usage_report(db, user_id, since, pending=()):
+    """The user's metered calls since Unix time ``since``: totals per call
+    kind and per day. ``pending`` rows, from ``pending_rows``, are counted
+    as if they had been written."""
+    pending = [row for row in pending if row[0] == user_id and row[-1] >= since]
+    source = f'SELECT {", ".join(_COLUMNS)} FROM llm_usage WHERE user_id = ? AND created_at >= ?'
+    params = (user_id, since)
+    if pending:
+        row_sql = f'({", ".join("?" * len(_COLUMNS))})'
+        source += f' UNION ALL VALUES {", ".join([row_sql] * len(pending))}'
+        params += tuple(value for row in pending for value in row)
+    by_kind = [dict(r) for r in db.execute(
+        'SELECT kind, COUNT(*) AS calls, SUM(cache_hit) AS cache_hits, '
+        "SUM(outcome != 'ok') AS failures, SUM(outcome = 'quota') AS refused, "
+        'SUM(prompt_tokens) AS prompt_tokens, SUM(completion_tokens) AS completion_tokens, '
+        'SUM(prompt_tokens + completion_tokens) AS total_tokens, SUM(cached_tokens) AS cached_tokens, '
+        "AVG(CASE WHEN cache_hit = 0 AND outcome = 'ok' THEN latency_ms END) AS avg_latency_ms, "
+        'MAX(latency_ms) AS max_latency_ms '
+        f'FROM ({source}) GROUP BY kind ORDER BY kind',
+        params,
+    )]
+    by_day = [dict(r) for r in db.execute(
+        "SELECT date(created_at, 'unixepoch') AS day, COUNT(*) AS calls, "
+        'SUM(prompt_tokens + completion_tokens) AS total_tokens '
+        f'FROM ({source}) GROUP BY day ORDER BY day',
+        params,
+    )]
+    return {'by_kind': by_kind, 'by_day': by_day}
+
+
+def top_users(db, since, limit=20):
+    """Users who spent the most tokens since Unix time ``since``."""
+    return [dict(r) for r in db.execute(
+        'SELECT u.user_id, users.username, u.calls, u.total_tokens, u.failures, u.refused, u.avg_latency_ms '
+        'FROM ('
+        '  SELECT user_id, COUNT(*) AS calls, SUM(prompt_tokens + completion_tokens) AS total_tokens, '
+        "  SUM(outcome != 'ok') AS failures, SUM(outcome = 'quota') AS refused, "
+        "  AVG(CASE WHEN cache_hit = 0 AND outcome = 'ok' THEN latency_ms END) AS avg_latency_ms "
+        '  FROM llm_usage WHERE created_at >= ? GROUP BY user_id'
+        ') u JOIN users ON users.id = u.user_id '
+        'ORDER BY u.total_tokens DESC LIMIT ?',
+        (since, limit),
+    )]
@@ -2,6 +2,9 @@
  * Fetch wrapper with CSRF token and error handling.
  */
 const Api = {
+    // Last ETag and body per GET url, replayed when the server answers 304
+    validators: new Map(),
+
     getCSRFToken() {
         const meta = document.querySelector('meta[name="csrf-token"]');
         return meta ? meta.getAttribute('content') : '';
@@ -37,7 +40,33 @@ const Api = {
     },
 
     async get(url) {
-        return this.request(url, { method: 'GET' });
+        const cached = this.validators.get(url);
+        const response = await this.request(url, {
+            method: 'GET',
+            cache: 'no-store',
+            headers: cached ? { 'If-None-Match': cached.etag } : {},
+        });
+
+        if (response.status === 304 && cached) {
+            return new Response(cached.body, {
+                status: 200,
+                headers: { 'Content-Type': cached.contentType, 'ETag': cached.etag },
+            });
+        }
+
+        const etag = response.headers.get('ETag');
+        if (response.ok && etag) {
+            this.validators.set(url, {
+                etag,
+                body: await response.clone().text(),
+                contentType: response.headers.get('Content-Type'),
+            });
+        }
+        return response;
+    },
+
+    clearCache() {
+        this.validators.clear();
     },
 
     async post(url, data) {
@@ -50,6 +79,33 @@ const Api = {
         return this.request(url, options);
     },
 
+    // POST whose answer is a text/event-stream; calls onEvent(name, data) as each event arrives.
+    // Error responses sent before the stream starts are returned unread.
+    async stream(url, data, onEvent) {
+        const response = await this.post(url, data);
+        if (!response.ok || !response.body) return response;
+        const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+        let buffer = '';
+        for (;;) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += value;
+            let end;
+            while ((end = buffer.indexOf('\n\n')) !== -1) {
+                const frame = buffer.slice(0, end);
+                buffer = buffer.slice(end + 2);
+                let name = 'message';
+                let payload = '';
+                for (const line of frame.split('\n')) {
+                    if (line.startsWith('event:')) name = line.slice(6).trim();
+                    else if (line.startsWith('data:')) payload += line.slice(5).trim();
+                }
+                if (payload) onEvent(name, JSON.parse(payload));
+            }
+        }
+        return response;
+    },
+
     async put(url, data) {
         return this.request(url, {
             method: 'PUT',
@@ -32,10 +32,12 @@ document.addEventListener('alpine:init', () => {
 
         async checkSession() {
             try {
-                const res = await Api.get('/api/auth/session');
+                // One request hydrates the session and every tab
+                const res = await Api.get('/api/bootstrap');
                 const data = await res.json();
-                this.authenticated = data.authenticated;
+                Alpine.store('bootstrap').set(data);
                 this.user = data.user || null;
+                this.authenticated = data.authenticated;
                 if (!this.authenticated) {
                     this.showLogin = true;
                 }
@@ -50,8 +52,10 @@ document.addEventListener('alpine:init', () => {
                 const res = await Api.post('/api/auth/login', { username, password });
                 const data = await res.json();
                 if (res.ok) {
-                    this.authenticated = true;
+                    const boot = await Api.get('/api/bootstrap');
+                    if (boot.ok) Alpine.store('bootstrap').set(await boot.json());
                     this.user = data.user;
+                    this.authenticated = true;
                     this.showLogin = false;
                     Alpine.store('toast').success('Logged in successfully');
                 } else {
@@ -86,6 +90,8 @@ document.addEventListener('alpine:init', () => {
 
         async logout() {
             await Api.post('/api/auth/logout');
+            Api.clearCache();
+            Alpine.store('bootstrap').clear();
             this.authenticated = false;
             this.user = null;
             this.showLogin = true;
@@ -138,6 +144,59 @@ document.addEventListener('alpine:init', () => {
         },
     });
 
+    // ── Bootstrap Store ──
+    // Payload of /api/bootstrap; tabs read their initial state from it
+    Alpine.store('bootstrap', {
+        data: {},
+        set(payload) {
+            this.data = payload || {};
+            if (this.data.authenticated) Alpine.store('sync').start(this.data.cursor);
+        },
+        get(key) { return this.data[key]; },
+        clear() {
+            this.data = {};
+            Alpine.store('sync').stop();
+        },
+    });
+
+    // ── Sync Store ──
+    // Pulls row-level deltas from /api/changes and broadcasts them to the
+    // tabs as a `sync-changes` window event
+    Alpine.store('sync', {
+        cursor: 0,
+        timer: null,
+        queue: Promise.resolve(),
+
+        start(cursor) {
+            this.stop();
+            this.cursor = cursor || 0;
+            this.timer = setInterval(() => this.pull(), 30000);
+        },
+
+        stop() {
+            clearInterval(this.timer);
+            this.timer = null;
+        },
+
+        pull() {
+            // Serialized so the cursor only moves forward
+            this.queue = this.queue.then(() => this.fetchChanges());
+            return this.queue;
+        },
+
+        async fetchChanges() {
+            try {
+                const res = await Api.get(`/api/changes?since=${this.cursor}`);
+                if (!res.ok) return;
+                const data = await res.json();
+                this.cursor = data.cursor;
+                if (Object.keys(data.changes).length) {
+                    window.dispatchEvent(new CustomEvent('sync-changes', { detail: data.changes }));
+                }
+            } catch {}
+        },
+    });
+
     // ── Navigation Store ──
     Alpine.store('nav', {
         current: 'about',
@@ -169,6 +228,50 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 });
 
+// ── Catch up when the tab becomes visible again or reconnects ──
+['visibilitychange', 'online'].forEach(name => {
+    (name === 'online' ? window : document).addEventListener(name, () => {
+        if (!document.hidden && Alpine.store('auth').authenticated) {
+            Alpine.store('sync').pull();
+        }
+    });
+});
+
+// ── Delta Helpers ──
+
+function compareBy(...keys) {
+    return (a, b) => {
+        for (const key of keys) {
+            const desc = key.startsWith('-');
+            const field = desc ? key.slice(1) : key;
+            if (a[field] < b[field]) return desc ? 1 : -1;
+            if (a[field] > b[field]) return desc ? -1 : 1;
+        }
+        return 0;
+    };
+}
+
+// Apply an {upserted, deleted} delta from /api/changes to a list of rows
+function mergeRows(rows, delta, compare) {
+    const replaced = new Set([...delta.deleted, ...delta.upserted.map(r => r.id)]);
+    return rows.filter(r => !replaced.has(r.id)).concat(delta.upserted).sort(compare);
+}
+
+// Deltas for the rows our own writes return
+const upserted = (...rows) => ({ upserted: rows, deleted: [] });
+const deleted = id => ({ upserted: [], deleted: [id] });
+
+// Poll a background job at `${url}/${job.id}` until it completes or fails
+async function waitForJob(url, job, interval = 1000) {
+    while (job.status !== 'completed' && job.status !== 'failed') {
+        await new Promise(resolve => setTimeout(resolve, interval));
+        const res = await Api.get(`${url}/${job.id}`);
+        if (!res.ok) throw new Error('Job status unavailable');
+        job = await res.json();
+    }
+    return job;
+}
+
 // ── Tab Component Functions ──
 
 function aboutTab() {
@@ -179,8 +282,16 @@ function aboutTab() {
         photoUploading: false,
 
         async init() {
-            await this.loadProfile();
-            await this.loadPhotos();
+            const boot = Alpine.store('bootstrap');
+            if (boot.get('profile')) this.profile = boot.get('profile');
+            else await this.loadProfile();
+            if (boot.get('photos')) this.photos = boot.get('photos');
+            else await this.loadPhotos();
+        },
+
+        applyChanges(changes) {
+            if (changes.profile) this.profile = changes.profile;
+            if (changes.photos) this.photos = mergeRows(this.photos, changes.photos, compareBy('sort_order', 'id'));
         },
 
         async loadProfile() {
@@ -194,8 +305,12 @@ function aboutTab() {
             this.loading = true;
             try {
                 const res = await Api.put('/api/profile', this.profile);
-                if (res.ok) Alpine.store('toast').success('Profile saved');
-                else Alpine.store('toast').error('Failed to save profile');
+                if (res.ok) {
+                    this.profile = (await res.json()).profile;
+                    Alpine.store('toast').success('Profile saved');
+                } else {
+                    Alpine.store('toast').error('Failed to save profile');
+                }
             } catch {
                 Alpine.store('toast').error('Failed to save profile');
             } finally {
@@ -218,11 +333,11 @@ function aboutTab() {
                 const formData = new FormData();
                 formData.append('photo', file);
                 const res = await Api.post('/api/photos', formData);
+                const data = await res.json();
                 if (res.ok) {
-                    await this.loadPhotos();
+                    this.applyChanges({ photos: upserted(data.photo) });
                     Alpine.store('toast').success('Photo uploaded');
                 } else {
-                    const data = await res.json();
                     Alpine.store('toast').error(data.error || 'Upload failed');
                 }
             } catch {
@@ -238,7 +353,7 @@ function aboutTab() {
             try {
                 const res = await Api.delete(`/api/photos/${id}`);
                 if (res.ok) {
-                    await this.loadPhotos();
+                    this.applyChanges({ photos: deleted(id) });
                     Alpine.store('toast').success('Photo deleted');
                 }
             } catch {
@@ -249,7 +364,7 @@ function aboutTab() {
         async setPrimary(id) {
             try {
                 const res = await Api.put(`/api/photos/${id}/primary`);
-                if (res.ok) await this.loadPhotos();
+                if (res.ok) this.photos = (await res.json()).photos;
             } catch {}
         },
 
@@ -263,13 +378,23 @@ function lifeTab() {
     return {
         experiences: [],
         filter: 'all',
+        query: '',
+        matches: null,
         editing: null,
         form: { category: 'work', title: '', organization: '', start_date: '', end_date: '', description: '', keywords: '' },
         showForm: false,
         loading: false,
 
         async init() {
-            await this.load();
+            const experiences = Alpine.store('bootstrap').get('experiences');
+            if (experiences) this.experiences = experiences;
+            else await this.load();
+        },
+
+        applyChanges(changes) {
+            if (changes.experiences) {
+                this.experiences = mergeRows(this.experiences, changes.experiences, compareBy('sort_key', 'id'));
+            }
         },
 
         async load() {
@@ -279,9 +404,28 @@ function lifeTab() {
             } catch {}
         },
 
+        async search() {
+            const q = this.query.trim();
+            if (!q) {
+                this.matches = null;
+                return;
+            }
+            try {
+                const res = await Api.get(`/api/search?types=experiences&q=${encodeURIComponent(q)}`);
+                if (res.ok && q === this.query.trim()) {
+                    this.matches = (await res.json()).results.map(r => r.id);
+                }
+            } catch {}
+        },
+
         get filtered() {
-            if (this.filter === 'all') return this.experiences;
-            return this.experiences.filter(e => e.category === this.filter);
+            let rows = this.experiences;
+            if (this.matches) {
+                const byId = new Map(rows.map(e => [e.id, e]));
+                rows = this.matches.map(id => byId.get(id)).filter(Boolean);
+            }
+            if (this.filter === 'all') return rows;
+            return rows.filter(e => e.category === this.filter);
         },
 
         resetForm() {
@@ -305,12 +449,12 @@ function lifeTab() {
                 } else {
                     res = await Api.post('/api/experiences', this.form);
                 }
+                const data = await res.json();
                 if (res.ok) {
-                    await this.load();
+                    this.applyChanges({ experiences: upserted(data.experience) });
                     this.resetForm();
                     Alpine.store('toast').success('Experience saved');
                 } else {
-                    const data = await res.json();
                     Alpine.store('toast').error(data.error || 'Save failed');
                 }
             } catch {
@@ -325,7 +469,7 @@ function lifeTab() {
             try {
                 const res = await Api.delete(`/api/experiences/${id}`);
                 if (res.ok) {
-                    await this.load();
+                    this.applyChanges({ experiences: deleted(id) });
                     Alpine.store('toast').success('Experience deleted');
                 }
             } catch {
@@ -344,7 +488,15 @@ function projectsTab() {
         loading: false,
 
         async init() {
-            await this.load();
+            const projects = Alpine.store('bootstrap').get('projects');
+            if (projects) this.projects = projects;
+            else await this.load();
+        },
+
+        applyChanges(changes) {
+            if (changes.projects) {
+                this.projects = mergeRows(this.projects, changes.projects, compareBy('sort_key', 'id'));
+            }
         },
 
         async load() {
@@ -375,12 +527,12 @@ function projectsTab() {
                 } else {
                     res = await Api.post('/api/projects', this.form);
                 }
+                const data = await res.json();
                 if (res.ok) {
-                    await this.load();
+                    this.applyChanges({ projects: upserted(data.project) });
                     this.resetForm();
                     Alpine.store('toast').success('Project saved');
                 } else {
-                    const data = await res.json();
                     Alpine.store('toast').error(data.error || 'Save failed');
                 }
             } catch {
@@ -395,7 +547,7 @@ function projectsTab() {
             try {
                 const res = await Api.delete(`/api/projects/${id}`);
                 if (res.ok) {
-                    await this.load();
+                    this.applyChanges({ projects: deleted(id) });
                     Alpine.store('toast').success('Project deleted');
                 }
             } catch {
@@ -411,9 +563,18 @@ function jobTab() {
         jobDescription: '',
         analyzing: false,
         loading: false,
+        provisional: null,
 
         async init() {
-            await this.load();
+            const analyses = Alpine.store('bootstrap').get('analyses');
+            if (analyses) this.analyses = analyses;
+            else await this.load();
+        },
+
+        applyChanges(changes) {
+            if (changes.job_analyses) {
+                this.analyses = mergeRows(this.analyses, changes.job_analyses, compareBy('-created_at', '-id'));
+            }
         },
 
         async load() {
@@ -429,15 +590,24 @@ function jobTab() {
                 return;
             }
             this.analyzing = true;
+            this.provisional = null;
+            const body = { job_description: this.jobDescription };
+            // The local estimate usually lands long before the LLM answers
+            Api.post('/api/job/prescore', body)
+                .then(async res => { if (res.ok && this.analyzing) this.provisional = await res.json(); })
+                .catch(() => {});
             try {
-                const res = await Api.post('/api/job/analyze', { job_description: this.jobDescription });
-                if (res.ok) {
-                    await this.load();
+                // The analysis runs server-side as a job; poll it rather than hold a request open
+                const res = await Api.post('/api/job/analyze/async', body);
+                const data = await res.json();
+                const job = res.ok ? await waitForJob('/api/job/analyze', data.job) : null;
+                if (job && job.status === 'completed') {
+                    this.analyses = job.result.analyses;
                     this.jobDescription = '';
+                    this.provisional = null;
                     Alpine.store('toast').success('Job analyzed successfully');
                 } else {
-                    const data = await res.json();
-                    Alpine.store('toast').error(data.error || 'Analysis failed');
+                    Alpine.store('toast').error((job ? `Analysis failed: ${job.error}` : data.error) || 'Analysis failed');
                 }
             } catch {
                 Alpine.store('toast').error('Analysis failed');
@@ -449,7 +619,7 @@ function jobTab() {
         async activate(id) {
             try {
                 const res = await Api.put(`/api/job/analyses/${id}/activate`);
-                if (res.ok) await this.load();
+                if (res.ok) this.analyses = (await res.json()).analyses;
             } catch {}
         },
 
@@ -458,7 +628,7 @@ function jobTab() {
             try {
                 const res = await Api.delete(`/api/job/analyses/${id}`);
                 if (res.ok) {
-                    await this.load();
+                    this.applyChanges({ job_analyses: deleted(id) });
                     Alpine.store('toast').success('Analysis deleted');
                 }
             } catch {}
@@ -482,8 +652,11 @@ function blurbsTab() {
         editText: '',
 
         async init() {
-            await this.loadTemplates();
-            await this.load();
+            const boot = Alpine.store('bootstrap');
+            if (boot.get('templates')) this.setTemplates(boot.get('templates'));
+            else await this.loadTemplates();
+            if (boot.get('blurbs')) this.blurbs = boot.get('blurbs');
+            else await this.load();
         },
 
         async loadTemplates() {
@@ -491,14 +664,18 @@ function blurbsTab() {
                 const res = await Api.get('/api/settings/templates');
                 if (res.ok) {
                     const data = await res.json();
-                    this.templates = data.templates || [];
-                    if (this.templates.length > 0) {
-                        this.templateConfig = this.templates.find(t => t.name === this.selectedTemplate) || this.templates[0];
-                    }
+                    this.setTemplates(data.templates || []);
                 }
             } catch {}
         },
 
+        setTemplates(templates) {
+            this.templates = templates;
+            if (this.templates.length > 0) {
+                this.templateConfig = this.templates.find(t => t.name === this.selectedTemplate) || this.templates[0];
+            }
+        },
+
         async load() {
             try {
                 const res = await Api.get(`/api/blurbs?template_name=${this.selectedTemplate}`);
@@ -506,6 +683,15 @@ function blurbsTab() {
             } catch {}
         },
 
+        applyChanges(changes) {
+            if (!changes.blurbs) return;
+            const delta = {
+                upserted: changes.blurbs.upserted.filter(b => b.template_name === this.selectedTemplate),
+                deleted: changes.blurbs.deleted,
+            };
+            this.blurbs = mergeRows(this.blurbs, delta, compareBy('field_key', 'id'));
+        },
+
         getBlurbsForField(fieldKey) {
             return this.blurbs.filter(b => b.field_key === fieldKey);
         },
@@ -518,14 +704,18 @@ function blurbsTab() {
         async generate(fieldKey) {
             this.generating[fieldKey] = true;
             try {
-                const res = await Api.post('/api/blurbs/generate', {
+                // Each suggestion shows up as soon as the model has written it
+                const res = await Api.stream('/api/blurbs/generate/stream', {
                     field_key: fieldKey,
                     template_name: this.selectedTemplate,
+                    // Asking again for a field that has blurbs wants new ones, not the cached answer
+                    bypass_cache: this.getBlurbsForField(fieldKey).length > 0,
+                }, (event, data) => {
+                    if (event === 'blurb') this.applyChanges({ blurbs: upserted(data) });
+                    else if (event === 'done') Alpine.store('toast').success('Blurbs generated');
+                    else if (event === 'error') Alpine.store('toast').error(data.error);
                 });
-                if (res.ok) {
-                    await this.load();
-                    Alpine.store('toast').success('Blurbs generated');
-                } else {
+                if (!res.ok) {
                     const data = await res.json();
                     Alpine.store('toast').error(data.error || 'Generation failed');
                 }
@@ -536,10 +726,37 @@ function blurbsTab() {
             }
         },
 
+        async generateAll() {
+            const fields = this.blurbFields().map(s => s.key);
+            fields.forEach(key => { this.generating[key] = true; });
+            try {
+                // Sections report in as they finish; the rows arrive together once all are stored
+                const res = await Api.stream('/api/blurbs/generate-all', {
+                    template_name: this.selectedTemplate,
+                }, (event, data) => {
+                    if (event === 'section') {
+                        this.generating[data.field_key] = false;
+                        if (data.error) Alpine.store('toast').error(data.error);
+                    } else if (event === 'done') {
+                        this.applyChanges({ blurbs: upserted(...data.blurbs) });
+                        Alpine.store('toast').success(data.message);
+                    }
+                });
+                if (!res.ok) {
+                    const data = await res.json();
+                    Alpine.store('toast').error(data.error || 'Generation failed');
+                }
+            } catch {
+                Alpine.store('toast').error('Generation failed');
+            } finally {
+                fields.forEach(key => { this.generating[key] = false; });
+            }
+        },
+
         async updateBlurb(id, status, userText) {
             try {
                 const res = await Api.put(`/api/blurbs/${id}`, { status, user_text: userText || '' });
-                if (res.ok) await this.load();
+                if (res.ok) this.applyChanges({ blurbs: upserted((await res.json()).blurb) });
             } catch {
                 Alpine.store('toast').error('Update failed');
             }
@@ -612,15 +829,19 @@ function generateTab() {
 
 function settingsTab() {
     return {
-        settings: { openai_api_key_set: false, selected_template: 'classic', sentences_per_field: 3, font_size: 11 },
+        settings: { openai_api_key_set: false, selected_template: 'classic', sentences_per_field: 3, font_size: 11, llm_cache_enabled: true },
         apiKey: '',
         templates: [],
         loading: false,
         importing: false,
+        importProgress: '',
 
         async init() {
-            await this.loadSettings();
-            await this.loadTemplates();
+            const boot = Alpine.store('bootstrap');
+            if (boot.get('settings')) this.settings = boot.get('settings');
+            else await this.loadSettings();
+            if (boot.get('templates')) this.templates = boot.get('templates');
+            else await this.loadTemplates();
         },
 
         async loadSettings() {
@@ -647,17 +868,18 @@ function settingsTab() {
                     selected_template: this.settings.selected_template,
                     sentences_per_field: this.settings.sentences_per_field,
                     font_size: this.settings.font_size,
+                    llm_cache_enabled: this.settings.llm_cache_enabled,
                 };
                 if (this.apiKey) {
                     payload.openai_api_key = this.apiKey;
                 }
                 const res = await Api.put('/api/settings', payload);
+                const data = await res.json();
                 if (res.ok) {
                     this.apiKey = '';
-                    await this.loadSettings();
+                    this.settings = data.settings;
                     Alpine.store('toast').success('Settings saved');
                 } else {
-                    const data = await res.json();
                     Alpine.store('toast').error(data.error || 'Save failed');
                 }
             } catch {
@@ -667,30 +889,48 @@ function settingsTab() {
             }
         },
 
-        async exportData() {
-            window.open('/api/data/export', '_blank');
+        async exportData(url = '/api/data/export') {
+            window.open(url, '_blank');
         },
 
-        async importData(event) {
+        async importData(event, url = '/api/data/import') {
             const file = event.target.files[0];
             if (!file) return;
             this.importing = true;
             try {
                 const formData = new FormData();
                 formData.append('file', file);
-                const res = await Api.post('/api/data/import', formData);
-                if (res.ok) {
+                const res = await Api.post(url, formData);
+                const data = await res.json();
+                if (!res.ok) {
+                    Alpine.store('toast').error(data.error || 'Import failed');
+                    return;
+                }
+                const job = await this.waitForImport(data.job);
+                if (job.status === 'completed') {
+                    await Alpine.store('sync').pull();
                     Alpine.store('toast').success('Data imported successfully');
                 } else {
-                    const data = await res.json();
-                    Alpine.store('toast').error(data.error || 'Import failed');
+                    Alpine.store('toast').error(job.error || 'Import failed');
                 }
             } catch {
                 Alpine.store('toast').error('Import failed');
             } finally {
                 this.importing = false;
+                this.importProgress = '';
                 event.target.value = '';
             }
         },
+
+        async waitForImport(job) {
+            while (job.status !== 'completed' && job.status !== 'failed') {
+                this.importProgress = job.total ? `${Math.round(100 * job.processed / job.total)}%` : '';
+                await new Promise(resolve => setTimeout(resolve, 1000));
+                const res = await Api.get(`/api/data/import/${job.id}`);
+                if (!res.ok) throw new Error('Import status unavailable');
+                job = await res.json();
+            }
+            return job;
+        },
     };
 }
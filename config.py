@@ -30,6 +30,71 @@ class Config:
 
     LATEX_TIMEOUT = 30  # seconds
 
+    BULK_MAX_OPERATIONS = 500  # per /bulk request
+    SORT_KEY_MAX_LENGTH = 16  # respace a user's list once a sort key grows past this
+
+    TASK_WORKERS = 2  # background task threads
+    JOB_RETENTION = 3600  # seconds a finished job's progress stays queryable
+    JOBS_DATABASE = os.path.join(INSTANCE_PATH, 'jobs.db')  # job progress, shared by all server processes
+
+    IMPORT_MAX_BYTES = 50 * 1024 * 1024  # overrides MAX_CONTENT_LENGTH for data imports
+    IMPORT_MAX_RECORD_BYTES = 1024 * 1024  # largest single record in an import file
+    IMPORT_BATCH_SIZE = 500  # rows per executemany during import
+    ARCHIVE_MAX_BYTES = 200 * 1024 * 1024  # overrides MAX_CONTENT_LENGTH for archive restores
+    ARCHIVE_MAX_FILE_BYTES = 50 * 1024 * 1024  # largest single file inside an archive
+    LIST_PAGE_SIZE = 50  # rows per page when a list is requested with a cursor but no limit
+    LIST_MAX_LIMIT = 200  # largest ?limit= accepted by list endpoints
+    EXPORT_CHUNK_SIZE = 64 * 1024  # characters buffered per streamed export chunk
+    SEARCH_DEFAULT_LIMIT = 20  # hits returned by /api/search without ?limit=
+    SEARCH_MAX_LIMIT = 100  # largest ?limit= accepted by /api/search
+
+    PROMPT_PRUNING = True  # send only the most relevant experiences/projects to the LLM
+    PROMPT_PRUNING_CONTROL_PERCENT = 0  # share of users kept on full prompts as an A/B control arm
+    PROMPT_ITEM_TOKEN_BUDGET = 1500  # estimated tokens allowed for the background items of one prompt
+    PROMPT_MAX_ITEMS = 12  # most background items included in one prompt
+    PROMPT_BACKGROUND_CACHE_SIZE = 256  # rendered candidate backgrounds memoized per process
+    JOB_DESCRIPTION_TOKEN_BUDGET = 3000  # longer job descriptions are summarized before analysis
+    JOB_CHUNK_TOKENS = 1500  # estimated tokens per chunk summarized in parallel
+    JOB_SUMMARY_MAX_TOKENS = 400  # completion limit for each chunk summary
+    JOB_SUMMARY_WORKERS = 4  # concurrent chunk summaries per analysis
+    JOB_REDUCE_ROUNDS = 3  # summarize-the-summaries passes before the text is cut to fit
+    LLM_PROVIDER = os.environ.get('LLM_PROVIDER', 'openai')  # 'openai' (or any OpenAI-compatible server) or 'fake'
+    LLM_MODEL = os.environ.get('LLM_MODEL', 'gpt-4o-mini')  # model name sent with every completion request
+    LLM_BASE_URL = os.environ.get('LLM_BASE_URL')  # e.g. http://localhost:8000/v1 for a local OpenAI-compatible server
+    LLM_API_KEY = os.environ.get('LLM_API_KEY')  # server-wide key for users who have not set their own
+    LLM_FAKE_LATENCY = float(os.environ.get('LLM_FAKE_LATENCY', 0.5))  # median seconds to the fake's first token
+    LLM_FAKE_LATENCY_SIGMA = float(os.environ.get('LLM_FAKE_LATENCY_SIGMA', 0.5))  # lognormal spread; 0 is constant
+    LLM_FAKE_TOKEN_DELAY = float(os.environ.get('LLM_FAKE_TOKEN_DELAY', 0.0))  # seconds per generated token
+    LLM_FAKE_ERROR_RATE = float(os.environ.get('LLM_FAKE_ERROR_RATE', 0.0))  # share of fake calls that fail
+    LLM_FAKE_ERROR_STATUS = int(os.environ.get('LLM_FAKE_ERROR_STATUS', 500))  # HTTP status of injected failures
+    LLM_FAKE_SEED = int(os.environ.get('LLM_FAKE_SEED', 0))  # seeds the fake's latency and error draws
+    OPENAI_CLIENT_CACHE_SIZE = 64  # OpenAI clients (and their connection pools) kept alive per process
+    OPENAI_CLIENT_TTL = 900  # seconds before a cached client is rebuilt
+    LLM_USER_CONCURRENCY = 3  # most model calls one user can have in flight at once
+    LLM_CACHE = True  # serve repeated analyses and blurb generations from llm_cache
+    LLM_CACHE_TTL = 7 * 24 * 3600  # seconds a cached completion stays valid
+    LLM_CACHE_MAX_ENTRIES = 5000  # least recently used completions beyond this are evicted
+    LLM_REQUEST_DEADLINE = 120  # seconds an endpoint allows for all of its model calls, retries included
+    LLM_ATTEMPT_TIMEOUT = 60  # seconds one model call may take before it is abandoned and retried
+    LLM_RETRIES = 3  # extra attempts after a 408/409/429/5xx, timeout or connection error
+    LLM_RETRY_BASE_DELAY = 0.5  # seconds, base of the jittered exponential backoff (a longer Retry-After wins)
+    LLM_RETRY_MAX_DELAY = 20  # cap on one jittered backoff sleep
+    LLM_HEDGE = False  # send a second copy of a call once it runs past the usual latency of its kind
+    LLM_HEDGE_PERCENTILE = 95  # latency percentile, over recent calls of the same kind, that triggers a hedge
+    LLM_BREAKER_THRESHOLD = 5  # consecutive provider failures (5xx, timeouts) that open the circuit breaker
+    LLM_BREAKER_COOLDOWN = 30  # seconds calls fail fast once the breaker is open, before a probe is let through
+    # Token quotas are kept per server process: with N processes a user can spend N times the quota
+    LLM_USER_TOKEN_QUOTA = 200000  # tokens one user can spend in a burst; 0 turns quotas off
+    LLM_USER_TOKENS_PER_HOUR = 100000  # rate at which a spent quota refills
+    LLM_QUOTA_SWEEP_INTERVAL = 300  # seconds between sweeps that forget the quotas of users who have refilled
+    LLM_USAGE_BATCH_SIZE = 100  # metered calls buffered in memory before they are written to llm_usage
+    LLM_USAGE_FLUSH_INTERVAL = 10  # seconds the oldest buffered call may wait before the buffer is written
+    LLM_USAGE_MAX_DAYS = 365  # longest ?days= window accepted by /api/usage
+
+    DB_BUSY_TIMEOUT = 5.0  # seconds a connection waits on a locked database
+    DB_WRITE_RETRIES = 5  # extra BEGIN IMMEDIATE attempts once the busy timeout expires
+    DB_WRITE_RETRY_DELAY = 0.05  # seconds, base of the jittered exponential backoff
+
 
 class DevConfig(Config):
     DEBUG = True
@@ -44,6 +109,8 @@ class TestConfig(Config):
     WTF_CSRF_ENABLED = False
     RATELIMIT_ENABLED = False
     DATABASE = ':memory:'
+    TASKS_RUN_INLINE = True
     INSTANCE_PATH = os.path.join(basedir, 'instance', 'test')
+    JOBS_DATABASE = os.path.join(INSTANCE_PATH, 'jobs.db')
     UPLOAD_FOLDER = os.path.join(INSTANCE_PATH, 'uploads')
     GENERATED_FOLDER = os.path.join(INSTANCE_PATH, 'generated')
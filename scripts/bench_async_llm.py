@@ -0,0 +1,155 @@
+"""Compare blocking and event-loop job analysis against a local fake OpenAI server.
+
+Each simulated user sends one job description to analyze. The fake server
+answers every chat completion after ``--delay`` seconds. ``sync`` posts to
+/api/job/analyze from ``--threads`` worker threads, which stand in for the
+web server's threads, so each thread is parked for the whole completion.
+``async`` posts to /api/job/analyze/async from the same threads and waits for
+the jobs, whose completions run as coroutines on the shared event loop.
+
+Usage:
+    python scripts/bench_async_llm.py --users 64 --threads 8 --delay 0.5
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app  # noqa: E402
+from app.database import write_transaction  # noqa: E402
+from app.services.crypto_service import encrypt_api_key  # noqa: E402
+from app.services.task_service import get_job  # noqa: E402
+from config import TestConfig  # noqa: E402
+
+_LENGTH_RE = re.compile(rb'content-length:\s*(\d+)', re.IGNORECASE)
+_CONTENT = json.dumps({'extracted_keywords': ['python'], 'focus_suggestions': [], 'alignment_data': []})
+
+
+def start_fake_openai(delay):
+    """Serve chat completions on a free port after ``delay`` seconds; returns the base URL."""
+    loop = asyncio.new_event_loop()
+    body = json.dumps({
+        'id': 'bench', 'object': 'chat.completion', 'created': 0, 'model': 'fake',
+        'choices': [{
+            'index': 0, 'finish_reason': 'stop',
+            'message': {'role': 'assistant', 'content': _CONTENT},
+        }],
+        'usage': {'prompt_tokens': 10, 'completion_tokens': 5, 'total_tokens': 15},
+    }).encode()
+    response = b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n%s' % (
+        len(body), body,
+    )
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b'\r\n\r\n')
+                match = _LENGTH_RE.search(head)
+                await reader.readexactly(int(match.group(1)) if match else 0)
+                await asyncio.sleep(delay)
+                writer.write(response)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = loop.run_until_complete(asyncio.start_server(handle, '127.0.0.1', 0, backlog=1024))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.sockets[0].getsockname()[1]}/v1'
+
+
+def make_app(db_path):
+    instance_path = os.path.dirname(db_path)
+    config = type('BenchConfig', (TestConfig,), {
+        'DATABASE': db_path,
+        'INSTANCE_PATH': instance_path,
+        'UPLOAD_FOLDER': os.path.join(instance_path, 'uploads'),
+        'GENERATED_FOLDER': os.path.join(instance_path, 'generated'),
+        'JOBS_DATABASE': os.path.join(instance_path, 'jobs.db'),
+        'TASKS_RUN_INLINE': False,
+        'LLM_CACHE': False,
+    })
+    return create_app(config)
+
+
+def create_users(app, prefix, count):
+    """Users with an API key set, created directly to skip password hashing."""
+    with app.app_context(), write_transaction() as db:
+        key = encrypt_api_key('sk-bench')
+        user_ids = []
+        for i in range(count):
+            user_id = db.execute(
+                'INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)',
+                (f'{prefix}{i}', f'{prefix}{i}@bench.local', '!'),
+            ).lastrowid
+            db.execute('INSERT INTO user_settings (user_id, openai_api_key_enc) VALUES (?, ?)', (user_id, key))
+            user_ids.append(user_id)
+    return user_ids
+
+
+def logged_in_client(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+    return client
+
+
+def run_sync(app, user_ids, threads):
+    def analyze(user_id):
+        res = logged_in_client(app, user_id).post('/api/job/analyze', json={'job_description': 'Python developer'})
+        assert res.status_code == 201, res.get_json()
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(analyze, user_ids))
+
+
+def run_async(app, user_ids, threads):
+    def start(user_id):
+        res = logged_in_client(app, user_id).post(
+            '/api/job/analyze/async', json={'job_description': 'Python developer'},
+        )
+        assert res.status_code == 202, res.get_json()
+        return user_id, res.get_json()['job']['id']
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        pending = list(pool.map(start, user_ids))
+    while pending:
+        with app.app_context():
+            jobs = [(user_id, job_id, get_job(job_id, user_id)) for user_id, job_id in pending]
+        failed = [job for _, _, job in jobs if job['status'] == 'failed']
+        assert not failed, failed[0]['error']
+        pending = [(user_id, job_id) for user_id, job_id, job in jobs if job['status'] != 'completed']
+        time.sleep(0.01)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=64, help='concurrent users, one analysis each')
+    parser.add_argument('--threads', type=int, default=8, help='request threads, as in a threaded web server')
+    parser.add_argument('--delay', type=float, default=0.5, help='seconds the fake server takes per completion')
+    args = parser.parse_args()
+
+    os.environ['OPENAI_BASE_URL'] = start_fake_openai(args.delay)
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(os.path.join(tmp, 'bench.db'))
+        print(f'{args.users} users, {args.threads} request threads, {args.delay:.2f}s per completion')
+        print(f'{"mode":<6} {"elapsed":>8} {"analyses/s":>11}')
+        for mode, run in (('sync', run_sync), ('async', run_async)):
+            user_ids = create_users(app, mode, args.users)
+            started = time.perf_counter()
+            run(app, user_ids, args.threads)
+            elapsed = time.perf_counter() - started
+            print(f'{mode:<6} {elapsed:>7.2f}s {args.users / elapsed:>11.1f}')
+
+
+if __name__ == '__main__':
+    main()
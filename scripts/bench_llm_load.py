@@ -0,0 +1,149 @@
+"""Load-test job analysis and blurb generation against an LLM provider.
+
+By default the app uses the offline fake provider, so no key or network is
+needed. Its latency, per-token delay and error rate come from the options
+below. ``--base-url`` points the app at an OpenAI-compatible server instead,
+such as a local vLLM or llama.cpp server. ``--concurrency`` worker threads,
+each logged in as its own user, post ``--requests`` requests to each of
+/api/job/analyze and /api/blurbs/generate. The script reports throughput and
+latency percentiles per endpoint. The response cache is off, so every
+request reaches the provider.
+
+Usage:
+    python scripts/bench_llm_load.py --concurrency 16 --requests 200 --latency 0.3 --error-rate 0.05
+    python scripts/bench_llm_load.py --base-url http://localhost:8000/v1 --model llama3
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app  # noqa: E402
+from app.database import write_transaction  # noqa: E402
+from config import TestConfig  # noqa: E402
+
+_JOBS = (
+    'Backend engineer: Python, Flask and PostgreSQL. You will own our billing APIs.',
+    'Data engineer building Kafka and Spark pipelines on AWS, with Airflow and dbt.',
+    'Frontend developer: TypeScript, React and accessibility. Design system experience a plus.',
+    'Site reliability engineer running Kubernetes, Terraform and Prometheus at scale.',
+)
+_EXPERIENCES = (
+    ('Backend Developer', 'Acme', 'Built Flask APIs on PostgreSQL serving 2M requests a day.', 'python, flask, sql'),
+    ('Data Engineer', 'Globex', 'Moved batch ETL to Kafka streams and Spark jobs.', 'kafka, spark, airflow'),
+    ('SRE', 'Initech', 'Ran Kubernetes clusters with Terraform and Prometheus alerting.', 'kubernetes, terraform'),
+)
+
+
+def make_app(db_path, args):
+    instance_path = os.path.dirname(db_path)
+    config = type('BenchConfig', (TestConfig,), {
+        'DATABASE': db_path,
+        'INSTANCE_PATH': instance_path,
+        'UPLOAD_FOLDER': os.path.join(instance_path, 'uploads'),
+        'GENERATED_FOLDER': os.path.join(instance_path, 'generated'),
+        'JOBS_DATABASE': os.path.join(instance_path, 'jobs.db'),
+        'LLM_CACHE': False,
+        'LLM_PROVIDER': 'openai' if args.base_url else 'fake',
+        'LLM_BASE_URL': args.base_url,
+        'LLM_API_KEY': args.api_key,
+        'LLM_MODEL': args.model or TestConfig.LLM_MODEL,
+        'LLM_FAKE_LATENCY': args.latency,
+        'LLM_FAKE_LATENCY_SIGMA': args.sigma,
+        'LLM_FAKE_TOKEN_DELAY': args.token_delay,
+        'LLM_FAKE_ERROR_RATE': args.error_rate,
+        'LLM_FAKE_ERROR_STATUS': args.error_status,
+        'LLM_FAKE_SEED': args.seed,
+    })
+    return create_app(config)
+
+
+def create_users(app, count):
+    """Users with a small background, created directly to skip password hashing."""
+    with app.app_context(), write_transaction() as db:
+        user_ids = []
+        for i in range(count):
+            user_id = db.execute(
+                'INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)',
+                (f'bench{i}', f'bench{i}@bench.local', '!'),
+            ).lastrowid
+            db.execute('INSERT INTO user_settings (user_id) VALUES (?)', (user_id,))
+            db.executemany(
+                'INSERT INTO experiences (user_id, category, title, organization, description, keywords) '
+                "VALUES (?, 'work', ?, ?, ?, ?)",
+                [(user_id, *experience) for experience in _EXPERIENCES],
+            )
+            user_ids.append(user_id)
+    return user_ids
+
+
+def logged_in_client(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+    return client
+
+
+def run(app, user_ids, requests, url, body):
+    """Send ``requests`` posts to ``url`` from one thread per user.
+
+    Returns the elapsed seconds, each request's latency and a count of
+    response statuses.
+    """
+    latencies, statuses = [], Counter()
+
+    def worker(slot):
+        client = logged_in_client(app, user_ids[slot])
+        for i in range(slot, requests, len(user_ids)):
+            started = time.perf_counter()
+            res = client.post(url, json=body(i))
+            latencies.append(time.perf_counter() - started)
+            statuses[res.status_code] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(user_ids)) as pool:
+        list(pool.map(worker, range(len(user_ids))))
+    return time.perf_counter() - started, latencies, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent users, one request at a time each')
+    parser.add_argument('--requests', type=int, default=100, help='requests per endpoint')
+    parser.add_argument('--latency', type=float, default=0.5, help='fake provider: median seconds to first token')
+    parser.add_argument('--sigma', type=float, default=0.5, help='fake provider: lognormal latency spread')
+    parser.add_argument('--token-delay', type=float, default=0.0, help='fake provider: seconds per token')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fake provider: share of failing calls')
+    parser.add_argument('--error-status', type=int, default=500, help='fake provider: HTTP status of failures')
+    parser.add_argument('--seed', type=int, default=0, help='fake provider: seed for latency and error draws')
+    parser.add_argument('--base-url', help='benchmark this OpenAI-compatible server instead of the fake provider')
+    parser.add_argument('--api-key', default='sk-bench', help='key sent to --base-url')
+    parser.add_argument('--model', help='model name sent with each request')
+    args = parser.parse_args()
+
+    endpoints = (
+        ('analyze', '/api/job/analyze', lambda i: {'job_description': f'{_JOBS[i % len(_JOBS)]} (posting {i})'}),
+        ('blurbs', '/api/blurbs/generate', lambda i: {'field_key': 'summary', 'bypass_cache': True}),
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(os.path.join(tmp, 'bench.db'), args)
+        user_ids = create_users(app, args.concurrency)
+        provider = args.base_url or f'fake ({args.latency:.2f}s median, {args.error_rate:.0%} errors)'
+        print(f'{args.concurrency} concurrent users, {args.requests} requests per endpoint, provider: {provider}')
+        print(f'{"endpoint":<9} {"req/s":>7} {"p50":>8} {"p90":>8} {"p95":>8} {"p99":>8}  statuses')
+        for name, url, body in endpoints:
+            elapsed, latencies, statuses = run(app, user_ids, args.requests, url, body)
+            p50, p90, p95, p99 = np.percentile(latencies, [50, 90, 95, 99]) * 1000
+            codes = ' '.join(f'{code}x{count}' for code, count in sorted(statuses.items()))
+            print(f'{name:<9} {args.requests / elapsed:>7.1f} {p50:>6.0f}ms {p90:>6.0f}ms {p95:>6.0f}ms {p99:>6.0f}ms  {codes}')
+
+
+if __name__ == '__main__':
+    main()
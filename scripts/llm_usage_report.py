@@ -0,0 +1,43 @@
+"""List the users who spent the most LLM tokens, from llm_usage.
+
+Prints, per user, the calls metered over the last ``--days`` days, the
+tokens they spent, how many calls failed or were refused by the token
+quota, and the average latency of answered calls.
+
+Usage:
+    python scripts/llm_usage_report.py --days 7 --limit 20
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app  # noqa: E402
+from app.database import get_db  # noqa: E402
+from app.services.usage_service import top_users  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=float, default=1, help='window to report, in days')
+    parser.add_argument('--limit', type=int, default=20, help='users to list')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        users = top_users(get_db(), time.time() - args.days * 86400, args.limit)
+
+    if not users:
+        print('No LLM usage recorded in that window.')
+        return
+    print(f'{"user":<20} {"calls":>6} {"tokens":>10} {"failed":>7} {"refused":>8} {"latency":>9}')
+    for u in users:
+        latency = '-' if u['avg_latency_ms'] is None else f'{u["avg_latency_ms"]:.0f}ms'
+        print(f'{u["username"]:<20} {u["calls"]:>6} {u["total_tokens"]:>10} '
+              f'{u["failures"]:>7} {u["refused"]:>8} {latency:>9}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""Compare the pruned and full prompt arms recorded in prompt_metrics.
+
+Prints, per call kind and arm, how many calls were made, how many background
+items and estimated tokens were sent on average, the tokens pruning saved,
+the prompt tokens the provider's prefix cache served and the share of
+decided blurbs users kept. Then, per kind, how often the
+response cache answered and the tokens its hits saved.
+
+Usage:
+    python scripts/prompt_ab_report.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app  # noqa: E402
+from app.database import get_db  # noqa: E402
+from app.services.llm_cache_service import cache_report  # noqa: E402
+from app.services.openai_service import prompt_ab_report  # noqa: E402
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        report = prompt_ab_report(get_db())
+        cache = cache_report(get_db())
+
+    if not report:
+        print('No prompt metrics recorded yet.')
+        return
+    print(f'{"kind":<8} {"arm":<7} {"calls":>6} {"items":>11} {"tokens":>8} {"saved":>7} {"cached":>7} {"kept":>6}')
+    for r in report:
+        items = f'{r["avg_items_sent"]:.1f}/{r["avg_items_total"]:.1f}'
+        kept = '-' if r['blurb_keep_rate'] is None else f'{r["blurb_keep_rate"]:.0%}'
+        print(f'{r["kind"]:<8} {r["arm"]:<7} {r["calls"]:>6} {items:>11} '
+              f'{r["avg_sent_tokens"]:>8.0f} {r["avg_tokens_saved"]:>7.0f} {r["avg_cached_tokens"]:>7.0f} {kept:>6}')
+
+    print()
+    print(f'{"kind":<8} {"calls":>6} {"hits":>6} {"rate":>6} {"entries":>8} {"saved":>9}')
+    for r in cache:
+        rate = '-' if r['hit_rate'] is None else f'{r["hit_rate"]:.0%}'
+        print(f'{r["kind"]:<8} {r["calls"]:>6} {r["cache_hits"]:>6} {rate:>6} '
+              f'{r["entries"]:>8} {r["tokens_saved"]:>9}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""Hammer the write endpoints concurrently against a file-backed SQLite database.
+
+Every worker registers its own user and then cycles through the write
+endpoints through a Flask test client. Workers run as threads inside one or
+more processes that all share the same database file, which is the setup that
+produces "database is locked" errors in production.
+
+Usage:
+    python scripts/stress_writes.py --threads 8 --processes 2 --requests 50
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app  # noqa: E402
+from config import TestConfig  # noqa: E402
+
+
+def make_config(db_path):
+    instance_path = os.path.dirname(os.path.abspath(db_path))
+    return type('StressConfig', (TestConfig,), {
+        'DATABASE': db_path,
+        'INSTANCE_PATH': instance_path,
+        'UPLOAD_FOLDER': os.path.join(instance_path, 'uploads'),
+        'GENERATED_FOLDER': os.path.join(instance_path, 'generated'),
+        'JOBS_DATABASE': os.path.join(instance_path, 'jobs.db'),
+    })
+
+
+def _create_experience(client, i):
+    return client.post('/api/experiences', json={'category': 'work', 'title': f'Role {i}'})
+
+
+def _create_project(client, i):
+    return client.post('/api/projects', json={'title': f'Project {i}'})
+
+
+def _update_profile(client, i):
+    return client.put('/api/profile', json={'first_name': f'Name {i}', 'bio': 'x' * 200})
+
+
+def _update_settings(client, i):
+    return client.put('/api/settings', json={'font_size': 8 + i % 7})
+
+
+def _reorder_experiences(client, i):
+    exps = client.get('/api/experiences').get_json() or []
+    ids = [e['id'] for e in exps]
+    return client.put('/api/experiences/reorder', json={'order': list(reversed(ids))})
+
+
+def _import_data(client, i):
+    payload = {
+        'version': 1,
+        'experiences': [{'category': 'work', 'title': f'Imported {i}-{n}'} for n in range(5)],
+        'blurbs': [{'field_key': 'professional_summary', 'suggestion_text': f'Blurb {n}'} for n in range(5)],
+    }
+    return client.post('/api/data/import', data={
+        'file': (io.BytesIO(json.dumps(payload).encode()), 'data.json'),
+    }, content_type='multipart/form-data')
+
+
+WRITE_OPERATIONS = [
+    _create_experience,
+    _create_project,
+    _update_profile,
+    _update_settings,
+    _reorder_experiences,
+    _import_data,
+]
+
+
+def _is_lock_error(res):
+    if res.status_code == 503:
+        return True
+    body = res.get_data(as_text=True).lower()
+    return res.status_code >= 500 and 'locked' in body
+
+
+def _worker(app, username, requests_per_worker, counts, lock):
+    client = app.test_client()
+    res = client.post('/api/auth/register', json={'username': username, 'email': f'{username}@example.com'})
+    if res.status_code != 201:
+        with lock:
+            counts['total'] += 1
+            counts['lock_errors' if _is_lock_error(res) else 'errors'] += 1
+        return
+    client.post('/api/auth/login', json={'username': username, 'password': res.get_json()['password']})
+
+    for i in range(requests_per_worker):
+        operation = WRITE_OPERATIONS[i % len(WRITE_OPERATIONS)]
+        res = operation(client, i)
+        with lock:
+            counts['total'] += 1
+            if res.status_code < 400:
+                counts['ok'] += 1
+            elif _is_lock_error(res):
+                counts['lock_errors'] += 1
+            else:
+                counts['errors'] += 1
+
+
+def _run_process(db_path, process_index, threads, requests_per_worker):
+    app = create_app(make_config(db_path))
+    counts = {'total': 0, 'ok': 0, 'lock_errors': 0, 'errors': 0}
+    lock = threading.Lock()
+    workers = [
+        threading.Thread(
+            target=_worker,
+            args=(app, f'stress_{os.getpid()}_{process_index}_{n}', requests_per_worker, counts, lock),
+        )
+        for n in range(threads)
+    ]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return counts
+
+
+def run_stress(db_path, threads=4, processes=1, requests_per_worker=20):
+    """Run the stress workload and return a report dict."""
+    # Create the schema once up front so worker processes never race on it
+    create_app(make_config(db_path))
+
+    started = time.perf_counter()
+    if processes <= 1:
+        results = [_run_process(db_path, 0, threads, requests_per_worker)]
+    else:
+        ctx = multiprocessing.get_context('spawn')
+        with ctx.Pool(processes) as pool:
+            results = pool.starmap(
+                _run_process,
+                [(db_path, n, threads, requests_per_worker) for n in range(processes)],
+            )
+    elapsed = time.perf_counter() - started
+
+    report = {'total': 0, 'ok': 0, 'lock_errors': 0, 'errors': 0}
+    for counts in results:
+        for key in report:
+            report[key] += counts[key]
+    report['elapsed'] = elapsed
+    report['throughput'] = report['total'] / elapsed if elapsed else 0.0
+    report['lock_error_rate'] = report['lock_errors'] / report['total'] if report['total'] else 0.0
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8, help='worker threads per process')
+    parser.add_argument('--processes', type=int, default=1, help='worker processes')
+    parser.add_argument('--requests', type=int, default=50, help='write requests per worker')
+    parser.add_argument('--db', help='database file (defaults to a temporary file)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db or os.path.join(tmp, 'stress.db')
+        report = run_stress(db_path, args.threads, args.processes, args.requests)
+
+    print(f"requests:        {report['total']}")
+    print(f"succeeded:       {report['ok']}")
+    print(f"lock errors:     {report['lock_errors']} ({report['lock_error_rate']:.2%})")
+    print(f"other errors:    {report['errors']}")
+    print(f"elapsed:         {report['elapsed']:.2f}s")
+    print(f"throughput:      {report['throughput']:.1f} req/s")
+    return 1 if report['lock_errors'] or report['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
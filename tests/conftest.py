@@ -1,3 +1,7 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
 import pytest
 
 from app import create_app
@@ -6,8 +10,9 @@ from config import TestConfig
 
 
 @pytest.fixture
-def app():
+def app(tmp_path):
     app = create_app(TestConfig)
+    app.config['JOBS_DATABASE'] = str(tmp_path / 'jobs.db')
 
     with app.app_context():
         init_test_db()
@@ -45,3 +50,70 @@ def register_and_login(client, username='testuser', email='test@example.com'):
     password = data['password']
     login_user(client, username, password)
     return password
+
+
+class FakeOpenAI:
+    """Stands in for the OpenAI client.
+
+    ``reply(messages, **kwargs)`` returns the content of each completion. The
+    messages of every call are kept, and every call reports ``usage`` tokens:
+    prompt, completion and optionally prompt tokens served from cache.
+    With ``stream=True`` the content comes back in ``chunk_size`` deltas;
+    ``chunks_sent`` counts those handed out so far.
+    """
+
+    def __init__(self, reply, usage=(10, 5), chunk_size=8):
+        self.calls = []
+        self.chunk_size = chunk_size
+        self.chunks_sent = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+        self._reply = reply
+        self._usage = usage
+
+    @property
+    def prompts(self):
+        return [messages[-1]['content'] for messages, _ in self.calls]
+
+    def _create(self, messages, **kwargs):
+        self.calls.append((messages, kwargs))
+        content = self._reply(messages, **kwargs)
+        if not isinstance(content, str):
+            content = json.dumps(content)
+        usage = SimpleNamespace(prompt_tokens=self._usage[0], completion_tokens=self._usage[1])
+        if len(self._usage) > 2:
+            usage.prompt_tokens_details = SimpleNamespace(cached_tokens=self._usage[2])
+        if kwargs.get('stream'):
+            return self._stream(content, usage)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=usage)
+
+    def _stream(self, content, usage):
+        for i in range(0, len(content), self.chunk_size):
+            self.chunks_sent += 1
+            delta = SimpleNamespace(content=content[i:i + self.chunk_size])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+        yield SimpleNamespace(choices=[], usage=usage)
+
+
+class FakeAsyncOpenAI:
+    """AsyncOpenAI stand-in answering from a FakeOpenAI after ``delay`` seconds."""
+
+    def __init__(self, sync, delay=0):
+        self.sync = sync
+        self.delay = delay
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, **kwargs):
+        await asyncio.sleep(self.delay)
+        return self.sync.chat.completions.create(**kwargs)
+
+
+def use_fake_openai(monkeypatch, reply, usage=(10, 5)):
+    """Answer every model call, sync or async, from ``reply``; returns the FakeOpenAI."""
+    from app.services import openai_service
+    if not callable(reply):
+        content = reply
+        reply = lambda messages, **kwargs: content  # noqa: E731
+    client = FakeOpenAI(reply, usage)
+    monkeypatch.setattr(openai_service, '_get_client', lambda user_id: client)
+    monkeypatch.setattr(openai_service, '_get_async_client', lambda user_id: FakeAsyncOpenAI(client))
+    return client
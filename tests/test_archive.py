@@ -0,0 +1,162 @@
+import hashlib
+import io
+import json
+import os
+import struct
+import zipfile
+import zlib
+
+import pytest
+
+from tests.conftest import register_and_login
+
+
+
+def _png():
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    header = struct.pack('>IIBBBBB', 1, 1, 8, 0, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+            + chunk(b'IDAT', zlib.compress(b'\x00\x00')) + chunk(b'IEND', b''))
+
+
+PNG = _png()
+
+
+@pytest.fixture
+def folders(app, tmp_path):
+    app.config['UPLOAD_FOLDER'] = str(tmp_path / 'uploads')
+    app.config['GENERATED_FOLDER'] = str(tmp_path / 'generated')
+    app.config['INSTANCE_PATH'] = str(tmp_path)
+    return tmp_path
+
+
+def _upload_photo(client, name='me.png', content=PNG):
+    return client.post('/api/photos', data={
+        'photo': (io.BytesIO(content), name, 'image/png'),
+    }, content_type='multipart/form-data')
+
+
+def _populate(client, folders):
+    client.put('/api/profile', json={'first_name': 'Jane'})
+    client.post('/api/experiences', json={'category': 'work', 'title': 'Dev'})
+    _upload_photo(client, 'a.png')
+    _upload_photo(client, 'b.png')  # same bytes, stored once in the archive
+    gen_dir = folders / 'generated' / '1'
+    gen_dir.mkdir(parents=True)
+    (gen_dir / 'cv.pdf').write_bytes(b'%PDF-1.4 fake')
+
+
+def _restore(client, archive):
+    return client.post('/api/data/archive', data={
+        'file': (io.BytesIO(archive), 'archive.zip'),
+    }, content_type='multipart/form-data')
+
+
+def test_archive_contents(client, folders):
+    register_and_login(client)
+    _populate(client, folders)
+
+    res = client.get('/api/data/archive')
+    assert res.status_code == 200
+    assert res.mimetype == 'application/zip'
+
+    zf = zipfile.ZipFile(io.BytesIO(res.data))
+    manifest = json.loads(zf.read('manifest.json'))
+    assert [p['filename'] for p in manifest['photos']] == ['a.png', 'b.png']
+    assert [a['name'] for a in manifest['artifacts']] == ['cv.pdf']
+
+    blobs = [n for n in zf.namelist() if n.startswith('blobs/')]
+    assert sorted(blobs) == sorted({
+        f'blobs/{hashlib.sha256(PNG).hexdigest()}',
+        f'blobs/{hashlib.sha256(b"%PDF-1.4 fake").hexdigest()}',
+    })
+    assert zf.read('data.json') == client.get('/api/data/export').data
+
+
+def test_archive_round_trip(client, folders):
+    register_and_login(client)
+    _populate(client, folders)
+    archive = client.get('/api/data/archive').data
+
+    client.post('/api/auth/logout')
+    register_and_login(client, 'other', 'other@example.com')
+    res = _restore(client, archive)
+    assert res.status_code == 202
+    job = client.get(f'/api/data/import/{res.get_json()["job"]["id"]}').get_json()
+    assert job['status'] == 'completed'
+
+    assert client.get('/api/profile').get_json()['first_name'] == 'Jane'
+    photos = client.get('/api/photos').get_json()
+    assert [p['filename'] for p in photos] == ['a.png', 'b.png']
+    assert client.get(f'/api/photos/{photos[0]["id"]}/file').data == PNG
+    assert client.get('/api/generate/download/pdf').data == b'%PDF-1.4 fake'
+    assert not os.listdir(folders / 'imports')
+
+
+def test_restore_replaces_existing_photos(client, folders):
+    register_and_login(client)
+    _populate(client, folders)
+    archive = client.get('/api/data/archive').data
+    old_files = os.listdir(folders / 'uploads' / '1')
+
+    assert _restore(client, archive).status_code == 202
+    assert len(client.get('/api/photos').get_json()) == 2
+    new_files = os.listdir(folders / 'uploads' / '1')
+    assert len(new_files) == 2
+    assert not set(old_files) & set(new_files)
+
+
+def test_restore_rejects_tampered_blob(client, folders):
+    register_and_login(client)
+    _populate(client, folders)
+    original = zipfile.ZipFile(io.BytesIO(client.get('/api/data/archive').data))
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as zf:
+        for name in original.namelist():
+            content = original.read(name)
+            if name == f'blobs/{hashlib.sha256(PNG).hexdigest()}':
+                content = b'tampered'
+            zf.writestr(name, content)
+
+    res = _restore(client, buf.getvalue())
+    assert res.status_code == 400
+    assert 'hash' in res.get_json()['error']
+    assert client.get('/api/profile').get_json()['first_name'] == 'Jane'
+
+
+def test_restore_rejects_photos_that_are_not_images(client, folders):
+    register_and_login(client)
+    _populate(client, folders)
+    original = zipfile.ZipFile(io.BytesIO(client.get('/api/data/archive').data))
+    manifest = json.loads(original.read('manifest.json'))
+    payload = b'<?php system($_GET["c"]); ?>'
+    for photo in manifest['photos']:
+        photo['sha256'] = hashlib.sha256(payload).hexdigest()
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as zf:
+        for name in original.namelist():
+            if name != 'manifest.json':
+                zf.writestr(name, original.read(name))
+        zf.writestr('manifest.json', json.dumps(manifest))
+        zf.writestr(f'blobs/{manifest["photos"][0]["sha256"]}', payload)
+
+    uploads = sorted(os.listdir(folders / 'uploads' / '1'))
+    res = _restore(client, buf.getvalue())
+    assert res.status_code == 400
+    assert 'not a valid image/png image' in res.get_json()['error']
+    assert sorted(os.listdir(folders / 'uploads' / '1')) == uploads
+
+
+def test_restore_rejects_invalid_archives(client, folders):
+    register_and_login(client)
+    assert _restore(client, b'not a zip').status_code == 400
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as zf:
+        zf.writestr('data.json', json.dumps({'version': 1}))
+    res = _restore(client, buf.getvalue())
+    assert res.status_code == 400
+    assert 'manifest' in res.get_json()['error']
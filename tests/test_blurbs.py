@@ -1,4 +1,6 @@
-from tests.conftest import register_and_login
+import json
+
+from tests.conftest import register_and_login, use_fake_openai
 
 
 def test_list_blurbs_empty(client):
@@ -87,3 +89,162 @@ def test_blurb_crud(client, app):
 
     blurbs = client.get('/api/blurbs?template_name=classic').get_json()
     assert len(blurbs) == 0
+
+
+def _events(res):
+    events = []
+    for frame in res.get_data(as_text=True).strip().split('\n\n'):
+        name, data = frame.split('\n')
+        events.append((name[len('event: '):], json.loads(data[len('data: '):])))
+    return events
+
+
+def test_generate_stream(client, monkeypatch):
+    register_and_login(client)
+    fake = use_fake_openai(monkeypatch, {'suggestions': ['Led a team.', 'Shipped "Atlas", a search engine.']})
+
+    res = client.post('/api/blurbs/generate/stream', json={'field_key': 'summary'})
+    assert res.status_code == 200
+    assert res.mimetype == 'text/event-stream'
+    events = _events(res)
+    assert [name for name, _ in events] == ['blurb', 'blurb', 'done']
+    assert [data['suggestion_text'] for _, data in events[:2]] == ['Led a team.', 'Shipped "Atlas", a search engine.']
+    assert events[2][1]['count'] == 2
+    assert fake.calls[0][1]['stream'] is True
+
+    stored = client.get('/api/blurbs').get_json()
+    assert [b['id'] for b in stored] == [data['id'] for _, data in events[:2]]
+
+    # The streamed answer was cached, so asking again replays it without a call
+    again = _events(client.post('/api/blurbs/generate/stream', json={'field_key': 'summary'}))
+    assert [name for name, _ in again] == ['blurb', 'blurb', 'done']
+    assert len(fake.calls) == 1
+
+
+def test_stream_yields_each_suggestion_before_the_completion_ends(app, client, monkeypatch):
+    register_and_login(client)
+    suggestions = [f'Suggestion number {i} with some words.' for i in range(5)]
+    fake = use_fake_openai(monkeypatch, {'suggestions': suggestions})
+    total_chunks = -(-len(json.dumps({'suggestions': suggestions})) // fake.chunk_size)
+
+    with client:
+        client.get('/api/blurbs')
+        from flask_login import current_user
+
+        from app.services.openai_service import stream_blurbs
+        _, stream = stream_blurbs(current_user.id, 'summary', 'classic', bypass_cache=True)
+        assert next(stream) == suggestions[0]
+        assert fake.chunks_sent < total_chunks / 2
+        assert list(stream) == suggestions[1:]
+
+
+def test_generate_stream_reports_malformed_output(client, monkeypatch):
+    register_and_login(client)
+    use_fake_openai(monkeypatch, '{"suggestions": ["Fine.", oops')
+
+    events = _events(client.post('/api/blurbs/generate/stream', json={'field_key': 'summary'}))
+    assert [name for name, _ in events] == ['blurb', 'error']
+
+
+def test_generate_stream_requires_api_key(client):
+    register_and_login(client)
+    res = client.post('/api/blurbs/generate/stream', json={'field_key': 'summary'})
+    assert res.status_code == 400
+    assert 'API key' in res.get_json()['error']
+
+
+BLURB_SECTIONS = ['professional_summary', 'work_highlights', 'project_descriptions', 'skills_summary']
+
+
+def _field_of(messages):
+    return messages[-1]['content'].split('for the field: ', 1)[1].split('\n', 1)[0]
+
+
+def test_generate_all_fans_out_and_stores_in_one_go(client, monkeypatch):
+    import threading
+    import time
+
+    from app.services import openai_service
+
+    register_and_login(client)
+    lock = threading.Lock()
+    in_flight = {'now': 0, 'max': 0}
+
+    def reply(messages, **kwargs):
+        with lock:
+            in_flight['now'] += 1
+            in_flight['max'] = max(in_flight['max'], in_flight['now'])
+        time.sleep(0.05)
+        with lock:
+            in_flight['now'] -= 1
+        field = _field_of(messages)
+        return {'suggestions': [f'{field} one', f'{field} two']}
+
+    fake = use_fake_openai(monkeypatch, reply)
+    contexts = []
+    build = openai_service._blurb_context
+    monkeypatch.setattr(openai_service, '_blurb_context', lambda *a: contexts.append(a) or build(*a))
+
+    res = client.post('/api/blurbs/generate-all', json={'template_name': 'classic'})
+    assert res.status_code == 200
+    events = _events(res)
+    assert [name for name, _ in events] == ['section'] * 4 + ['done']
+    assert sorted(data['field_key'] for _, data in events[:4]) == sorted(BLURB_SECTIONS)
+    assert len(fake.calls) == 4
+    assert len(contexts) == 1
+    assert 1 < in_flight['max'] <= 3
+
+    done = events[-1][1]
+    assert done['failed'] == []
+    assert len(done['blurbs']) == 8
+    assert {b['suggestion_text'] for b in done['blurbs']} == {
+        f'{f} {n}' for f in BLURB_SECTIONS for n in ('one', 'two')
+    }
+    assert len(client.get('/api/blurbs').get_json()) == 8
+
+
+def test_generate_all_keeps_sections_that_succeed(client, monkeypatch):
+    register_and_login(client)
+
+    def reply(messages, **kwargs):
+        field = _field_of(messages)
+        if field == 'skills_summary':
+            raise RuntimeError('upstream timeout')
+        return {'suggestions': [f'{field} text']}
+
+    use_fake_openai(monkeypatch, reply)
+    events = _events(client.post('/api/blurbs/generate-all', json={
+        'field_keys': ['professional_summary', 'skills_summary'],
+    }))
+    sections = {data['field_key']: data for name, data in events if name == 'section'}
+    assert 'upstream timeout' in sections['skills_summary']['error']
+    assert sections['professional_summary']['suggestions'] == ['professional_summary text']
+
+    done = events[-1][1]
+    assert done['failed'] == ['skills_summary']
+    assert [b['field_key'] for b in done['blurbs']] == ['professional_summary']
+
+
+def test_generate_all_rejects_unknown_sections(client, monkeypatch):
+    register_and_login(client)
+    use_fake_openai(monkeypatch, {'suggestions': []})
+    res = client.post('/api/blurbs/generate-all', json={'field_keys': ['education']})
+    assert res.status_code == 400
+    assert 'education' in res.get_json()['error']
+    res = client.post('/api/blurbs/generate-all', json={'field_keys': 'professional_summary'})
+    assert res.status_code == 400
+
+
+def test_generate_async_runs_as_a_job(client, monkeypatch):
+    register_and_login(client)
+    use_fake_openai(monkeypatch, {'suggestions': ['Led a team.', 'Shipped it.']})
+
+    res = client.post('/api/blurbs/generate/async', json={'field_key': 'summary'})
+    assert res.status_code == 202
+    job_id = res.get_json()['job']['id']
+
+    status = client.get(f'/api/blurbs/generate/{job_id}').get_json()
+    assert status['status'] == 'completed'
+    assert [b['suggestion_text'] for b in status['result']['blurbs']] == ['Led a team.', 'Shipped it.']
+    assert len(client.get('/api/blurbs').get_json()) == 2
+    assert client.get(f'/api/job/analyze/{job_id}').status_code == 404
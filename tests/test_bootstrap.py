@@ -0,0 +1,39 @@
+from tests.conftest import register_and_login
+
+
+def test_bootstrap_anonymous(client):
+    res = client.get('/api/bootstrap')
+    assert res.status_code == 200
+    assert res.get_json() == {'authenticated': False}
+
+
+def test_bootstrap_returns_all_sections(client):
+    register_and_login(client)
+    client.put('/api/profile', json={'first_name': 'Jane'})
+    client.post('/api/experiences', json={'category': 'work', 'title': 'Dev'})
+    client.post('/api/projects', json={'title': 'P'})
+    client.put('/api/settings', json={'font_size': 12})
+
+    data = client.get('/api/bootstrap').get_json()
+    assert data['authenticated'] is True
+    assert data['user']['username'] == 'testuser'
+    assert data['profile']['first_name'] == 'Jane'
+    assert [e['title'] for e in data['experiences']] == ['Dev']
+    assert [p['title'] for p in data['projects']] == ['P']
+    assert data['photos'] == []
+    assert data['analyses'] == []
+    assert data['blurbs'] == []
+    assert data['settings']['font_size'] == 12
+    assert any(t['name'] == 'classic' for t in data['templates'])
+
+
+def test_bootstrap_matches_individual_endpoints(client):
+    register_and_login(client)
+    client.post('/api/experiences', json={'category': 'work', 'title': 'Dev'})
+    data = client.get('/api/bootstrap').get_json()
+
+    assert data['profile'] == client.get('/api/profile').get_json()
+    assert data['experiences'] == client.get('/api/experiences').get_json()
+    assert data['settings'] == client.get('/api/settings').get_json()
+    assert data['blurbs'] == client.get('/api/blurbs?template_name=classic').get_json()
+    assert data['templates'] == client.get('/api/settings/templates').get_json()['templates']
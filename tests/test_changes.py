@@ -0,0 +1,76 @@
+from tests.conftest import register_and_login
+
+
+def _changes(client, since):
+    res = client.get(f'/api/changes?since={since}')
+    assert res.status_code == 200
+    return res.get_json()
+
+
+def test_changes_empty_since_cursor(client):
+    register_and_login(client)
+    cursor = client.get('/api/bootstrap').get_json()['cursor']
+    assert _changes(client, cursor) == {'cursor': cursor, 'changes': {}}
+
+
+def test_changes_reports_created_and_updated_rows(client):
+    register_and_login(client)
+    cursor = client.get('/api/bootstrap').get_json()['cursor']
+    client.post('/api/experiences', json={'category': 'work', 'title': 'A'})
+    client.post('/api/projects', json={'title': 'P'})
+
+    delta = _changes(client, cursor)
+    assert [e['title'] for e in delta['changes']['experiences']['upserted']] == ['A']
+    assert [p['title'] for p in delta['changes']['projects']['upserted']] == ['P']
+    assert 'blurbs' not in delta['changes']
+    assert delta['cursor'] > cursor
+
+    exp_id = delta['changes']['experiences']['upserted'][0]['id']
+    client.put(f'/api/experiences/{exp_id}', json={'category': 'work', 'title': 'B'})
+    later = _changes(client, delta['cursor'])
+    assert list(later['changes']) == ['experiences']
+    assert later['changes']['experiences']['upserted'][0]['title'] == 'B'
+
+
+def test_changes_reports_deletes_as_tombstones(client):
+    register_and_login(client)
+    client.post('/api/projects', json={'title': 'P'})
+    cursor = client.get('/api/bootstrap').get_json()['cursor']
+    project_id = client.get('/api/projects').get_json()[0]['id']
+
+    client.delete(f'/api/projects/{project_id}')
+    delta = _changes(client, cursor)
+    assert delta['changes']['projects'] == {'upserted': [], 'deleted': [project_id]}
+
+
+def test_changes_created_then_deleted_is_only_a_tombstone(client):
+    register_and_login(client)
+    cursor = client.get('/api/bootstrap').get_json()['cursor']
+    client.post('/api/projects', json={'title': 'P'})
+    project_id = client.get('/api/projects').get_json()[0]['id']
+    client.delete(f'/api/projects/{project_id}')
+
+    delta = _changes(client, cursor)
+    assert delta['changes']['projects'] == {'upserted': [], 'deleted': [project_id]}
+
+
+def test_changes_include_profile(client):
+    register_and_login(client)
+    cursor = client.get('/api/bootstrap').get_json()['cursor']
+    client.put('/api/profile', json={'first_name': 'Jane'})
+    assert _changes(client, cursor)['changes']['profile']['first_name'] == 'Jane'
+
+
+def test_changes_are_per_user(client):
+    register_and_login(client)
+    client.post('/api/projects', json={'title': 'Mine'})
+    client.post('/api/auth/logout')
+    register_and_login(client, 'other', 'other@example.com')
+    delta = _changes(client, 0)
+    assert 'projects' not in delta['changes']
+
+
+def test_changes_invalid_cursor(client):
+    register_and_login(client)
+    assert client.get('/api/changes?since=abc').status_code == 400
+    assert client.get('/api/changes?since=-1').status_code == 400
@@ -0,0 +1,69 @@
+import sqlite3
+import threading
+
+import pytest
+
+from app import create_app
+from app.database import DatabaseBusyError, get_db, write_transaction
+from scripts.stress_writes import make_config, run_stress
+
+
+def test_threaded_writers_no_lock_errors(tmp_path):
+    report = run_stress(str(tmp_path / 'stress.db'), threads=6, processes=1, requests_per_worker=12)
+    assert report['total'] == 6 * 12
+    assert report['lock_errors'] == 0
+    assert report['errors'] == 0
+
+
+def test_multiprocess_writers_no_lock_errors(tmp_path):
+    report = run_stress(str(tmp_path / 'stress.db'), threads=3, processes=2, requests_per_worker=6)
+    assert report['total'] == 2 * 3 * 6
+    assert report['lock_errors'] == 0
+    assert report['errors'] == 0
+
+
+def _file_app(tmp_path, **overrides):
+    config = make_config(str(tmp_path / 'lock.db'))
+    for key, value in overrides.items():
+        setattr(config, key, value)
+    return create_app(config)
+
+
+def test_write_transaction_waits_for_lock(tmp_path):
+    app = _file_app(tmp_path, DB_BUSY_TIMEOUT=0.05, DB_WRITE_RETRIES=8, DB_WRITE_RETRY_DELAY=0.05)
+    blocker = sqlite3.connect(app.config['DATABASE'], check_same_thread=False)
+    blocker.execute('BEGIN IMMEDIATE')
+    threading.Timer(0.2, blocker.rollback).start()
+
+    with app.app_context():
+        with write_transaction() as db:
+            db.execute("INSERT INTO users (username, email, password_hash) VALUES ('a', 'a@x', 'h')")
+        assert get_db().execute('SELECT COUNT(*) FROM users').fetchone()[0] == 1
+    blocker.close()
+
+
+def test_write_transaction_gives_up_with_busy_error(tmp_path):
+    app = _file_app(tmp_path, DB_BUSY_TIMEOUT=0.01, DB_WRITE_RETRIES=1, DB_WRITE_RETRY_DELAY=0.01)
+    blocker = sqlite3.connect(app.config['DATABASE'], check_same_thread=False)
+    blocker.execute('BEGIN IMMEDIATE')
+    try:
+        with app.app_context():
+            with pytest.raises(DatabaseBusyError):
+                with write_transaction():
+                    pass
+
+        client = app.test_client()
+        res = client.post('/api/auth/register', json={'username': 'busy', 'email': 'busy@example.com'})
+        assert res.status_code == 503
+        assert res.headers['Retry-After'] == '1'
+    finally:
+        blocker.rollback()
+        blocker.close()
+
+
+def test_write_transaction_rolls_back_on_error(app):
+    with pytest.raises(RuntimeError):
+        with write_transaction() as db:
+            db.execute("INSERT INTO users (username, email, password_hash) VALUES ('a', 'a@x', 'h')")
+            raise RuntimeError('boom')
+    assert get_db().execute('SELECT COUNT(*) FROM users').fetchone()[0] == 0
@@ -1,6 +1,9 @@
 import io
 import json
 
+from app import create_app
+from app.services.task_service import get_job
+from config import TestConfig
 from tests.conftest import register_and_login
 
 
@@ -38,7 +41,12 @@ def test_import_data(client):
     res = client.post('/api/data/import', data={
         'file': (io.BytesIO(json.dumps(data).encode()), 'data.json'),
     }, content_type='multipart/form-data')
-    assert res.status_code == 200
+    assert res.status_code == 202
+    job_id = res.get_json()['job']['id']
+
+    job = client.get(f'/api/data/import/{job_id}').get_json()
+    assert job['status'] == 'completed'
+    assert job['processed'] == job['total'] == 4
 
     # Verify imported data
     profile = client.get('/api/profile').get_json()
@@ -67,3 +75,176 @@ def test_import_invalid_version(client):
         'file': (io.BytesIO(json.dumps(data).encode()), 'data.json'),
     }, content_type='multipart/form-data')
     assert res.status_code == 400
+
+
+def _import(client, payload):
+    if not isinstance(payload, bytes):
+        payload = json.dumps(payload).encode()
+    return client.post('/api/data/import', data={
+        'file': (io.BytesIO(payload), 'data.json'),
+    }, content_type='multipart/form-data')
+
+
+def test_import_round_trip(client):
+    register_and_login(client)
+    for title in ('First', 'Second', 'Third'):
+        client.post('/api/experiences', json={'category': 'work', 'title': title})
+    client.post('/api/projects', json={'title': 'Project'})
+    exported = client.get('/api/data/export').data
+
+    client.post('/api/experiences', json={'category': 'work', 'title': 'Extra'})
+    res = _import(client, exported)
+    assert res.status_code == 202
+
+    exps = client.get('/api/experiences').get_json()
+    assert [e['title'] for e in exps] == ['First', 'Second', 'Third']
+    assert client.get('/api/data/export').data == exported
+
+
+def test_import_orders_by_sort_order(client):
+    register_and_login(client)
+    res = _import(client, {'version': 1, 'experiences': [
+        {'category': 'work', 'title': 'Last', 'sort_order': 5},
+        {'category': 'work', 'title': 'First', 'sort_order': 0},
+        {'category': 'work', 'title': 'Middle'},
+    ]})
+    assert res.status_code == 202
+    assert [e['title'] for e in client.get('/api/experiences').get_json()] == ['First', 'Middle', 'Last']
+
+
+def test_import_large_file_in_batches(client, app):
+    app.config['IMPORT_BATCH_SIZE'] = 7
+    register_and_login(client)
+    blurbs = [{'field_key': 'skills_summary', 'suggestion_text': f'Blurb {n}'} for n in range(100)]
+    res = _import(client, {'version': 1, 'blurbs': blurbs})
+    assert res.status_code == 202
+    assert res.get_json()['job']['processed'] == 100
+    assert len(client.get('/api/blurbs?template_name=classic').get_json()) == 100
+
+
+def test_import_rejects_invalid_record_without_writing(client):
+    register_and_login(client)
+    client.post('/api/experiences', json={'category': 'work', 'title': 'Keep me'})
+    res = _import(client, {'version': 1, 'experiences': [
+        {'category': 'work', 'title': 'Fine'},
+        {'category': 'astronaut', 'title': 'Bad'},
+    ]})
+    assert res.status_code == 400
+    assert 'experiences[1].category' in res.get_json()['error']
+    assert [e['title'] for e in client.get('/api/experiences').get_json()] == ['Keep me']
+
+
+def test_import_rejects_repeated_sections(client):
+    register_and_login(client)
+    client.post('/api/experiences', json={'category': 'work', 'title': 'Keep me'})
+    payload = (
+        '{"version": 1, "experiences": [{"category": "work", "title": "A"}], '
+        '"experiences": [{"category": "work", "title": "B"}, {"category": "work", "title": "C"}]}'
+    ).encode()
+    res = _import(client, payload)
+    assert res.status_code == 400
+    assert 'experiences appears more than once' in res.get_json()['error']
+    assert [e['title'] for e in client.get('/api/experiences').get_json()] == ['Keep me']
+
+
+def test_import_rejects_truncated_file(client):
+    register_and_login(client)
+    payload = json.dumps({'version': 1, 'blurbs': [{'suggestion_text': 'x'}]}).encode()
+    assert _import(client, payload[:-5]).status_code == 400
+
+
+def test_import_rejects_oversized_record(client, app):
+    app.config['IMPORT_MAX_RECORD_BYTES'] = 1000
+    register_and_login(client)
+    res = _import(client, {'version': 1, 'projects': [{'title': 'x' * 5000}]})
+    assert res.status_code == 400
+
+
+def test_import_rejects_oversized_file(client, app):
+    app.config['IMPORT_MAX_BYTES'] = 100
+    register_and_login(client)
+    res = _import(client, {'version': 1, 'projects': [{'title': 'x' * 500}]})
+    assert res.status_code == 413
+
+
+def test_import_status_unknown_job(client):
+    register_and_login(client)
+    assert client.get('/api/data/import/nope').status_code == 404
+
+
+def test_import_status_is_shared_between_processes(client, app):
+    register_and_login(client)
+    job = _import(client, {'version': 1, 'projects': [{'title': 'A'}]}).get_json()['job']
+    user_id = client.get('/api/auth/session').get_json()['user']['id']
+
+    # Another worker process: its own app, same job store
+    other = create_app(TestConfig)
+    other.config['JOBS_DATABASE'] = app.config['JOBS_DATABASE']
+    with other.app_context():
+        assert get_job(job['id'], user_id)['status'] == 'completed'
+        assert get_job(job['id'], user_id + 1) is None
+
+
+def _populate(client):
+    client.put('/api/profile', json={'first_name': 'Jane', 'bio': 'Line one\nLine "two" ✓'})
+    for n in range(3):
+        client.post('/api/experiences', json={'category': 'work', 'title': f'Role {n}'})
+    client.put('/api/settings', json={'font_size': 12})
+
+
+def test_export_matches_v1_format(client, app):
+    register_and_login(client)
+    _populate(client)
+    res = client.get('/api/data/export')
+
+    from app.services.data_service import export_user_data
+    expected = json.dumps(export_user_data(1), indent=2, default=str)
+    assert res.get_data(as_text=True) == expected
+
+
+def test_export_empty_sections_match_v1_format(client):
+    register_and_login(client)
+    res = client.get('/api/data/export')
+
+    from app.services.data_service import export_user_data
+    assert res.get_data(as_text=True) == json.dumps(export_user_data(1), indent=2, default=str)
+    assert '"projects": []' in res.get_data(as_text=True)
+
+
+def test_export_streams_in_chunks(client, app):
+    app.config['EXPORT_CHUNK_SIZE'] = 64
+    register_and_login(client)
+    _populate(client)
+    res = client.get('/api/data/export', buffered=False)
+    chunks = list(res.response)
+    res.close()
+    assert len(chunks) > 3
+    assert json.loads(b''.join(chunks))['profile']['first_name'] == 'Jane'
+
+
+def test_export_ndjson(client):
+    register_and_login(client)
+    _populate(client)
+    res = client.get('/api/data/export?format=ndjson')
+    assert res.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in res.get_data(as_text=True).splitlines()]
+    assert lines[0] == {'section': 'version', 'data': 1}
+    assert [l['data']['title'] for l in lines if l['section'] == 'experiences'] == ['Role 0', 'Role 1', 'Role 2']
+    assert sum(1 for l in lines if l['section'] == 'profile') == 1
+
+
+def test_export_gzip(client):
+    import gzip
+    register_and_login(client)
+    _populate(client)
+    plain = client.get('/api/data/export').data
+    res = client.get('/api/data/export?compress=gzip')
+    assert res.mimetype == 'application/gzip'
+    assert 'cv_data_testuser.json.gz' in res.headers['Content-Disposition']
+    assert gzip.decompress(res.data) == plain
+
+
+def test_export_invalid_options(client):
+    register_and_login(client)
+    assert client.get('/api/data/export?format=xml').status_code == 400
+    assert client.get('/api/data/export?compress=brotli').status_code == 400
@@ -0,0 +1,68 @@
+from app.database import get_db
+from tests.conftest import register_and_login
+
+
+def test_get_returns_weak_etag(client):
+    register_and_login(client)
+    res = client.get('/api/experiences')
+    assert res.status_code == 200
+    assert res.headers['ETag'].startswith('W/"')
+    assert 'no-cache' in res.headers['Cache-Control']
+
+
+def test_matching_etag_returns_304(client):
+    register_and_login(client)
+    client.post('/api/projects', json={'title': 'P'})
+    etag = client.get('/api/projects').headers['ETag']
+
+    res = client.get('/api/projects', headers={'If-None-Match': etag})
+    assert res.status_code == 304
+    assert res.data == b''
+    assert res.headers['ETag'] == etag
+
+
+def test_write_changes_etag(client):
+    register_and_login(client)
+    etag = client.get('/api/experiences').headers['ETag']
+    client.post('/api/experiences', json={'category': 'work', 'title': 'Dev'})
+
+    res = client.get('/api/experiences', headers={'If-None-Match': etag})
+    assert res.status_code == 200
+    assert res.headers['ETag'] != etag
+    assert len(res.get_json()) == 1
+
+
+def test_etag_is_per_resource(client):
+    register_and_login(client)
+    profile_etag = client.get('/api/profile').headers['ETag']
+    client.post('/api/projects', json={'title': 'P'})
+    assert client.get('/api/profile', headers={'If-None-Match': profile_etag}).status_code == 304
+
+    client.put('/api/profile', json={'first_name': 'Jane'})
+    assert client.get('/api/profile', headers={'If-None-Match': profile_etag}).status_code == 200
+
+
+def test_etag_varies_with_query(client):
+    register_and_login(client)
+    classic = client.get('/api/blurbs?template_name=classic').headers['ETag']
+    modern = client.get('/api/blurbs?template_name=modern').headers['ETag']
+    assert classic != modern
+    assert client.get('/api/blurbs?template_name=modern', headers={'If-None-Match': classic}).status_code == 200
+
+
+def test_etag_is_per_user(client):
+    register_and_login(client)
+    etag = client.get('/api/settings').headers['ETag']
+    client.post('/api/auth/logout')
+    register_and_login(client, 'other', 'other@example.com')
+    assert client.get('/api/settings', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_version_bumped_in_write_transaction(client):
+    register_and_login(client)
+    client.post('/api/experiences', json={'category': 'work', 'title': 'A'})
+    client.post('/api/experiences', json={'category': 'work', 'title': 'B'})
+    row = get_db().execute(
+        "SELECT version FROM resource_versions WHERE user_id = 1 AND resource = 'experiences'"
+    ).fetchone()
+    assert row['version'] == 2
@@ -91,3 +91,163 @@ def test_reorder_experiences(client):
 
     exps = client.get('/api/experiences').get_json()
     assert exps[0]['title'] == 'Second'
+
+
+def test_bulk_experiences(client):
+    register_and_login(client)
+    client.post('/api/experiences', json={'category': 'work', 'title': 'Existing'})
+    client.post('/api/experiences', json={'category': 'work', 'title': 'Doomed'})
+    existing_id, doomed_id = [e['id'] for e in client.get('/api/experiences').get_json()]
+
+    res = client.post('/api/experiences/bulk', json={'operations': [
+        {'op': 'create', 'data': {'category': 'work', 'title': 'Role A'}},
+        {'op': 'update', 'id': existing_id, 'data': {'category': 'education', 'title': 'Renamed'}},
+        {'op': 'create', 'data': {'category': 'hobby', 'title': 'Role B'}},
+        {'op': 'delete', 'id': doomed_id},
+    ]})
+    assert res.status_code == 200
+    results = res.get_json()['results']
+    assert [r['op'] for r in results] == ['create', 'update', 'create', 'delete']
+
+    exps = client.get('/api/experiences').get_json()
+    assert [e['title'] for e in exps] == ['Renamed', 'Role A', 'Role B']
+    assert exps[1]['id'] == results[0]['id']
+    assert exps[2]['id'] == results[2]['id']
+    assert exps[0]['category'] == 'education'
+
+
+def test_bulk_experiences_rejects_whole_batch(client):
+    register_and_login(client)
+    res = client.post('/api/experiences/bulk', json={'operations': [
+        {'op': 'create', 'data': {'category': 'work', 'title': 'Valid'}},
+        {'op': 'create', 'data': {'category': 'invalid', 'title': 'Bad'}},
+        {'op': 'delete', 'id': 999},
+    ]})
+    assert res.status_code == 400
+    errors = res.get_json()['errors']
+    assert [e['index'] for e in errors] == [1]
+
+    res = client.post('/api/experiences/bulk', json={'operations': [
+        {'op': 'create', 'data': {'category': 'work', 'title': 'Valid'}},
+        {'op': 'delete', 'id': 999},
+    ]})
+    assert res.status_code == 400
+    assert res.get_json()['errors'] == [{'index': 1, 'error': 'Item 999 not found'}]
+    assert client.get('/api/experiences').get_json() == []
+
+
+def test_bulk_experiences_rejects_repeated_items(client):
+    register_and_login(client)
+    client.post('/api/experiences', json={'category': 'work', 'title': 'Existing'})
+    exp_id = client.get('/api/experiences').get_json()[0]['id']
+
+    res = client.post('/api/experiences/bulk', json={'operations': [
+        {'op': 'update', 'id': exp_id, 'data': {'category': 'work', 'title': 'Renamed'}},
+        {'op': 'delete', 'id': exp_id},
+    ]})
+    assert res.status_code == 400
+    assert res.get_json()['errors'] == [
+        {'index': 1, 'error': f'Item {exp_id} is already changed by operation 0'},
+    ]
+    assert _titles(client) == ['Existing']
+
+
+def test_bulk_experiences_other_users_items(client):
+    register_and_login(client, 'owner', 'owner@example.com')
+    client.post('/api/experiences', json={'category': 'work', 'title': 'Mine'})
+    exp_id = client.get('/api/experiences').get_json()[0]['id']
+    client.post('/api/auth/logout')
+
+    register_and_login(client, 'intruder', 'intruder@example.com')
+    res = client.post('/api/experiences/bulk', json={'operations': [{'op': 'delete', 'id': exp_id}]})
+    assert res.status_code == 400
+
+
+def test_bulk_experiences_requires_operations(client):
+    register_and_login(client)
+    res = client.post('/api/experiences/bulk', json={'ops': []})
+    assert res.status_code == 400
+
+
+def _titles(client):
+    return [e['title'] for e in client.get('/api/experiences').get_json()]
+
+
+def test_move_experience(client):
+    register_and_login(client)
+    for title in ('A', 'B', 'C'):
+        client.post('/api/experiences', json={'category': 'work', 'title': title})
+    a, b, c = [e['id'] for e in client.get('/api/experiences').get_json()]
+
+    res = client.put(f'/api/experiences/{c}/position', json={'after_id': a, 'before_id': b})
+    assert res.status_code == 200
+    assert _titles(client) == ['A', 'C', 'B']
+
+    res = client.put(f'/api/experiences/{a}/position', json={'after_id': b})
+    assert res.status_code == 200
+    assert _titles(client) == ['C', 'B', 'A']
+
+    res = client.put(f'/api/experiences/{a}/position', json={'before_id': c})
+    assert res.status_code == 200
+    assert _titles(client) == ['A', 'C', 'B']
+
+
+def test_move_experience_writes_one_row(client, app):
+    register_and_login(client)
+    for title in ('A', 'B', 'C', 'D'):
+        client.post('/api/experiences', json={'category': 'work', 'title': title})
+    before = {e['id']: e['sort_key'] for e in client.get('/api/experiences').get_json()}
+    a, b, c, d = before
+
+    client.put(f'/api/experiences/{d}/position', json={'before_id': a})
+    after = {e['id']: e['sort_key'] for e in client.get('/api/experiences').get_json()}
+    assert [k for k in before if before[k] != after[k]] == [d]
+
+
+def test_move_experience_errors(client):
+    register_and_login(client)
+    client.post('/api/experiences', json={'category': 'work', 'title': 'A'})
+    client.post('/api/experiences', json={'category': 'work', 'title': 'B'})
+    a, b = [e['id'] for e in client.get('/api/experiences').get_json()]
+
+    assert client.put(f'/api/experiences/{a}/position', json={'after_id': 999}).status_code == 404
+    assert client.put(f'/api/experiences/{a}/position', json={'after_id': a}).status_code == 400
+    assert client.put(f'/api/experiences/{a}/position', json={'after_id': b, 'before_id': a}).status_code == 400
+    assert client.put(f'/api/experiences/{a}/position', json={'other': 1}).status_code == 400
+
+
+def test_move_experience_rebalances_long_keys(client, app):
+    app.config['SORT_KEY_MAX_LENGTH'] = 4
+    register_and_login(client)
+    client.post('/api/experiences', json={'category': 'work', 'title': 'First'})
+    client.post('/api/experiences', json={'category': 'work', 'title': 'Last'})
+    first, last = [e['id'] for e in client.get('/api/experiences').get_json()]
+
+    # Keep wedging new items in front of "Last" until the keys overflow
+    for n in range(12):
+        client.post('/api/experiences', json={'category': 'work', 'title': f'Mid {n}'})
+        new_id = client.get('/api/experiences').get_json()[-1]['id']
+        client.put(f'/api/experiences/{new_id}/position', json={'before_id': last})
+
+    exps = client.get('/api/experiences').get_json()
+    assert exps[0]['title'] == 'First'
+    assert exps[-1]['title'] == 'Last'
+    assert [e['title'] for e in exps[1:-1]] == [f'Mid {n}' for n in range(12)]
+    assert max(len(e['sort_key']) for e in exps) <= 4
+
+
+def test_mutations_return_rows(client):
+    register_and_login(client)
+    res = client.post('/api/experiences', json={'category': 'work', 'title': 'Dev'})
+    created = res.get_json()['experience']
+    assert created['title'] == 'Dev'
+    assert created['sort_key'] and created['created_at']
+    assert client.get('/api/experiences').get_json() == [created]
+
+    res = client.put(f'/api/experiences/{created["id"]}', json={'category': 'education', 'title': 'MSc'})
+    updated = res.get_json()['experience']
+    assert (updated['id'], updated['category'], updated['title']) == (created['id'], 'education', 'MSc')
+    assert client.get('/api/experiences').get_json() == [updated]
+
+    res = client.delete(f'/api/experiences/{created["id"]}')
+    assert res.get_json()['id'] == created['id']
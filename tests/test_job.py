@@ -1,4 +1,4 @@
-from tests.conftest import register_and_login
+from tests.conftest import FakeAsyncOpenAI, FakeOpenAI, register_and_login, use_fake_openai
 
 
 def test_list_analyses_empty(client):
@@ -29,3 +29,123 @@ def test_delete_analysis_nonexistent(client):
     register_and_login(client)
     res = client.delete('/api/job/analyses/999')
     assert res.status_code == 404
+
+
+def test_analyze_async_runs_as_a_job(client, monkeypatch):
+    register_and_login(client)
+    fake = use_fake_openai(monkeypatch, {'extracted_keywords': ['python'], 'focus_suggestions': ['APIs']})
+
+    res = client.post('/api/job/analyze/async', json={'job_description': 'Python developer'})
+    assert res.status_code == 202
+    job = res.get_json()['job']
+    assert job['kind'] == 'analyze'
+
+    # Test config runs tasks inline, so the job is already done
+    status = client.get(f'/api/job/analyze/{job["id"]}').get_json()
+    assert status['status'] == 'completed'
+    analysis = status['result']['analyses'][0]
+    assert analysis['id'] == status['result']['id']
+    assert analysis['extracted_keywords'] == '["python"]'
+    assert analysis['total_tokens'] == 15
+    assert len(fake.calls) == 1
+
+    # The sync endpoint shares the response cache with the async path
+    client.post('/api/job/analyze', json={'job_description': 'Python developer'})
+    assert len(fake.calls) == 1
+
+
+def test_analyze_async_failures(client, monkeypatch):
+    register_and_login(client)
+    res = client.post('/api/job/analyze/async', json={'job_description': 'Python developer'})
+    assert res.status_code == 400
+    assert 'API key' in res.get_json()['error']
+
+    use_fake_openai(monkeypatch, 'not json')
+    job = client.post('/api/job/analyze/async', json={'job_description': 'Python developer'}).get_json()['job']
+    status = client.get(f'/api/job/analyze/{job["id"]}').get_json()
+    assert status['status'] == 'failed'
+    assert status['error']
+    assert client.get('/api/job/analyses').get_json() == []
+    assert client.get('/api/job/analyze/unknown').status_code == 404
+
+
+def test_async_calls_cost_coroutines_not_threads(app):
+    import asyncio
+    import threading
+    import time
+
+    from app.services.openai_service import _run_async
+    from app.services.resilience_service import CallPolicy
+
+    fake = FakeAsyncOpenAI(FakeOpenAI(lambda messages, **kwargs: 'ok'), delay=0.2)
+
+    def steps():
+        responses = yield 'analyze', [{'messages': [{'role': 'user', 'content': 'hi'}]}], 1
+        return responses[0].choices[0].message.content
+
+    async def many(n):
+        return await asyncio.gather(*(_run_async(app, fake, user_id, steps(), CallPolicy(app.config)) for user_id in range(n)))
+
+    threads = threading.active_count()
+    started = time.perf_counter()
+    assert asyncio.run(many(200)) == ['ok'] * 200
+    assert time.perf_counter() - started < 2
+    assert threading.active_count() == threads
+
+
+def test_shared_event_loop_runs_off_the_request_thread(app):
+    import threading
+
+    from flask import current_app
+
+    from app.services import async_service
+
+    app.config['TASKS_RUN_INLINE'] = False
+
+    async def where():
+        name = threading.current_thread().name
+        return name, await async_service.in_app(app, lambda: (threading.current_thread().name, current_app.name))
+
+    loop_thread, (executor_thread, app_name) = async_service.submit(where()).result(timeout=5)
+    assert loop_thread == 'cv-async'
+    assert executor_thread not in ('cv-async', threading.current_thread().name)
+    assert app_name == app.name
+
+
+def test_blocking_and_async_calls_share_the_user_cap():
+    import asyncio
+    import threading
+
+    from app.services.openai_service import _UserSlots
+
+    slots = _UserSlots()
+    entered = []
+
+    async def async_call(name):
+        async with slots.hold_async(1, 2):
+            entered.append(name)
+
+    async def scenario():
+        with slots.hold(1, 2):
+            blocked = threading.Event()
+
+            def blocking_call():
+                with slots.hold(1, 2):
+                    blocked.wait(5)
+            thread = threading.Thread(target=blocking_call)
+            thread.start()
+            # Both slots are taken, one by each kind of caller
+            waiting = asyncio.ensure_future(async_call('waiting'))
+            cancelled = asyncio.ensure_future(async_call('cancelled'))
+            await asyncio.sleep(0.05)
+            assert entered == []
+            cancelled.cancel()
+            blocked.set()
+            await asyncio.to_thread(thread.join)
+            await waiting
+            assert entered == ['waiting']
+        assert cancelled.cancelled()
+
+    asyncio.run(scenario())
+    # Users with nothing in flight are forgotten
+    assert slots.users == {}
@@ -0,0 +1,51 @@
+import io
+import json
+
+import pytest
+
+from app.services.json_stream import iter_events
+
+
+def _events(obj_or_bytes, **kwargs):
+    data = obj_or_bytes if isinstance(obj_or_bytes, bytes) else json.dumps(obj_or_bytes, indent=2).encode()
+    return list(iter_events(io.BytesIO(data), **kwargs))
+
+
+def test_iter_events_small_chunks():
+    doc = {
+        'version': 1,
+        'profile': {'first_name': 'Zoë', 'bio': 'Ünïcode ✓'},
+        'experiences': [{'title': f'Role {n}', 'n': n * 1234567} for n in range(20)],
+        'empty': [],
+        'settings': {'font_size': 11},
+    }
+    events = _events(doc, chunk_size=3)
+    assert events[0] == ('value', 'version', 1)
+    assert events[1] == ('value', 'profile', doc['profile'])
+    assert events[2] == ('start', 'experiences', None)
+    assert [v for e, k, v in events if e == 'item'] == doc['experiences']
+    assert ('start', 'empty', None) in events
+    assert events[-1] == ('value', 'settings', {'font_size': 11})
+
+
+def test_iter_events_empty_object():
+    assert _events(b'  {}  ') == []
+
+
+@pytest.mark.parametrize('payload', [
+    b'not json',
+    b'[1, 2]',
+    b'{"a": [1, 2}',
+    b'{"a": 1',
+    b'{"a": 1} trailing',
+    b'{"a": 1,, "b": 2}',
+    b'{"a": "\xff"}',
+])
+def test_iter_events_malformed(payload):
+    with pytest.raises(ValueError):
+        _events(payload, chunk_size=4)
+
+
+def test_iter_events_record_limit():
+    with pytest.raises(ValueError, match='maximum allowed size'):
+        _events({'items': ['x' * 1000]}, max_value_chars=100, chunk_size=16)
@@ -0,0 +1,102 @@
+import io
+import json
+
+from app.database import get_db
+from app.services.keyword_service import normalize_keyword, parse_keywords
+from tests.conftest import register_and_login
+
+
+def _analyze(client, monkeypatch, keywords):
+    monkeypatch.setattr(
+        'app.services.openai_service.analyze_job',
+        lambda user_id, description, bypass_cache=False, deadline=None: ({'extracted_keywords': keywords}, {
+            'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0, 'cached_tokens': 0,
+        }),
+    )
+    res = client.post('/api/job/analyze', json={'job_description': 'A job'})
+    assert res.status_code == 201
+    return res.get_json()['id']
+
+
+def _terms(resource, row_id):
+    return sorted(r[0] for r in get_db().execute(
+        'SELECT k.term FROM item_keywords ik JOIN keywords k ON k.id = ik.keyword_id '
+        'WHERE ik.resource = ? AND ik.row_id = ?', (resource, row_id),
+    ))
+
+
+def test_parse_keywords():
+    assert normalize_keyword('  Machine   Learning. ') == 'machine learning'
+    assert parse_keywords('projects', 'Python, python ,, SQL') == ['python', 'sql']
+    assert parse_keywords('job_analyses', '["Go", 3, "go"]') == ['go']
+    assert parse_keywords('job_analyses', 'not json') == []
+
+
+def test_keywords_follow_writes(client):
+    register_and_login(client)
+    project = client.post('/api/projects', json={'title': 'P', 'keywords': 'Python, Flask'}).get_json()['project']
+    assert _terms('projects', project['id']) == ['flask', 'python']
+
+    client.put(f'/api/projects/{project["id"]}', json={'title': 'P', 'keywords': 'Rust'})
+    assert _terms('projects', project['id']) == ['rust']
+
+    client.delete(f'/api/projects/{project["id"]}')
+    assert _terms('projects', project['id']) == []
+
+
+def test_keywords_follow_bulk_writes(client):
+    register_and_login(client)
+    res = client.post('/api/experiences/bulk', json={'operations': [
+        {'op': 'create', 'data': {'category': 'work', 'title': 'A', 'keywords': 'sql'}},
+        {'op': 'create', 'data': {'category': 'work', 'title': 'B', 'keywords': 'go, sql'}},
+    ]})
+    ids = [r['id'] for r in res.get_json()['results']]
+    assert [_terms('experiences', i) for i in ids] == [['sql'], ['go', 'sql']]
+
+
+def test_overlap_with_active_analysis(client, monkeypatch):
+    register_and_login(client)
+    exp = client.post('/api/experiences', json={
+        'category': 'work', 'title': 'E', 'keywords': 'Python, SQL, Docker',
+    }).get_json()['experience']
+    proj = client.post('/api/projects', json={'title': 'P', 'keywords': 'python'}).get_json()['project']
+    client.post('/api/projects', json={'title': 'Unrelated', 'keywords': 'knitting'})
+
+    analysis_id = _analyze(client, monkeypatch, ['Python', 'SQL', 'Kubernetes'])
+
+    res = client.get('/api/job/overlap')
+    assert res.status_code == 200
+    assert res.get_json() == {
+        'analysis_id': analysis_id,
+        'experiences': [{'id': exp['id'], 'matches': 2, 'keywords': ['python', 'sql']}],
+        'projects': [{'id': proj['id'], 'matches': 1, 'keywords': ['python']}],
+    }
+
+
+def test_overlap_for_specific_analysis_and_missing(client, monkeypatch):
+    register_and_login(client)
+    assert client.get('/api/job/overlap').status_code == 404
+    assert client.get('/api/job/overlap?analysis_id=999').status_code == 404
+
+    client.post('/api/projects', json={'title': 'P', 'keywords': 'go'})
+    first = _analyze(client, monkeypatch, ['go'])
+    _analyze(client, monkeypatch, ['rust'])
+
+    assert client.get('/api/job/overlap').get_json()['projects'] == []
+    assert len(client.get(f'/api/job/overlap?analysis_id={first}').get_json()['projects']) == 1
+
+
+def test_import_reindexes_keywords(client):
+    register_and_login(client)
+    payload = {
+        'version': 1,
+        'projects': [{'title': 'Imported', 'keywords': 'Elixir'}],
+        'job_analyses': [{'job_description': 'J', 'extracted_keywords': ['elixir'], 'is_active': 1}],
+    }
+    res = client.post('/api/data/import', data={
+        'file': (io.BytesIO(json.dumps(payload).encode()), 'export.json'),
+    }, content_type='multipart/form-data')
+    assert res.status_code == 202
+
+    overlap = client.get('/api/job/overlap').get_json()
+    assert [p['keywords'] for p in overlap['projects']] == [['elixir']]
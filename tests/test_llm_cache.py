@@ -0,0 +1,129 @@
+from app.database import get_db
+from app.services import llm_cache_service
+from app.services.llm_cache_service import cache_key, cache_report
+from tests.conftest import register_and_login, use_fake_openai
+
+
+def _reply(messages, **kwargs):
+    if 'suggestions' in messages[0]['content']:
+        return {'suggestions': ['Built things.']}
+    return {'extracted_keywords': ['python']}
+
+
+def test_cache_key_covers_version_and_request():
+    request = {'model': 'm', 'temperature': 0.3, 'messages': [{'role': 'user', 'content': 'hi'}]}
+    key = cache_key('analyze', 1, request)
+    assert key == cache_key('analyze', 1, dict(reversed(list(request.items()))))
+    assert key != cache_key('analyze', 2, request)
+    assert key != cache_key('blurbs', 1, request)
+    assert key != cache_key('analyze', 1, {**request, 'temperature': 0.7})
+    assert key != cache_key('analyze', 1, {**request, 'messages': [{'role': 'user', 'content': 'hi!'}]})
+
+
+def test_repeated_analysis_is_served_from_cache(client, monkeypatch):
+    register_and_login(client)
+    fake = use_fake_openai(monkeypatch, _reply)
+    body = {'job_description': 'Python developer'}
+
+    first = client.post('/api/job/analyze', json=body).get_json()['analyses'][0]
+    second = client.post('/api/job/analyze', json=body).get_json()['analyses'][0]
+    assert len(fake.calls) == 1
+    assert second['extracted_keywords'] == first['extracted_keywords']
+    assert (first['total_tokens'], second['total_tokens']) == (15, 0)
+
+    client.post('/api/job/analyze', json={**body, 'bypass_cache': True})
+    assert len(fake.calls) == 2
+
+    client.post('/api/job/analyze', json={'job_description': 'Rust developer'})
+    assert len(fake.calls) == 3
+
+    hits = [r[0] for r in get_db().execute('SELECT cache_hit FROM prompt_metrics ORDER BY id')]
+    assert hits == [0, 1, 0, 0]
+    entry = get_db().execute("SELECT hits FROM llm_cache WHERE kind = 'analyze' ORDER BY id").fetchone()
+    assert entry['hits'] == 1
+
+
+def test_regenerate_bypasses_cached_blurbs(client, monkeypatch):
+    register_and_login(client)
+    fake = use_fake_openai(monkeypatch, _reply)
+    body = {'field_key': 'summary', 'template_name': 'classic'}
+
+    assert client.post('/api/blurbs/generate', json=body).status_code == 201
+    assert client.post('/api/blurbs/generate', json=body).status_code == 201
+    assert len(fake.calls) == 1
+    client.post('/api/blurbs/generate', json={**body, 'bypass_cache': True})
+    assert len(fake.calls) == 2
+
+    report = {r['kind']: r for r in cache_report(get_db())}
+    assert report['blurbs']['calls'] == 3
+    assert report['blurbs']['cache_hits'] == 1
+    assert report['blurbs']['hit_rate'] == 1 / 3
+    assert report['blurbs']['tokens_saved'] == 15
+
+
+def test_malformed_replies_are_not_cached(client, monkeypatch):
+    register_and_login(client)
+    replies = ['{"extracted_keywords": ["pyth', {'extracted_keywords': ['python']}]
+    fake = use_fake_openai(monkeypatch, lambda messages, **kwargs: replies.pop(0) if len(replies) > 1 else replies[0])
+    body = {'job_description': 'Python developer'}
+
+    res = client.post('/api/job/analyze', json=body)
+    assert res.status_code == 502
+    assert 'malformed' in res.get_json()['error']
+    assert get_db().execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0] == 0
+
+    assert client.post('/api/job/analyze', json=body).status_code == 201
+    assert client.post('/api/job/analyze', json=body).status_code == 201
+    assert len(fake.calls) == 2
+
+
+def test_opting_out_skips_and_clears_the_cache(client, monkeypatch):
+    register_and_login(client)
+    fake = use_fake_openai(monkeypatch, _reply)
+    body = {'job_description': 'Python developer'}
+    client.post('/api/job/analyze', json=body)
+    assert get_db().execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0] == 1
+
+    res = client.put('/api/settings', json={'llm_cache_enabled': False})
+    assert res.get_json()['settings']['llm_cache_enabled'] is False
+    assert get_db().execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0] == 0
+
+    client.post('/api/job/analyze', json=body)
+    client.post('/api/job/analyze', json=body)
+    assert len(fake.calls) == 3
+    assert get_db().execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0] == 0
+
+
+def test_entries_expire_and_least_recently_used_are_evicted(app, client):
+    register_and_login(client)
+    user_id = get_db().execute('SELECT id FROM users').fetchone()[0]
+    app.config['LLM_CACHE_MAX_ENTRIES'] = 2
+
+    llm_cache_service.store(user_id, 'summary', [('a', 'A', 1, 1), ('b', 'B', 1, 1)])
+    get_db().execute("UPDATE llm_cache SET last_used_at = last_used_at - 10")
+    assert llm_cache_service.lookup(user_id, ['a']) == ['A']
+    llm_cache_service.store(user_id, 'summary', [('c', 'C', 1, 1)])
+    assert llm_cache_service.lookup(user_id, ['a', 'b', 'c']) == ['A', None, 'C']
+
+    app.config['LLM_CACHE_TTL'] = 0
+    assert llm_cache_service.lookup(user_id, ['a', 'c']) == [None, None]
+
+
+def test_lookup_takes_the_write_lock_only_for_hits(app, client, monkeypatch):
+    register_and_login(client)
+    user_id = get_db().execute('SELECT id FROM users').fetchone()[0]
+    llm_cache_service.store(user_id, 'summary', [('a', 'A', 1, 1)])
+
+    writes = []
+    write_transaction = llm_cache_service.write_transaction
+
+    def counting_write_transaction():
+        writes.append(1)
+        return write_transaction()
+    monkeypatch.setattr(llm_cache_service, 'write_transaction', counting_write_transaction)
+
+    assert llm_cache_service.lookup(user_id, ['b', 'c']) == [None, None]
+    assert writes == []
+    assert llm_cache_service.lookup(user_id, ['a', 'b']) == ['A', None]
+    assert writes == [1]
+    assert get_db().execute('SELECT hits FROM llm_cache').fetchone()[0] == 1
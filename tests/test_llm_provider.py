@@ -0,0 +1,122 @@
+import asyncio
+import json
+import time
+
+import openai
+import pytest
+
+from app import create_app
+from app.services import openai_service
+from app.services.fake_llm import AsyncFakeLLM, FakeLLM
+from config import TestConfig
+from tests.conftest import register_and_login
+
+_JOB = 'Senior Python developer. Kafka, PostgreSQL and Kubernetes in production.'
+
+
+def _request(**kwargs):
+    return {
+        'model': 'fake-llm',
+        'messages': [{'role': 'system', 'content': 'Analyze.'}, {'role': 'user', 'content': f'## Job Description\n{_JOB}'}],
+        'response_format': {'type': 'json_object'},
+        **kwargs,
+    }
+
+
+@pytest.fixture
+def fake_provider(app):
+    app.config.update(LLM_PROVIDER='fake', LLM_FAKE_LATENCY=0, LLM_FAKE_LATENCY_SIGMA=0)
+    return app
+
+
+def test_fake_provider_serves_the_app_without_a_key(client, fake_provider):
+    register_and_login(client)
+
+    res = client.post('/api/job/analyze', json={'job_description': _JOB})
+    assert res.status_code == 201
+    analysis = res.get_json()['analyses'][0]
+    assert 'kafka' in json.loads(analysis['extracted_keywords'])
+    assert analysis['total_tokens'] > 0
+
+    res = client.post('/api/blurbs/generate', json={'field_key': 'summary', 'template_name': 'classic'})
+    assert res.status_code == 201
+    assert len(res.get_json()['blurbs']) == 3
+
+    res = client.post('/api/blurbs/generate/stream', json={'field_key': 'summary', 'bypass_cache': True})
+    assert res.get_data(as_text=True).count('event: blurb') == 3
+
+
+def test_model_and_base_url_come_from_config(client, fake_provider):
+    register_and_login(client)
+    fake_provider.config['LLM_MODEL'] = 'local-model'
+    client.post('/api/job/analyze', json={'job_description': _JOB})
+    with client:
+        client.get('/api/settings')
+        fake = openai_service._get_client(1)
+        assert [call['model'] for call in fake.calls] == ['local-model']
+
+        fake_provider.config.update(
+            LLM_PROVIDER='openai', LLM_BASE_URL='http://localhost:8000/v1', LLM_API_KEY='sk-local',
+        )
+        local = openai_service._get_client(1)
+        assert str(local.base_url) == 'http://localhost:8000/v1/'
+        assert local.api_key == 'sk-local'
+        assert local.max_retries == 0
+
+
+def test_fake_llm_is_deterministic():
+    first, second = FakeLLM(latency=0.01, seed=7), FakeLLM(latency=0.01, seed=7)
+    plans = [first._plan(_request()) for _ in range(2)]
+    assert plans == [second._plan(_request()) for _ in range(2)]
+    # A retry of the same request draws a new latency, as does another seed
+    assert plans[0][0] != plans[1][0]
+    assert FakeLLM(latency=0.01, seed=8)._plan(_request())[0] != plans[0][0]
+
+    response = FakeLLM(latency=0, sigma=0).chat.completions.create(**_request())
+    assert 'kafka' in json.loads(response.choices[0].message.content)['extracted_keywords']
+    assert response.usage.total_tokens == response.usage.prompt_tokens + response.usage.completion_tokens
+
+
+def test_fake_llm_injects_errors_and_timeouts():
+    with pytest.raises(openai.InternalServerError):
+        FakeLLM(latency=0, error_rate=1).chat.completions.create(**_request())
+    with pytest.raises(openai.RateLimitError) as info:
+        FakeLLM(latency=0, error_rate=1, error_status=429).chat.completions.create(**_request())
+    assert info.value.response.headers['retry-after'] == '1'
+
+    started = time.perf_counter()
+    with pytest.raises(openai.APITimeoutError):
+        FakeLLM(latency=5, sigma=0).chat.completions.create(**_request(timeout=0.05))
+    assert time.perf_counter() - started < 1
+
+
+def test_fake_llm_streams_tokens():
+    fake = FakeLLM(latency=0, sigma=0, token_delay=0.001)
+    chunks = list(fake.chat.completions.create(**_request(stream=True)))
+    text = ''.join(c.choices[0].delta.content for c in chunks if c.choices)
+    assert len(chunks) > 3
+    assert json.loads(text)['extracted_keywords']
+    assert chunks[-1].usage.completion_tokens > 0
+
+    async def collect():
+        stream = await AsyncFakeLLM(latency=0, sigma=0).chat.completions.create(**_request(stream=True))
+        return ''.join([c.choices[0].delta.content async for c in stream if c.choices])
+    assert asyncio.run(collect()) == text
+
+
+def test_fake_llm_memory_is_bounded(monkeypatch):
+    from app.services import fake_llm
+    monkeypatch.setattr(fake_llm, '_PREFIX_CACHE_MAX_ENTRIES', 3)
+    fake = FakeLLM(latency=0, sigma=0, history=2)
+    for n in range(5):
+        fake.chat.completions.create(**_request(seed=n))
+        fake._cached_tokens([{'role': 'user', 'content': f'prefix {n} ' * 2000}])
+    assert [call['seed'] for call in fake.calls] == [3, 4]
+    assert len(fake._attempts) == 2
+    assert len(fake._prefixes) == 3
+
+
+def test_unknown_provider_fails_at_start_up():
+    config = type('BadProviderConfig', (TestConfig,), {'LLM_PROVIDER': 'nope'})
+    with pytest.raises(ValueError, match='Unknown LLM_PROVIDER'):
+        create_app(config)
@@ -0,0 +1,114 @@
+from tests.conftest import register_and_login
+
+
+def _pages(client, url):
+    pages = []
+    while url:
+        res = client.get(url)
+        assert res.status_code == 200
+        pages.append(res.get_json())
+        cursor = res.headers.get('X-Next-Cursor')
+        base = url.split('&cursor=')[0]
+        url = f'{base}&cursor={cursor}' if cursor else None
+    return pages
+
+
+def test_keyset_pages_cover_the_list_once(client):
+    register_and_login(client)
+    client.post('/api/projects/bulk', json={'operations': [
+        {'op': 'create', 'data': {'title': f'P{n}'}} for n in range(7)
+    ]})
+
+    pages = _pages(client, '/api/projects?limit=3')
+    assert [len(p) for p in pages] == [3, 3, 1]
+    titles = [p['title'] for page in pages for p in page]
+    assert titles == [p['title'] for p in client.get('/api/projects').get_json()]
+
+
+def test_pagination_is_stable_under_inserts(client):
+    register_and_login(client)
+    for n in range(4):
+        client.post('/api/experiences', json={'category': 'work', 'title': f'E{n}'})
+
+    first = client.get('/api/experiences?limit=2')
+    client.post('/api/experiences', json={'category': 'work', 'title': 'New'})
+    rest = client.get(f'/api/experiences?limit=10&cursor={first.headers["X-Next-Cursor"]}')
+    titles = [e['title'] for e in first.get_json() + rest.get_json()]
+    assert titles == ['E0', 'E1', 'E2', 'E3', 'New']
+    assert 'X-Next-Cursor' not in rest.headers
+
+
+def test_no_paging_params_returns_full_list(client):
+    register_and_login(client)
+    for n in range(3):
+        client.post('/api/projects', json={'title': f'P{n}'})
+    res = client.get('/api/projects')
+    assert len(res.get_json()) == 3
+    assert 'X-Next-Cursor' not in res.headers
+
+
+def test_category_filter(client):
+    register_and_login(client)
+    client.post('/api/experiences', json={'category': 'work', 'title': 'Job'})
+    client.post('/api/experiences', json={'category': 'education', 'title': 'MSc'})
+    res = client.get('/api/experiences?category=education')
+    assert [e['title'] for e in res.get_json()] == ['MSc']
+    assert client.get('/api/experiences?category=nope').status_code == 400
+
+
+def test_sparse_fieldsets(client):
+    register_and_login(client)
+    client.post('/api/experiences', json={'category': 'work', 'title': 'Job', 'description': 'x' * 1000})
+    rows = client.get('/api/experiences?fields=title,category').get_json()
+    assert rows == [{'id': rows[0]['id'], 'title': 'Job', 'category': 'work'}]
+
+    full = client.get(f'/api/experiences/{rows[0]["id"]}').get_json()
+    assert full['description'] == 'x' * 1000
+
+
+def test_fields_with_cursor_still_pages(client):
+    register_and_login(client)
+    for n in range(3):
+        client.post('/api/projects', json={'title': f'P{n}'})
+    pages = _pages(client, '/api/projects?fields=title&limit=2')
+    assert [[p['title'] for p in page] for page in pages] == [['P0', 'P1'], ['P2']]
+    assert set(pages[0][0]) == {'id', 'title'}
+
+
+def test_analyses_descending_pages_and_filter(client, app):
+    from app.database import write_transaction
+    register_and_login(client)
+    with write_transaction() as db:
+        db.executemany(
+            'INSERT INTO job_analyses (user_id, job_description, is_active, created_at) VALUES (1, ?, ?, ?)',
+            [(f'Job {n}', int(n == 4), f'2024-01-0{n + 1} 00:00:00') for n in range(5)],
+        )
+
+    pages = _pages(client, '/api/job/analyses?limit=2&fields=job_description')
+    assert [a['job_description'] for page in pages for a in page] == [f'Job {n}' for n in (4, 3, 2, 1, 0)]
+
+    active = client.get('/api/job/analyses?is_active=1').get_json()
+    assert [a['job_description'] for a in active] == ['Job 4']
+
+
+def test_blurb_filters(client, app):
+    from app.database import write_transaction
+    register_and_login(client)
+    with write_transaction() as db:
+        db.executemany(
+            "INSERT INTO blurbs (user_id, template_name, field_key, suggestion_text, status) "
+            "VALUES (1, 'classic', ?, 'text', ?)",
+            [('summary', 'accepted'), ('summary', 'pending'), ('skills', 'accepted')],
+        )
+    rows = client.get('/api/blurbs?field_key=summary&status=accepted').get_json()
+    assert [(b['field_key'], b['status']) for b in rows] == [('summary', 'accepted')]
+    assert client.get('/api/blurbs?status=bogus').status_code == 400
+
+
+def test_invalid_paging_params(client):
+    register_and_login(client)
+    assert client.get('/api/projects?limit=0').status_code == 400
+    assert client.get('/api/projects?limit=abc').status_code == 400
+    assert client.get('/api/projects?limit=100000').status_code == 400
+    assert client.get('/api/projects?cursor=garbage').status_code == 400
+    assert client.get('/api/projects?fields=title,password').status_code == 400
@@ -33,3 +33,10 @@ def test_update_profile(client):
     assert data['first_name'] == 'John'
     assert data['last_name'] == 'Doe'
     assert data['bio'] == 'A software engineer.'
+
+
+def test_update_profile_returns_profile(client):
+    register_and_login(client)
+    res = client.put('/api/profile', json={'first_name': 'Jane', 'bio': 'Hi'})
+    assert res.get_json()['profile'] == client.get('/api/profile').get_json()
+    assert res.get_json()['profile']['first_name'] == 'Jane'
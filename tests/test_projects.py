@@ -69,3 +69,55 @@ def test_reorder_projects(client):
 
     projects = client.get('/api/projects').get_json()
     assert projects[0]['title'] == 'B'
+
+
+def test_bulk_projects(client):
+    register_and_login(client)
+    client.post('/api/projects', json={'title': 'Old'})
+    old_id = client.get('/api/projects').get_json()[0]['id']
+
+    res = client.post('/api/projects/bulk', json={'operations': [
+        {'op': 'create', 'data': {'title': f'Project {n}'}} for n in range(20)
+    ] + [{'op': 'delete', 'id': old_id}]})
+    assert res.status_code == 200
+    assert len(res.get_json()['results']) == 21
+
+    projects = client.get('/api/projects').get_json()
+    assert [p['title'] for p in projects] == [f'Project {n}' for n in range(20)]
+
+
+def test_bulk_projects_missing_title(client):
+    register_and_login(client)
+    res = client.post('/api/projects/bulk', json={'operations': [{'op': 'create', 'data': {}}]})
+    assert res.status_code == 400
+    assert client.get('/api/projects').get_json() == []
+
+
+def test_move_project(client):
+    register_and_login(client)
+    for title in ('A', 'B', 'C'):
+        client.post('/api/projects', json={'title': title})
+    a, b, c = [p['id'] for p in client.get('/api/projects').get_json()]
+
+    res = client.put(f'/api/projects/{a}/position', json={'after_id': c})
+    assert res.status_code == 200
+    assert [p['title'] for p in client.get('/api/projects').get_json()] == ['B', 'C', 'A']
+
+
+def test_project_mutations_return_rows(client):
+    register_and_login(client)
+    first = client.post('/api/projects', json={'title': 'A'}).get_json()['project']
+    second = client.post('/api/projects', json={'title': 'B'}).get_json()['project']
+
+    res = client.put(f'/api/projects/{second["id"]}/position', json={'before_id': first['id']})
+    moved = res.get_json()['project']
+    assert moved['sort_key'] == res.get_json()['sort_key']
+
+    res = client.post('/api/projects/bulk', json={'operations': [
+        {'op': 'create', 'data': {'title': 'C'}},
+        {'op': 'delete', 'id': first['id']},
+    ]})
+    assert [p['title'] for p in res.get_json()['projects']] == ['C']
+
+    res = client.put('/api/projects/reorder', json={'order': [moved['id']]})
+    assert res.get_json()['projects'] == client.get('/api/projects').get_json()
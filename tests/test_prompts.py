@@ -0,0 +1,205 @@
+from app.database import get_db
+from app.services.openai_service import (
+    TokenBudget, estimate_tokens, fit_job_description, prompt_ab_report, prompt_arm, split_into_chunks,
+)
+from tests.conftest import FakeOpenAI, register_and_login, use_fake_openai
+
+
+def _add_background(client):
+    client.post('/api/experiences', json={
+        'category': 'work', 'title': 'Kafka engineer', 'description': 'Streaming pipelines in Kafka and Python',
+    })
+    for i in range(5):
+        client.post('/api/projects', json={'title': f'Pottery {i}', 'description': 'Glazes and kilns ' * 20})
+
+
+def test_estimate_tokens():
+    assert estimate_tokens('') == 0
+    assert estimate_tokens('Hello, world!') == 4
+    assert estimate_tokens('internationalization') == 4
+
+
+def test_prompt_arm_control_share(app):
+    assert prompt_arm(1) == 'pruned'
+    app.config['PROMPT_PRUNING_CONTROL_PERCENT'] = 100
+    assert prompt_arm(1) == 'full'
+    app.config['PROMPT_PRUNING_CONTROL_PERCENT'] = 50
+    arms = [prompt_arm(user_id) for user_id in range(1, 201)]
+    assert 60 < arms.count('full') < 140
+    assert arms[:20] == [prompt_arm(user_id) for user_id in range(1, 21)]
+    app.config['PROMPT_PRUNING'] = False
+    assert prompt_arm(1) == 'full'
+
+
+def test_analyze_prompt_keeps_relevant_items_within_budget(app, client, monkeypatch):
+    register_and_login(client)
+    _add_background(client)
+    app.config['PROMPT_ITEM_TOKEN_BUDGET'] = 150
+    fake = use_fake_openai(monkeypatch, {'extracted_keywords': ['kafka']})
+
+    res = client.post('/api/job/analyze', json={'job_description': 'Kafka and Python data engineer'})
+    assert res.status_code == 201
+    prompt = fake.prompts[0]
+    assert 'Kafka engineer' in prompt
+    assert prompt.count('Pottery') < 5
+
+    metric = get_db().execute('SELECT * FROM prompt_metrics').fetchone()
+    assert (metric['kind'], metric['arm'], metric['items_total']) == ('analyze', 'pruned', 6)
+    assert metric['items_sent'] < 6
+    assert metric['sent_tokens'] <= 150 < metric['full_tokens']
+
+
+def test_full_arm_sends_everything(app, client, monkeypatch):
+    register_and_login(client)
+    _add_background(client)
+    app.config['PROMPT_ITEM_TOKEN_BUDGET'] = 150
+    app.config['PROMPT_PRUNING_CONTROL_PERCENT'] = 100
+    fake = use_fake_openai(monkeypatch, {'extracted_keywords': []})
+
+    client.post('/api/job/analyze', json={'job_description': 'Kafka engineer'})
+    assert fake.prompts[0].count('Pottery') == 5
+    metric = get_db().execute('SELECT arm, items_sent, full_tokens, sent_tokens FROM prompt_metrics').fetchone()
+    assert metric['arm'] == 'full'
+    assert metric['items_sent'] == 6
+    assert metric['full_tokens'] == metric['sent_tokens']
+
+
+def test_blurbs_are_linked_to_their_metric_for_the_report(client, monkeypatch):
+    register_and_login(client)
+    _add_background(client)
+    use_fake_openai(monkeypatch, {'suggestions': ['One', 'Two']})
+
+    res = client.post('/api/blurbs/generate', json={'field_key': 'summary'})
+    assert res.status_code == 201
+    blurbs = res.get_json()['blurbs']
+    client.put(f'/api/blurbs/{blurbs[0]["id"]}', json={'status': 'accepted'})
+    client.put(f'/api/blurbs/{blurbs[1]["id"]}', json={'status': 'rejected'})
+
+    report = prompt_ab_report(get_db())
+    assert len(report) == 1
+    assert report[0]['kind'] == 'blurbs'
+    assert report[0]['arm'] == 'pruned'
+    assert report[0]['calls'] == 1
+    assert report[0]['blurb_keep_rate'] == 0.5
+
+
+def test_split_into_chunks_respects_boundaries_and_limit():
+    paragraph = 'Python is required. Kafka is a plus. ' * 20
+    text = '\n\n'.join([paragraph] * 3)
+    chunks = split_into_chunks(text, 100)
+    assert len(chunks) > 3
+    assert all(estimate_tokens(c) <= 100 for c in chunks)
+    assert all(c.endswith('.') for c in chunks)
+    assert ' '.join(chunks).split() == text.split()
+
+    assert split_into_chunks('short text', 100) == ['short text']
+    assert all(estimate_tokens(c) <= 3 for c in split_into_chunks('word ' * 10, 3))
+
+
+def test_fit_job_description_map_reduces_long_text(app):
+    app.config['JOB_DESCRIPTION_TOKEN_BUDGET'] = 200
+    app.config['JOB_CHUNK_TOKENS'] = 150
+    client = FakeOpenAI(lambda messages, **kwargs: 'Needs Python and Kafka.', usage=(100, 20))
+    budget = TokenBudget()
+
+    assert fit_job_description(client, 1, 'Short posting.', budget) == 'Short posting.'
+    assert client.calls == []
+
+    text = 'We need Python. We need Kafka. Benefits include snacks. ' * 60
+    fitted = fit_job_description(client, 1, text, budget)
+    assert estimate_tokens(fitted) <= 200
+    assert 'Needs Python and Kafka.' in fitted
+    calls = len(client.calls)
+    assert calls > 1
+    assert budget.as_dict() == {
+        'prompt_tokens': 100 * calls, 'completion_tokens': 20 * calls, 'total_tokens': 120 * calls, 'cached_tokens': 0,
+    }
+
+
+def test_fit_job_description_cuts_when_summaries_stay_too_long(app):
+    app.config['JOB_DESCRIPTION_TOKEN_BUDGET'] = 50
+    app.config['JOB_CHUNK_TOKENS'] = 40
+    app.config['JOB_REDUCE_ROUNDS'] = 2
+    client = FakeOpenAI(lambda messages, **kwargs: messages[-1]['content'])
+    fitted = fit_job_description(client, 1, 'Python and Kafka. ' * 100, TokenBudget())
+    assert estimate_tokens(fitted) <= 50
+
+
+def test_analysis_stores_token_usage(app, client, monkeypatch):
+    register_and_login(client)
+    app.config['JOB_DESCRIPTION_TOKEN_BUDGET'] = 100
+    app.config['JOB_CHUNK_TOKENS'] = 80
+
+    def reply(messages, **kwargs):
+        if kwargs.get('response_format'):
+            return {'extracted_keywords': ['python']}
+        return 'Python role.'
+
+    fake = use_fake_openai(monkeypatch, reply, usage=(50, 10))
+    res = client.post('/api/job/analyze', json={'job_description': 'Python is required here. ' * 60})
+    assert res.status_code == 201
+
+    analysis = res.get_json()['analyses'][0]
+    calls = len(fake.calls)
+    assert calls > 2
+    assert 'Python role.' in fake.prompts[-1]
+    assert (analysis['prompt_tokens'], analysis['completion_tokens'], analysis['total_tokens']) == (
+        50 * calls, 10 * calls, 60 * calls,
+    )
+    # The stored description is the original, not the summary
+    assert analysis['job_description'].startswith('Python is required here.')
+
+
+def test_background_is_memoized_per_data_version(client, monkeypatch):
+    from app.services import openai_service
+    register_and_login(client)
+    _add_background(client)
+    loads = []
+    load = openai_service._get_user_data
+    monkeypatch.setattr(openai_service, '_get_user_data', lambda user_id: loads.append(user_id) or load(user_id))
+    fake = use_fake_openai(monkeypatch, {'extracted_keywords': []})
+
+    client.post('/api/job/analyze', json={'job_description': 'Kafka engineer'})
+    client.post('/api/job/analyze', json={'job_description': 'Python engineer'})
+    assert len(loads) == 1
+
+    client.put('/api/profile', json={'first_name': 'Ada', 'last_name': 'Lovelace'})
+    client.post('/api/job/analyze', json={'job_description': 'Rust engineer'})
+    assert len(loads) == 2
+    assert 'Name: Ada Lovelace' in fake.prompts[-1]
+
+
+def test_prompts_share_a_stable_prefix(client, monkeypatch):
+    register_and_login(client)
+    _add_background(client)
+    fake = use_fake_openai(monkeypatch, lambda messages, **kwargs: (
+        {'suggestions': ['Done.']} if '"suggestions"' in messages[0]['content'] else {'extracted_keywords': ['kafka']}
+    ))
+
+    client.post('/api/job/analyze', json={'job_description': 'Kafka engineer'})
+    analyze_prompt = fake.prompts[0]
+    assert analyze_prompt.startswith('## Candidate Background\n')
+    assert analyze_prompt.endswith('## Job Description\nKafka engineer\n')
+
+    client.post('/api/blurbs/generate-all', json={'field_keys': ['professional_summary', 'skills_summary']})
+    first, second = fake.prompts[1:]
+    prefix = first[:first.index('## Task')]
+    assert second.startswith(prefix)
+    assert 'Kafka engineer' in prefix and '## Target Job Keywords\nkafka' in prefix
+    assert 'professional_summary' in first[len(prefix):] and 'skills_summary' in second[len(prefix):]
+    assert [m[0]['content'] for m, _ in fake.calls[1:]] == [fake.calls[1][0][0]['content']] * 2
+
+
+def test_cached_prompt_tokens_are_reported(client, monkeypatch):
+    register_and_login(client)
+    use_fake_openai(monkeypatch, {'extracted_keywords': [], 'suggestions': ['Done.']}, usage=(50, 10, 32))
+
+    res = client.post('/api/job/analyze', json={'job_description': 'Kafka engineer'})
+    assert res.get_json()['analyses'][0]['cached_tokens'] == 32
+    client.post('/api/blurbs/generate', json={'field_key': 'professional_summary'})
+    res = client.post('/api/blurbs/generate/stream', json={'field_key': 'professional_summary', 'bypass_cache': True})
+    assert 'event: blurb' in res.get_data(as_text=True)
+
+    cached = [r[0] for r in get_db().execute('SELECT cached_tokens FROM prompt_metrics ORDER BY id')]
+    assert cached == [32, 32, 32]
+    assert {r['kind']: r['avg_cached_tokens'] for r in prompt_ab_report(get_db())} == {'analyze': 32, 'blurbs': 32}
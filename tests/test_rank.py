@@ -0,0 +1,71 @@
+import random
+import sqlite3
+
+from app import create_app
+from app.services.rank_service import key_between, spread_keys
+from scripts.stress_writes import make_config
+
+
+def test_key_between_bounds():
+    first = key_between(None, None)
+    after = key_between(first, None)
+    before = key_between(None, first)
+    assert before < first < after
+    middle = key_between(first, after)
+    assert first < middle < after
+
+
+def test_key_between_random_inserts_stay_ordered():
+    rng = random.Random(1234)
+    keys = [key_between(None, None)]
+    for _ in range(500):
+        pos = rng.randint(0, len(keys))
+        lower = keys[pos - 1] if pos > 0 else None
+        upper = keys[pos] if pos < len(keys) else None
+        key = key_between(lower, upper)
+        assert (lower is None or lower < key) and (upper is None or key < upper)
+        assert not key.endswith('0')
+        keys.insert(pos, key)
+    assert keys == sorted(keys)
+    assert len(set(keys)) == len(keys)
+
+
+def test_repeated_appends_stay_short():
+    key = key_between(None, None)
+    for _ in range(1000):
+        key = key_between(key, None)
+    assert len(key) <= 3
+
+
+def test_spread_keys():
+    keys = spread_keys(1000)
+    assert keys == sorted(keys)
+    assert len(set(keys)) == 1000
+    assert all(k and not k.endswith('0') for k in keys)
+    assert spread_keys(0) == []
+
+
+def test_migrates_sort_order_to_sort_key(tmp_path):
+    db_path = str(tmp_path / 'old.db')
+    conn = sqlite3.connect(db_path)
+    conn.executescript('''
+        CREATE TABLE experiences (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL,
+            category TEXT NOT NULL, title TEXT NOT NULL, organization TEXT DEFAULT '',
+            start_date TEXT DEFAULT '', end_date TEXT DEFAULT '', description TEXT DEFAULT '',
+            keywords TEXT DEFAULT '', sort_order INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        INSERT INTO experiences (user_id, category, title, sort_order) VALUES (1, 'work', 'Second', 1);
+        INSERT INTO experiences (user_id, category, title, sort_order) VALUES (1, 'work', 'First', 0);
+    ''')
+    conn.commit()
+    conn.close()
+
+    create_app(make_config(db_path))
+
+    conn = sqlite3.connect(db_path)
+    titles = [r[0] for r in conn.execute('SELECT title FROM experiences ORDER BY sort_key')]
+    assert titles == ['First', 'Second']
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'users'").fetchone()[0] == 1
+    conn.close()
@@ -0,0 +1,201 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from app.services import resilience_service
+from app.services.resilience_service import CallPolicy, CircuitBreaker, LatencyTracker, retry_after
+from tests.conftest import register_and_login, use_fake_openai
+
+_REPLY = {'extracted_keywords': ['python']}
+_BODY = {'job_description': 'Python developer'}
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(resilience_service, 'breaker', CircuitBreaker())
+    monkeypatch.setattr(resilience_service, 'latencies', LatencyTracker())
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(resilience_service.time, 'sleep', slept.append)
+    return slept
+
+
+def _status_error(cls, status, headers=None):
+    request = httpx.Request('POST', 'https://api.openai.com/v1/chat/completions')
+    return cls('upstream says no', response=httpx.Response(status, headers=headers, request=request), body=None)
+
+
+def _failing(errors):
+    """A reply raising ``errors`` in turn, then answering."""
+    errors = list(errors)
+
+    def reply(messages, **kwargs):
+        if errors:
+            raise errors.pop(0)
+        return _REPLY
+    return reply
+
+
+def test_retry_after_header():
+    assert retry_after(_status_error(openai.RateLimitError, 429, {'retry-after': '3'})) == 3
+    assert retry_after(_status_error(openai.RateLimitError, 429, {'retry-after-ms': '250'})) == 0.25
+    assert retry_after(_status_error(openai.RateLimitError, 429, {'retry-after': 'soon'})) is None
+    assert retry_after(_status_error(openai.InternalServerError, 500)) is None
+
+
+def test_transient_errors_are_retried_with_backoff(client, monkeypatch, sleeps):
+    register_and_login(client)
+    fake = use_fake_openai(monkeypatch, _failing([
+        _status_error(openai.RateLimitError, 429, {'retry-after': '2'}),
+        _status_error(openai.InternalServerError, 502),
+    ]))
+
+    res = client.post('/api/job/analyze', json=_BODY)
+    assert res.status_code == 201
+    assert len(fake.calls) == 3
+    assert sleeps[0] >= 2
+    assert 0 <= sleeps[1] <= client.application.config['LLM_RETRY_BASE_DELAY'] * 2
+    assert all(0 < kwargs['timeout'] <= client.application.config['LLM_ATTEMPT_TIMEOUT'] for _, kwargs in fake.calls)
+
+
+def test_exhausted_retries_answer_503_with_retry_after(client, monkeypatch, sleeps):
+    register_and_login(client)
+    client.application.config['LLM_RETRIES'] = 2
+    fake = use_fake_openai(monkeypatch, _failing(
+        [_status_error(openai.RateLimitError, 429, {'retry-after': '7'})] * 3
+    ))
+
+    res = client.post('/api/job/analyze', json=_BODY)
+    assert res.status_code == 503
+    assert res.headers['Retry-After'] == '7'
+    assert 'after 3 attempts' in res.get_json()['error']
+    assert len(fake.calls) == 3
+
+
+def test_client_errors_are_not_retried(client, monkeypatch, sleeps):
+    register_and_login(client)
+    fake = use_fake_openai(monkeypatch, _failing([_status_error(openai.BadRequestError, 400)]))
+
+    res = client.post('/api/job/analyze', json=_BODY)
+    assert res.status_code == 500
+    assert len(fake.calls) == 1
+    assert sleeps == []
+
+
+def test_retries_stop_at_the_deadline(client, monkeypatch, sleeps):
+    register_and_login(client)
+    fake = use_fake_openai(monkeypatch, _failing(
+        [_status_error(openai.RateLimitError, 429, {'retry-after': '60'})]
+    ))
+    client.application.config['LLM_REQUEST_DEADLINE'] = 30
+
+    res = client.post('/api/job/analyze', json=_BODY)
+    assert res.status_code == 503
+    assert len(fake.calls) == 1
+    assert sleeps == []
+
+    client.application.config['LLM_REQUEST_DEADLINE'] = 0
+    res = client.post('/api/job/analyze', json=_BODY)
+    assert res.status_code == 504
+    assert len(fake.calls) == 1
+
+
+def test_breaker_opens_on_outages_and_closes_after_a_probe(client, monkeypatch, sleeps):
+    register_and_login(client)
+    config = client.application.config
+    config['LLM_RETRIES'] = 0
+    config['LLM_BREAKER_THRESHOLD'] = 2
+    fake = use_fake_openai(monkeypatch, _failing([_status_error(openai.InternalServerError, 500)] * 3))
+
+    assert client.post('/api/job/analyze', json=_BODY).status_code == 503
+    assert not resilience_service.breaker.is_open
+    assert client.post('/api/job/analyze', json=_BODY).status_code == 503
+    assert resilience_service.breaker.is_open
+
+    # Open: fails fast without calling OpenAI
+    res = client.post('/api/job/analyze', json=_BODY)
+    assert res.status_code == 503
+    assert 'paused' in res.get_json()['error']
+    assert len(fake.calls) == 2
+
+    # After the cooldown one probe goes through; its failure reopens the breaker
+    resilience_service.breaker.opened_at -= config['LLM_BREAKER_COOLDOWN']
+    assert client.post('/api/job/analyze', json=_BODY).status_code == 503
+    assert len(fake.calls) == 3
+    assert client.post('/api/job/analyze', json=_BODY).status_code == 503
+    assert len(fake.calls) == 3
+
+    resilience_service.breaker.opened_at -= config['LLM_BREAKER_COOLDOWN']
+    assert client.post('/api/job/analyze', json=_BODY).status_code == 201
+    assert not resilience_service.breaker.is_open
+
+
+class _SlowFirstCall:
+    """Client whose first call answers 'slow' after ``delay`` seconds and
+    later ones 'fast' at once. ``cancelled`` counts cancelled async calls."""
+
+    def __init__(self, delay, is_async=False):
+        self.delay = delay
+        self.calls = 0
+        self.cancelled = 0
+        create = self._create_async if is_async else self._create
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=create))
+
+    def _create(self, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            time.sleep(self.delay)
+            return 'slow'
+        return 'fast'
+
+    async def _create_async(self, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            try:
+                await asyncio.sleep(self.delay)
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+            return 'slow'
+        return 'fast'
+
+
+def _hedging_policy(app):
+    app.config['LLM_HEDGE'] = True
+    for _ in range(50):
+        resilience_service.latencies.record('blurbs', 0.02)
+    return CallPolicy(app.config)
+
+
+def test_slow_calls_are_hedged(app):
+    policy = _hedging_policy(app)
+    request = {'messages': [{'role': 'user', 'content': 'hi'}]}
+
+    fake = _SlowFirstCall(delay=1)
+    started = time.perf_counter()
+    assert policy.complete(fake, 'blurbs', request) == 'fast'
+    assert time.perf_counter() - started < 0.5
+    assert fake.calls == 2
+
+    # Too few samples of this kind for a percentile: no hedge
+    fake = _SlowFirstCall(delay=0.1)
+    assert policy.complete(fake, 'analyze', request) == 'slow'
+    assert fake.calls == 1
+
+
+def test_slow_async_calls_are_hedged_and_the_loser_cancelled(app):
+    policy = _hedging_policy(app)
+    fake = _SlowFirstCall(delay=1, is_async=True)
+
+    started = time.perf_counter()
+    response = asyncio.run(policy.complete_async(fake, 'blurbs', {'messages': []}))
+    assert response == 'fast'
+    assert time.perf_counter() - started < 0.5
+    assert (fake.calls, fake.cancelled) == (2, 1)
@@ -0,0 +1,117 @@
+from app.database import get_db
+from app.services.search_service import build_match, rebuild_search_index
+from tests.conftest import register_and_login
+
+
+def _search(client, query):
+    res = client.get(f'/api/search?{query}')
+    assert res.status_code == 200
+    return res.get_json()['results']
+
+
+def test_search_matches_prefixes_across_resources(client):
+    register_and_login(client)
+    client.post('/api/experiences', json={
+        'category': 'work', 'title': 'Data Engineer', 'organization': 'Acme',
+        'description': 'Built streaming pipelines in Python',
+    })
+    client.post('/api/projects', json={'title': 'Pipeline toolkit', 'keywords': 'python,etl'})
+    client.post('/api/projects', json={'title': 'Garden planner'})
+
+    results = _search(client, 'q=pipe')
+    assert {(r['type'], r['title'].replace('<mark>', '').replace('</mark>', '')) for r in results} == {
+        ('experiences', 'Data Engineer'), ('projects', 'Pipeline toolkit'),
+    }
+    project = next(r for r in results if r['type'] == 'projects')
+    assert project['title'] == '<mark>Pipeline</mark> toolkit'
+
+    experience = next(r for r in results if r['type'] == 'experiences')
+    assert '<mark>pipelines</mark>' in experience['snippet']
+
+
+def test_search_ranks_title_matches_first(client):
+    register_and_login(client)
+    client.post('/api/projects', json={'title': 'Other', 'description': 'mentions compiler once'})
+    client.post('/api/projects', json={'title': 'Compiler'})
+
+    results = _search(client, 'q=compiler')
+    assert [r['title'] for r in results] == ['<mark>Compiler</mark>', 'Other']
+
+
+def test_search_requires_every_word(client):
+    register_and_login(client)
+    client.post('/api/projects', json={'title': 'Rust compiler'})
+    client.post('/api/projects', json={'title': 'Rust game'})
+
+    assert len(_search(client, 'q=rust')) == 2
+    assert [r['title'] for r in _search(client, 'q=rust+comp')] == ['<mark>Rust</mark> <mark>compiler</mark>']
+
+
+def test_search_follows_updates_and_deletes(client):
+    register_and_login(client)
+    project = client.post('/api/projects', json={'title': 'Kernel'}).get_json()['project']
+
+    client.put(f'/api/projects/{project["id"]}', json={'title': 'Scheduler'})
+    assert _search(client, 'q=kernel') == []
+    assert [r['id'] for r in _search(client, 'q=sched')] == [project['id']]
+
+    client.delete(f'/api/projects/{project["id"]}')
+    assert _search(client, 'q=sched') == []
+
+
+def test_search_is_scoped_to_user(client):
+    register_and_login(client, 'other', 'other@example.com')
+    client.post('/api/projects', json={'title': 'Secret compiler'})
+    client.post('/api/auth/logout')
+
+    register_and_login(client)
+    assert _search(client, 'q=compiler') == []
+
+
+def test_search_types_filter_and_escaping(client):
+    register_and_login(client)
+    client.post('/api/experiences', json={'category': 'work', 'title': 'Compiler <b>team</b>'})
+    client.post('/api/projects', json={'title': 'Compiler'})
+
+    results = _search(client, 'q=compiler&types=experiences')
+    assert [r['type'] for r in results] == ['experiences']
+    assert results[0]['title'] == '<mark>Compiler</mark> &lt;b&gt;team&lt;/b&gt;'
+
+    # FTS5 syntax in the query is treated as plain words
+    assert len(_search(client, 'q=compiler+AND+NOT+%22%28')) == 0
+    assert len(_search(client, 'q=%22compiler%22*')) == 2
+
+
+def test_search_validation(client):
+    register_and_login(client)
+    assert client.get('/api/search').status_code == 400
+    assert client.get('/api/search?q=x&types=users').status_code == 400
+    assert client.get('/api/search?q=x&limit=0').status_code == 400
+    assert client.get('/api/search?q=%2A%2A').get_json() == {'results': []}
+
+
+def test_search_does_not_match_the_owner_token(client):
+    register_and_login(client)
+    client.post('/api/projects', json={'title': 'Compiler'})
+    assert _search(client, 'q=u') == []
+    assert _search(client, 'q=u1') == []
+    assert len(_search(client, 'q=compiler')) == 1
+
+
+def test_build_match_quotes_terms():
+    assert build_match(3, 'c++ dev-ops') == 'owner:"u3" AND {title body keywords}:("c" "dev"* "ops"*)'
+    assert build_match(3, '  ') is None
+
+
+def test_rebuild_search_index(app, client):
+    register_and_login(client)
+    client.post('/api/projects', json={'title': 'Compiler'})
+
+    db = get_db()
+    db.execute('DELETE FROM projects_fts')
+    db.commit()
+    assert _search(client, 'q=compiler') == []
+
+    rebuild_search_index(db)
+    db.commit()
+    assert len(_search(client, 'q=compiler')) == 1
@@ -59,3 +59,35 @@ def test_list_templates(client):
     assert 'templates' in data
     assert len(data['templates']) >= 1
     assert data['templates'][0]['name'] == 'classic'
+
+
+def test_update_settings_returns_settings(client):
+    register_and_login(client)
+    res = client.put('/api/settings', json={'font_size': 12})
+    assert res.get_json()['settings'] == client.get('/api/settings').get_json()
+
+
+def test_openai_client_is_reused_until_key_changes(app, client):
+    from flask_login import current_user
+
+    from app.services import openai_service
+
+    register_and_login(client)
+    client.put('/api/settings', json={'openai_api_key': 'sk-first'})
+    with client:
+        client.get('/api/settings')
+        user_id = current_user.id
+        first = openai_service._get_client(user_id)
+        assert openai_service._get_client(user_id) is first
+        assert first.api_key == 'sk-first'
+
+    client.put('/api/settings', json={'openai_api_key': 'sk-second'})
+    with client:
+        client.get('/api/settings')
+        second = openai_service._get_client(user_id)
+        assert second is not first
+        assert second.api_key == 'sk-second'
+        assert len([k for k in openai_service._clients if k[0] == user_id]) == 1
+
+        app.config['OPENAI_CLIENT_TTL'] = 0
+        assert openai_service._get_client(user_id) is not second
@@ -0,0 +1,190 @@
+import httpx
+import openai
+
+from app.database import get_db
+from app.services import usage_service
+from app.services.usage_service import TokenBucket
+from tests.conftest import register_and_login, use_fake_openai
+
+
+def _reply(messages, **kwargs):
+    if '"suggestions"' in messages[0]['content']:
+        return {'suggestions': ['Built things.']}
+    return {'extracted_keywords': ['python']}
+
+
+def _usage_rows():
+    return [dict(r) for r in get_db().execute(
+        'SELECT kind, model, prompt_tokens, completion_tokens, cached_tokens, cache_hit, outcome '
+        'FROM llm_usage ORDER BY id'
+    )]
+
+
+def test_calls_are_metered_in_batches(client, monkeypatch):
+    register_and_login(client)
+    use_fake_openai(monkeypatch, _reply, usage=(50, 10, 32))
+    body = {'job_description': 'Python developer'}
+
+    client.post('/api/job/analyze', json=body)
+    client.post('/api/job/analyze', json=body)
+    client.post('/api/blurbs/generate', json={'field_key': 'professional_summary'})
+    res = client.post('/api/blurbs/generate/stream', json={'field_key': 'professional_summary', 'bypass_cache': True})
+    assert 'event: done' in res.get_data(as_text=True)
+    # Buffered, not written on the request path
+    assert _usage_rows() == []
+
+    # The report counts buffered calls without writing them out
+    res = client.get('/api/usage')
+    assert res.status_code == 200
+    data = res.get_json()
+    assert _usage_rows() == []
+    usage_service.flush()
+    assert client.get('/api/usage').get_json() == data
+    model = client.application.config['LLM_MODEL']
+    assert _usage_rows() == [
+        {'kind': 'analyze', 'model': model, 'prompt_tokens': 50, 'completion_tokens': 10,
+         'cached_tokens': 32, 'cache_hit': 0, 'outcome': 'ok'},
+        {'kind': 'analyze', 'model': model, 'prompt_tokens': 0, 'completion_tokens': 0,
+         'cached_tokens': 0, 'cache_hit': 1, 'outcome': 'ok'},
+    ] + [{'kind': 'blurbs', 'model': model, 'prompt_tokens': 50, 'completion_tokens': 10,
+          'cached_tokens': 32, 'cache_hit': 0, 'outcome': 'ok'}] * 2
+
+    by_kind = {r['kind']: r for r in data['by_kind']}
+    assert by_kind['analyze']['calls'] == 2
+    assert by_kind['analyze']['cache_hits'] == 1
+    assert by_kind['analyze']['total_tokens'] == 60
+    assert by_kind['blurbs']['total_tokens'] == 120
+    assert [d['calls'] for d in data['by_day']] == [4]
+    assert data['days'] == 30
+    assert data['quota']['limit'] == client.application.config['LLM_USER_TOKEN_QUOTA']
+
+    assert client.get('/api/usage?days=0').status_code == 400
+
+
+def test_full_batch_is_written_in_the_background(client, monkeypatch):
+    register_and_login(client)
+    client.application.config['LLM_USAGE_BATCH_SIZE'] = 2
+    use_fake_openai(monkeypatch, _reply)
+
+    client.post('/api/job/analyze', json={'job_description': 'Python developer'})
+    assert _usage_rows() == []
+    client.post('/api/job/analyze', json={'job_description': 'Rust developer'})
+    assert len(_usage_rows()) == 2
+
+
+def test_failed_calls_are_metered(client, monkeypatch):
+    register_and_login(client)
+    request = httpx.Request('POST', 'https://api.openai.com/v1/chat/completions')
+
+    def reply(messages, **kwargs):
+        raise openai.BadRequestError('bad', response=httpx.Response(400, request=request), body=None)
+    use_fake_openai(monkeypatch, reply)
+
+    assert client.post('/api/job/analyze', json={'job_description': 'Python developer'}).status_code == 500
+    data = client.get('/api/usage').get_json()
+    assert data['by_kind'][0]['failures'] == 1
+    usage_service.flush()
+    assert [r['outcome'] for r in _usage_rows()] == ['error']
+
+
+def test_quota_refuses_calls_once_spent(client, monkeypatch):
+    register_and_login(client)
+    config = client.application.config
+    config['LLM_USER_TOKEN_QUOTA'] = 1000
+    config['LLM_USER_TOKENS_PER_HOUR'] = 3600
+    fake = use_fake_openai(monkeypatch, _reply, usage=(1500, 500))
+
+    assert client.post('/api/job/analyze', json={'job_description': 'Python developer'}).status_code == 201
+    res = client.post('/api/job/analyze', json={'job_description': 'Rust developer'})
+    assert res.status_code == 429
+    assert int(res.headers['Retry-After']) > 100
+    assert len(fake.calls) == 1
+
+    data = client.get('/api/usage').get_json()
+    assert data['by_kind'][0]['refused'] == 1
+    assert data['quota'] == {'limit': 1000, 'remaining': 0, 'tokens_per_hour': 3600}
+    usage_service.flush()
+    assert [r['outcome'] for r in _usage_rows()] == ['ok', 'quota']
+
+    # Each user has their own quota
+    client.post('/api/auth/logout')
+    register_and_login(client, username='other', email='other@example.com')
+    assert client.post('/api/job/analyze', json={'job_description': 'Rust developer'}).status_code == 201
+
+
+def test_token_bucket_settles_and_refills(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(usage_service.time, 'monotonic', lambda: now[0])
+
+    bucket = TokenBucket(100, 3600)
+    assert bucket.take(60) == 0
+    assert bucket.take(60) == 20
+    bucket.settle(-30)
+    assert bucket.take(60) == 0
+    assert bucket.level == 10
+
+    # A call bigger than the bucket waits for a full one
+    assert bucket.take(500) == 90
+    now[0] += 90
+    assert bucket.take(500) == 0
+    assert bucket.level == -400
+
+
+
+def test_stream_abandoned_before_its_first_event_is_metered(client, monkeypatch):
+    from flask_login import current_user
+
+    from app.services.openai_service import stream_blurbs
+    register_and_login(client)
+    fake = use_fake_openai(monkeypatch, _reply)
+
+    with client:
+        client.get('/api/usage')
+        _, suggestions = stream_blurbs(current_user.id, 'professional_summary', 'classic')
+        suggestions.close()
+        assert fake.chunks_sent == 0
+
+        usage_service.flush()
+        [row] = _usage_rows()
+        assert row['outcome'] == 'error'
+        # No usage was reported, so the prompt is charged at its estimate
+        assert row['prompt_tokens'] > 0
+        assert row['completion_tokens'] == 0
+
+
+def test_refilled_buckets_are_forgotten(app, monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(usage_service.time, 'monotonic', lambda: now[0])
+    app.config.update(LLM_USER_TOKEN_QUOTA=100, LLM_USER_TOKENS_PER_HOUR=3600, LLM_QUOTA_SWEEP_INTERVAL=60)
+    usage_service.reserve(app, 1, 'analyze', 'model', 80)
+    usage_service.reserve(app, 2, 'analyze', 'model', 10)
+
+    now[0] += 60
+    assert usage_service.quota_status(app, 1)['remaining'] == 80
+    # User 2 refilled and was dropped; user 1 still owes tokens
+    assert set(app.extensions['llm_usage'].buckets) == {1}
+
+
+def test_buffer_is_written_on_a_timer_without_further_calls(tmp_path):
+    import sqlite3
+    import time
+
+    from app import create_app
+    from scripts.stress_writes import make_config
+
+    config = make_config(str(tmp_path / 'usage.db'))
+    config.TASKS_RUN_INLINE = False
+    config.LLM_USAGE_FLUSH_INTERVAL = 0.1
+    app = create_app(config)
+    client = app.test_client()
+    register_and_login(client)
+    with app.app_context():
+        user_id = get_db().execute('SELECT id FROM users').fetchone()[0]
+
+    usage_service.record(app, user_id, 'analyze', 'model', prompt_tokens=7)
+    db = sqlite3.connect(app.config['DATABASE'])
+    deadline = time.monotonic() + 5
+    while not db.execute('SELECT COUNT(*) FROM llm_usage').fetchone()[0] and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert db.execute('SELECT user_id, prompt_tokens FROM llm_usage').fetchall() == [(user_id, 7)]
+    db.close()